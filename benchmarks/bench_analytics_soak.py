@@ -0,0 +1,117 @@
+"""
+Soak benchmark for the viz server's user analytics.
+
+Streams synthetic events from an ever-growing population of clients (each
+request carrying freshly built user-agent and IP strings, as real requests do)
+with a retention period of a few seconds, compacting frequently. Resident
+memory, in-memory sessions and the size of the event store should level off
+after the first retention period instead of growing with the event count.
+
+Usage:
+    python benchmarks/bench_analytics_soak.py --seconds 60 --rate 2000
+"""
+
+import argparse
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from llm_test_tool.analytics import UserAnalytics  # noqa: E402
+
+BROWSERS = ["Chrome/129.0.0.0", "Firefox/131.0", "Safari/605.1.15", "Edg/129.0.0.0"]
+EVENT_TYPES = ["page_visit", "model_selected", "chart_added_successfully", "tree_expanded"]
+
+
+def rss_mb() -> float:
+    """Current resident set size in MiB (falls back to the peak off Linux)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_request(rng: random.Random, client: int) -> SimpleNamespace:
+    """A request-like object with newly allocated header strings"""
+    user_agent = f"Mozilla/5.0 (X11; Linux x86_64) {BROWSERS[client % len(BROWSERS)]}"
+    ip = ".".join(str(part) for part in (10, client % 7, client % 11, client % 13))
+    return SimpleNamespace(
+        headers={"X-Client-ID": f"client-{client}", "User-Agent": user_agent},
+        client=SimpleNamespace(host=ip)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test analytics memory under a sustained event stream")
+    parser.add_argument("--seconds", type=float, default=60.0,
+                        help="Duration of the event stream")
+    parser.add_argument("--rate", type=int, default=2000,
+                        help="Events per second")
+    parser.add_argument("--active-clients", type=int, default=500,
+                        help="Clients sending events at any moment; the population keeps turning over")
+    parser.add_argument("--retention", type=float, default=5.0,
+                        help="Retention period in seconds")
+    parser.add_argument("--max-session-events", type=int, default=50,
+                        help="Events kept per session")
+    parser.add_argument("--compact-interval", type=float, default=2.0,
+                        help="Seconds between compactions")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench_analytics_"))
+    analytics = UserAnalytics(str(root / "user_analytics.json"), str(root / "events"),
+                              retention_days=args.retention / 86400, max_session_events=args.max_session_events,
+                              compact_interval=args.compact_interval)
+    rng = random.Random(0)
+    try:
+        analytics.get_stats()
+        print(f"{'time':>6} {'events':>10} {'sessions':>9} {'store':>9} {'RSS':>9}")
+        start = time.perf_counter()
+        sent = 0
+        samples = []
+        next_report = 0.0
+        while True:
+            elapsed = time.perf_counter() - start
+            if elapsed >= args.seconds:
+                break
+            # Catch up to the target rate, then yield to the writer thread
+            due = int(elapsed * args.rate)
+            for _ in range(due - sent):
+                # Clients drift forward, so old ones go idle and new ones keep arriving
+                client = sent // args.rate * args.active_clients // 10 + rng.randrange(args.active_clients)
+                event_type = rng.choice(EVENT_TYPES)
+                data = {"model_name": f"Model-{rng.randrange(40)}", "runtime": "vllm-v0.6.0",
+                        "instance_type": "p5.48xlarge"} if event_type == "model_selected" else {}
+                analytics.log_event(make_request(rng, client), event_type, data)
+            sent = max(sent, due)
+            time.sleep(0.01)
+
+            if elapsed >= next_report:
+                store = sum(path.stat().st_size for path in analytics.store_dir.glob("*")) / 1024 / 1024
+                samples.append(rss_mb())
+                print(f"{elapsed:>5.0f}s {sent:>10,} {len(analytics.sessions):>9,} {store:>7.1f}MiB "
+                      f"{samples[-1]:>7.1f}MiB")
+                next_report += max(1.0, args.seconds / 20)
+
+        stats = analytics.get_stats()
+        settled = samples[len(samples) // 2:]
+        print(f"events logged: {sent:,} (dropped under back-pressure: {analytics.dropped_events:,}), "
+              f"page views counted: {stats['total_page_views']:,}")
+        print(f"RSS over the second half: {min(settled):.1f}-{max(settled):.1f} MiB "
+              f"(growth {max(settled) - settled[0]:+.1f} MiB)")
+    finally:
+        analytics.close()
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
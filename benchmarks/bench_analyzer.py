@@ -0,0 +1,75 @@
+"""
+Micro-benchmark for ResultAnalyzer.analyze on synthetic results.
+
+Usage:
+    python benchmarks/bench_analyzer.py --requests 1000000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from llm_test_tool.analyzer import ResultAnalyzer  # noqa: E402
+from llm_test_tool.config import TestConfig  # noqa: E402
+
+
+def make_results(n: int, seed: int = 0):
+    """Generate n synthetic per-request results with ~1% failures"""
+    rng = random.Random(seed)
+    results = []
+    for request_id in range(n):
+        if rng.random() < 0.01:
+            results.append({"request_id": request_id, "success": False, "error": "timeout"})
+            continue
+        first_token = rng.lognormvariate(-2.0, 0.5)
+        completion = rng.randint(50, 400)
+        results.append({
+            "request_id": request_id,
+            "success": True,
+            "first_token_latency": first_token,
+            "end_to_end_latency": first_token + completion * rng.uniform(0.008, 0.02),
+            "prompt_tokens": 1600,
+            "completion_tokens": completion,
+            "total_tokens": 1600 + completion
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ResultAnalyzer.analyze")
+    parser.add_argument("--requests", type=int, default=1_000_000,
+                        help="Number of synthetic results")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed repetitions (best is reported)")
+    args = parser.parse_args()
+
+    print(f"Generating {args.requests:,} synthetic results...")
+    results = make_results(args.requests)
+    config = TestConfig(processes=128, requests_per_process=max(1, args.requests // 128), model_id="bench",
+                        input_tokens=1600, random_tokens=100, output_tokens=400, url="http://localhost",
+                        output_file="bench.json", percentiles=[95, 99, 99.9])
+
+    def best_of(fn):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    to_columns = best_of(lambda: ResultAnalyzer.to_columns(results))
+    without_ci = best_of(lambda: ResultAnalyzer.analyze(results, 60.0, config, bootstrap_resamples=0))
+    with_ci = best_of(lambda: ResultAnalyzer.analyze(results, 60.0, config))
+
+    print(f"to_columns:                   {to_columns:.3f}s")
+    print(f"analyze (no bootstrap):       {without_ci:.3f}s")
+    print(f"analyze (1000-resample CIs):  {with_ci:.3f}s")
+    print(f"throughput:                   {args.requests / with_ci:,.0f} results/s")
+
+
+if __name__ == "__main__":
+    main()
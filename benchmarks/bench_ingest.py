@@ -0,0 +1,112 @@
+"""
+Benchmark for building and refreshing the results index on a synthetic archive.
+
+Every file is a copy of one realistic result (statistics and timeline; per-request
+samples live in a sidecar file that the index never reads),
+spread over a few hundred runtime--instance--model directories.
+
+Usage:
+    python benchmarks/bench_ingest.py --files 100000
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bench_analyzer import make_results  # noqa: E402
+from llm_test_tool.analyzer import ResultAnalyzer  # noqa: E402
+from llm_test_tool.config import TestConfig  # noqa: E402
+from llm_test_tool.results_index import ResultsIndex, orjson  # noqa: E402
+
+
+def make_archive(root: Path, files: int, requests: int) -> None:
+    """Write files copies of one analyzed result into an archive layout"""
+    config = TestConfig(processes=16, requests_per_process=max(1, requests // 16), model_id="bench",
+                        input_tokens=1600, random_tokens=100, output_tokens=400, url="http://localhost",
+                        output_file="bench.json")
+    results = make_results(requests)
+    # Lay requests out in time so the result carries a realistic timeline
+    for k, result in enumerate(results):
+        result["start_time"] = 1000.0 + (k // 16) * 2.0
+        result["end_time"] = result["start_time"] + result.get("end_to_end_latency", 0.5)
+    analysis = ResultAnalyzer.analyze(results, 120.0, config, bootstrap_resamples=0)
+    # save_results moves the samples out of the JSON
+    analysis.pop("samples", None)
+    payload = json.dumps(analysis, indent=2)
+
+    per_dir = 500
+    for n in range(files):
+        directory = root / f"vllm-v0.{n // per_dir}.0--p5.48xlarge--Model-{n // per_dir}"
+        if n % per_dir == 0:
+            directory.mkdir(parents=True)
+        k = n % per_dir
+        (directory / f"test_in:{100 * (k // 25 + 1)}_out:{100 * (k % 25 + 1)}_proc:16_rand:100.json").write_text(payload)
+    print(f"Wrote {files:,} files of {len(payload) / 1024:.0f} KiB to {root}")
+
+
+def peak_rss_mb(who: int) -> float:
+    """Peak resident set size in MiB (ru_maxrss is KiB on Linux)"""
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark results index ingestion")
+    parser.add_argument("--files", type=int, default=100_000,
+                        help="Number of synthetic result files")
+    parser.add_argument("--requests", type=int, default=256,
+                        help="Requests per synthetic result (controls file size)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Parser processes for the parallel build (default: CPU count)")
+    parser.add_argument("--dir", type=str, default=None,
+                        help="Directory for the synthetic archive (default: a temp dir, removed afterwards)")
+    args = parser.parse_args()
+
+    root = Path(args.dir or tempfile.mkdtemp(prefix="bench_ingest_"))
+    archive = root / "archive_results"
+    try:
+        make_archive(archive, args.files, args.requests)
+        print(f"JSON decoder: {'orjson' if orjson is not None else 'json (stdlib)'}, CPUs: {os.cpu_count()}")
+
+        def cold_build(workers: int, name: str) -> float:
+            index_path = root / f"{name}.sqlite"
+            index = ResultsIndex(str(archive), str(index_path), workers=workers)
+            start = time.perf_counter()
+            index.refresh()
+            elapsed = time.perf_counter() - start
+            index.close()
+            return elapsed
+
+        serial = cold_build(1, "serial")
+        parallel = cold_build(args.workers, "parallel")
+
+        index = ResultsIndex(str(archive), str(root / "parallel.sqlite"), workers=args.workers)
+        start = time.perf_counter()
+        index.refresh()
+        warm = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df = index.load_dataframe()
+        load = time.perf_counter() - start
+        index.close()
+
+        print(f"cold build, 1 worker:          {serial:.2f}s  ({args.files / serial:,.0f} files/s)")
+        print(f"cold build, {index.workers} workers:        {parallel:.2f}s  ({args.files / parallel:,.0f} files/s)")
+        print(f"warm refresh (no changes):     {warm:.2f}s")
+        print(f"load_dataframe ({len(df):,} rows): {load:.2f}s")
+        print(f"peak RSS: {peak_rss_mb(resource.RUSAGE_SELF):.0f} MiB main process, "
+              f"{peak_rss_mb(resource.RUSAGE_CHILDREN):.0f} MiB largest worker")
+    finally:
+        if args.dir is None:
+            shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark for the viz server's performance-data queries against archive size.
+
+Builds synthetic result frames of growing size, then times a typical chart query
+(one runtime/instance/model at fixed input/output/random tokens) through the
+partitioned snapshot and through the previous copy-and-mask implementation.
+
+Usage:
+    python benchmarks/bench_viz_queries.py --sizes 1000 10000 100000 1000000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from llm_test_tool.results_data import ResultsSnapshot  # noqa: E402
+from llm_test_tool.results_index import RECORD_FIELDS  # noqa: E402
+
+INPUT_TOKENS = [100, 400, 1600, 6400, 12800]
+OUTPUT_TOKENS = [100, 400, 1000]
+RANDOM_TOKENS = [0, 100]
+PROCESSES = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic index rows: full test matrices for as many deployments as needed"""
+    rng = np.random.default_rng(seed)
+    grid = [(i, o, r, p) for i in INPUT_TOKENS for o in OUTPUT_TOKENS for r in RANDOM_TOKENS for p in PROCESSES]
+    deployments = -(-rows // len(grid))
+    # Shuffle so partitions are not contiguous, as in a real archive scan
+    order = rng.permutation(deployments * len(grid))[:rows]
+
+    deployment, case = np.divmod(order, len(grid))
+    cases = np.array(grid)[case]
+    columns = {name: rng.random(rows) for name in RECORD_FIELDS}
+    columns.update({
+        'runtime': [f"vllm-v0.{d % 20}.0" for d in deployment],
+        'instance_type': [f"p{d % 7}.48xlarge" for d in deployment],
+        'model_name': [f"Model-{d}" for d in deployment],
+        'input_tokens': cases[:, 0], 'output_tokens': cases[:, 1],
+        'random_tokens': cases[:, 2], 'processes': cases[:, 3],
+        'throughput_exact': rng.random(rows) < 0.5,
+        'file_path': [f"archive_results/{k}.json" for k in range(rows)]
+    })
+    return pd.DataFrame({name: columns[name] for name in RECORD_FIELDS})
+
+
+def legacy_query(df: pd.DataFrame, filters: dict) -> list:
+    """The previous get_performance_data: copy the frame, one mask per filter"""
+    filtered_df = df.copy()
+    for key, value in filters.items():
+        if key in filtered_df.columns and value is not None:
+            if isinstance(value, list):
+                filtered_df = filtered_df[filtered_df[key].isin(value)]
+            else:
+                filtered_df = filtered_df[filtered_df[key] == value]
+    return filtered_df.sort_values('processes').to_dict('records')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark viz performance-data queries")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Archive sizes (result rows) to benchmark")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="Random chart queries per size")
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'build':>8} {'query':>10} {'legacy':>10} {'+json':>10} {'speedup':>8}")
+    for rows in args.sizes:
+        df = make_frame(rows)
+        start = time.perf_counter()
+        snapshot = ResultsSnapshot(df, 1)
+        build = time.perf_counter() - start
+
+        rng = random.Random(rows)
+        combos = list(snapshot.partitions)
+        filters = [
+            {'runtime': r, 'instance_type': i, 'model_name': m, 'input_tokens': rng.choice(INPUT_TOKENS),
+             'output_tokens': rng.choice(OUTPUT_TOKENS), 'random_tokens': rng.choice(RANDOM_TOKENS)}
+            for r, i, m in (rng.choice(combos) for _ in range(args.queries))
+        ]
+
+        def per_query(fn) -> float:
+            start = time.perf_counter()
+            for f in filters:
+                fn(f)
+            return (time.perf_counter() - start) / len(filters)
+
+        query = per_query(snapshot.query)
+        serialized = per_query(lambda f: json.dumps(snapshot.query(f)))
+        # The legacy path is slow on big frames; a few queries are enough
+        legacy_filters, filters = filters, filters[:max(1, min(len(filters), 2_000_000 // rows))]
+        legacy = per_query(lambda f: legacy_query(df, f))
+        filters = legacy_filters
+
+        print(f"{rows:>9,} {build:>7.2f}s {query * 1e6:>8.0f}µs {legacy * 1e6:>8.0f}µs "
+              f"{serialized * 1e6:>8.0f}µs {legacy / query:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
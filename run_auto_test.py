@@ -35,6 +35,13 @@ Examples:
   
   # Force rerun all tests (ignore existing results)
   python run_auto_test.py --config config.yaml --force-rerun
+  
+  # Keep the server running and reuse it for the next config with the same deployment
+  python run_auto_test.py --config config_a.yaml --keep-deployment
+  python run_auto_test.py --config config_b.yaml
+  
+  # Deploy 8 replicas of a tp1 model and shard the test matrix across them
+  python run_auto_test.py --config config.yaml --replicas 8
         """
     )
     
@@ -70,6 +77,25 @@ Examples:
         help="Force rerun all tests, ignoring existing results"
     )
     
+    parser.add_argument(
+        "--force-redeploy",
+        action="store_true",
+        help="Restart the server even if a healthy container with the same deployment is running"
+    )
+    
+    parser.add_argument(
+        "--keep-deployment",
+        action="store_true",
+        help="Leave the server running after the tests so a later run can reuse it"
+    )
+    
+    parser.add_argument(
+        "--replicas",
+        type=int,
+        default=None,
+        help="Number of server replicas to deploy on disjoint GPU sets (default: deployment.replicas or 1)"
+    )
+    
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -95,11 +121,13 @@ def main():
     print(f"Verbose mode: {'enabled' if args.verbose else 'disabled'}")
     print(f"Skip deployment: {'yes' if args.skip_deployment else 'no'}")
     print(f"Force rerun: {'yes' if args.force_rerun else 'no'}")
+    if args.replicas:
+        print(f"Replicas: {args.replicas}")
     print(f"Dry run: {'yes' if args.dry_run else 'no'}")
     print("-" * 60)
     
     try:
-        runner = AutoTestRunner(args.config, args.output_dir)
+        runner = AutoTestRunner(args.config, args.output_dir, replicas=args.replicas)
         
         # Show the actual output directory being used
         if args.output_dir is None:
@@ -142,7 +170,8 @@ def main():
         
         # Run the tests
         skip_existing = not args.force_rerun
-        runner.run_all_tests(skip_existing=skip_existing, skip_deployment=args.skip_deployment)
+        runner.run_all_tests(skip_existing=skip_existing, skip_deployment=args.skip_deployment,
+                             force_redeploy=args.force_redeploy, keep_deployment=args.keep_deployment)
             
     except KeyboardInterrupt:
         print("\nTest interrupted by user")
@@ -6,7 +6,12 @@ import sys
 from .main import main
 from .auto_test import main as auto_test_main
 from .deploy_only import main as deploy_main
-from .viz_server import main as viz_main
+from .campaign import main as campaign_main
+from .mock_server import main as mock_server_main
+from .tuning import main as tune_main
+from .compare import main as compare_main
+from .latency_model import main as latency_model_main
+from .results_index import main as index_main
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
@@ -19,9 +24,35 @@ if __name__ == "__main__":
             sys.argv = [sys.argv[0]] + sys.argv[2:]
             deploy_main()
         elif sys.argv[1] == "viz":
+            # Import lazily: the viz server loads the results archive at import time
+            from .viz_server import main as viz_main
             # Remove the viz argument and pass the rest to viz_main
             sys.argv = [sys.argv[0]] + sys.argv[2:]
             viz_main()
+        elif sys.argv[1] == "campaign":
+            # Remove the campaign argument and pass the rest to campaign_main
+            sys.argv = [sys.argv[0]] + sys.argv[2:]
+            campaign_main()
+        elif sys.argv[1] == "tune":
+            # Remove the tune argument and pass the rest to tune_main
+            sys.argv = [sys.argv[0]] + sys.argv[2:]
+            tune_main()
+        elif sys.argv[1] == "compare":
+            # Remove the compare argument and pass the rest to compare_main
+            sys.argv = [sys.argv[0]] + sys.argv[2:]
+            compare_main()
+        elif sys.argv[1] == "latency-model":
+            # Remove the latency-model argument and pass the rest to latency_model_main
+            sys.argv = [sys.argv[0]] + sys.argv[2:]
+            latency_model_main()
+        elif sys.argv[1] == "index":
+            # Remove the index argument and pass the rest to index_main
+            sys.argv = [sys.argv[0]] + sys.argv[2:]
+            index_main()
+        elif sys.argv[1] == "mock-server":
+            # Remove the mock-server argument and pass the rest to mock_server_main
+            sys.argv = [sys.argv[0]] + sys.argv[2:]
+            mock_server_main()
         else:
             main()
     else:
@@ -0,0 +1,553 @@
+"""
+User analytics for the visualization server.
+
+Events are appended to NDJSON segment files by a background writer thread
+that batches them through a bounded queue, so logging an event never blocks a
+request on disk I/O. The in-memory sessions are rebuilt from the segments the
+first time they are needed rather than at startup. A legacy
+user_analytics.json file is migrated into the first segment once.
+
+The stats (counters, top-K rankings, daily totals and the latest chart
+additions) are kept up to date as events are applied, so computing them is
+independent of history.
+
+Memory and disk stay bounded: sessions idle for longer than the retention
+period are evicted, each session keeps only its newest events, and repeated
+strings (user agents, IPs, event types) are interned. The writer periodically
+compacts the segments, dropping the same events and folding them into a
+rollup header, so the all-time stats survive a restart.
+"""
+
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from bisect import bisect_right, insort
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from fastapi import Request
+
+logger = logging.getLogger(__name__)
+
+# Events waiting to be written; beyond this, new events are dropped and counted
+QUEUE_SIZE = 10000
+
+# The writer appends everything queued in one write, up to this many events
+WRITE_BATCH_SIZE = 500
+
+# A new segment is started once the current one reaches this size
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+
+SEGMENT_PATTERN = "events-*.ndjson"
+
+# Sizes of the popularity rankings and the recent chart additions list in the stats
+TOP_K = 10
+RECENT_CHART_ADDITIONS = 20
+
+# Days of daily totals kept and reported in the stats
+DAILY_ACTIVITY_DAYS = 30
+
+# Retention defaults, overridable through ANALYTICS_RETENTION_DAYS (0 keeps events forever),
+# ANALYTICS_MAX_SESSION_EVENTS and ANALYTICS_COMPACT_INTERVAL (seconds, 0 disables)
+DEFAULT_RETENTION_DAYS = 30.0
+DEFAULT_MAX_SESSION_EVENTS = 200
+DEFAULT_COMPACT_INTERVAL = 3600.0
+
+CHART_ADDITION_EVENTS = ('chart_added_successfully', 'model_added_to_comparison')
+
+# Event fields whose values repeat across events and are interned
+INTERNED_FIELDS = ('type', 'ip', 'user_agent')
+
+# Queue marker asking the writer to compact the segments
+_COMPACT = object()
+
+
+def _intern(value: Any) -> Any:
+    """Intern strings, leave everything else as is"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TopK:
+    """Counts per key with the k largest maintained incrementally
+
+    Counts only grow, so a key can only enter the ranking by overtaking its last
+    entry, and each increment costs O(k). Ties rank in first-seen order.
+    """
+
+    __slots__ = ('k', 'counts', 'first_seen', 'ranking')
+
+    def __init__(self, k: int = TOP_K):
+        self.k = k
+        self.counts = {}
+        self.first_seen = {}
+        # (-count, first_seen, key), best first
+        self.ranking = []
+
+    def add(self, key: str, n: int = 1) -> None:
+        """Count n occurrences of key"""
+        count = self.counts.get(key, 0)
+        if key not in self.first_seen:
+            self.first_seen[key] = len(self.first_seen)
+        entry = (-count, self.first_seen[key], key)
+        if count and entry in self.ranking:
+            self.ranking.remove(entry)
+        self.counts[key] = count + n
+
+        entry = (-(count + n), self.first_seen[key], key)
+        if len(self.ranking) < self.k or entry < self.ranking[-1]:
+            insort(self.ranking, entry)
+            del self.ranking[self.k:]
+
+    def top(self) -> List[tuple]:
+        """(key, count) pairs, most frequent first"""
+        return [(key, -negative) for negative, _, key in self.ranking]
+
+
+class Aggregates:
+    """All-time stats of a stream of events, serializable as a rollup"""
+
+    def __init__(self, rollup: Optional[Dict[str, Any]] = None):
+        """Start empty or from a rollup written by to_dict"""
+        rollup = rollup or {}
+        self.counts = {'page_visit': 0, 'model_selected': 0, 'chart_addition': 0}
+        self.counts.update(rollup.get('counts', {}))
+        self.popular = {'model_name': TopK(), 'runtime': TopK(), 'instance_type': TopK()}
+        for field, counts in rollup.get('popular', {}).items():
+            # Counts are stored in first-seen order, which keeps ties stable
+            for key, n in counts.items():
+                self.popular[field].add(key, n)
+        # Day -> event totals, only for the newest DAILY_ACTIVITY_DAYS days
+        daily = rollup.get('daily', {})
+        self.daily = {day: daily[day] for day in sorted(daily)[-DAILY_ACTIVITY_DAYS:]}
+        self.recent_chart_additions = deque(rollup.get('recent_chart_additions', []), maxlen=RECENT_CHART_ADDITIONS)
+
+    def add(self, event: Dict[str, Any]) -> None:
+        """Count one event"""
+        day = self.daily.get(event['timestamp'][:10]) or self._new_day(event['timestamp'][:10])
+        day['events'] += 1
+
+        event_type = event['type']
+        if event_type == 'page_visit':
+            self.counts['page_visit'] += 1
+            day['page_views'] += 1
+        elif event_type == 'model_selected':
+            self.counts['model_selected'] += 1
+            day['model_selections'] += 1
+            for field, ranking in self.popular.items():
+                ranking.add(event['data'].get(field, 'unknown'))
+        elif event_type in CHART_ADDITION_EVENTS:
+            self.counts['chart_addition'] += 1
+            day['chart_additions'] += 1
+            self._add_recent_chart_addition(event)
+
+    def _add_recent_chart_addition(self, event: Dict[str, Any]) -> None:
+        """Keep the newest chart additions in timestamp order
+
+        Events mostly arrive in order, but a rollup holds events dropped by the
+        per-session cap, which can be newer than the kept events replayed after it.
+        """
+        recent = self.recent_chart_additions
+        timestamp = event['timestamp']
+        if not recent or recent[-1]['timestamp'] <= timestamp:
+            recent.append(event)
+            return
+        if len(recent) == recent.maxlen:
+            if timestamp < recent[0]['timestamp']:
+                return
+            recent.popleft()
+        recent.insert(bisect_right([e['timestamp'] for e in recent], timestamp), event)
+
+    def _new_day(self, date: str) -> Dict[str, int]:
+        """Start the totals of a day, evicting the oldest day beyond the reporting window
+
+        A day older than every day in a full window gets scratch totals that are not kept.
+        """
+        day = {'events': 0, 'page_views': 0, 'model_selections': 0, 'chart_additions': 0}
+        if len(self.daily) >= DAILY_ACTIVITY_DAYS:
+            oldest = min(self.daily)
+            if date < oldest:
+                return day
+            del self.daily[oldest]
+        self.daily[date] = day
+        return day
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form, read back by the constructor"""
+        return {
+            'counts': self.counts,
+            'popular': {field: ranking.counts for field, ranking in self.popular.items()},
+            'daily': self.daily,
+            'recent_chart_additions': list(self.recent_chart_additions)
+        }
+
+
+class UserAnalytics:
+    """Analytics tracker for user behavior"""
+
+    def __init__(self, log_file: str = None, store_dir: str = None, retention_days: float = None,
+                 max_session_events: int = None, compact_interval: float = None):
+        """log_file is the legacy JSON file; segments go to store_dir (default: <log_file stem>.events/)"""
+        if log_file is None:
+            log_file = os.environ.get('ANALYTICS_FILE', 'user_analytics.json')
+        if retention_days is None:
+            retention_days = float(os.environ.get('ANALYTICS_RETENTION_DAYS', DEFAULT_RETENTION_DAYS))
+        if max_session_events is None:
+            max_session_events = int(os.environ.get('ANALYTICS_MAX_SESSION_EVENTS', DEFAULT_MAX_SESSION_EVENTS))
+        if compact_interval is None:
+            compact_interval = float(os.environ.get('ANALYTICS_COMPACT_INTERVAL', DEFAULT_COMPACT_INTERVAL))
+        self.log_file = Path(log_file)
+        self.store_dir = Path(store_dir) if store_dir else self.log_file.with_suffix('.events')
+        self.retention_days = retention_days
+        self.max_session_events = max(1, max_session_events)
+        self.compact_interval = compact_interval
+        self.dropped_events = 0
+
+        # Least recently active first, so expired sessions are evicted from the front
+        self._sessions = OrderedDict()
+        # Set by the writer thread once the stored events are replayed into memory
+        self._loaded = False
+        self._load_done = threading.Event()
+        # Stats behind get_stats, updated as each event is applied
+        self._aggregates = Aggregates()
+        # Events older than this timestamp are expired; recomputed at most once per second
+        self._cutoff = ''
+        self._cutoff_second = None
+        # Guards the in-memory sessions and orders enqueueing against the lazy load
+        self._lock = threading.Lock()
+        # Held by the writer while it changes the segments, and by the loader while reading them
+        self._store_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._writer = threading.Thread(target=self._write_loop, name="analytics-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def sessions(self) -> Dict[str, Dict[str, Any]]:
+        """Sessions keyed by client ID; waits for the startup replay of the event store"""
+        self._ensure_loaded()
+        return self._sessions
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the stored events have been replayed into memory"""
+        return self._loaded
+
+    def _ensure_loaded(self) -> None:
+        """Wait for the writer thread to replay the stored events
+
+        Blocks until the startup replay finishes, so call it off the event loop.
+        """
+        self._load_done.wait()
+
+    def _load(self) -> None:
+        """Replay the event segments into memory; runs on the writer thread before it appends
+
+        The writer is the only thread appending, so at this point the segments hold
+        exactly the events that are no longer queued. Events logged meanwhile are
+        still in the queue and are applied from there, under the lock that orders
+        them against log_event.
+        """
+        rollup, segments = self._live_segments()
+        self._aggregates = Aggregates(rollup)
+        for event in self._read_events(segments):
+            self._apply(event)
+        with self._lock:
+            with self._queue.mutex:
+                queued = [item for item in self._queue.queue if isinstance(item, dict)]
+            for event in queued:
+                self._apply(event)
+            self._expire(datetime.now().isoformat())
+            self._loaded = True
+
+    def _segments(self) -> List[Path]:
+        """Segment files in write order"""
+        return sorted(self.store_dir.glob(SEGMENT_PATTERN))
+
+    def _live_segments(self) -> Tuple[Optional[Dict[str, Any]], List[Path]]:
+        """The newest rollup and the segments from the one holding it on
+
+        Segments before the last compacted one are leftovers of an interrupted
+        compaction; their events are already in it.
+        """
+        segments = self._segments()
+        for position in range(len(segments) - 1, -1, -1):
+            with open(segments[position], 'r', encoding='utf-8') as f:
+                first_line = f.readline()
+            if first_line.startswith('{"rollup"'):
+                try:
+                    return json.loads(first_line)['rollup'], segments[position:]
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed analytics rollup in {segments[position]}")
+        return None, segments
+
+    def _read_events(self, segments: List[Path]):
+        """Yield stored events in write order, skipping rollups and a torn last line"""
+        for segment in segments:
+            with open(segment, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping malformed analytics line in {segment}")
+                        continue
+                    if 'rollup' not in event:
+                        yield event
+
+    def _migrate_legacy_file(self) -> None:
+        """Convert a legacy sessions JSON file into the first segment"""
+        if not self.log_file.exists() or self._segments():
+            return
+        try:
+            with open(self.log_file, 'r') as f:
+                sessions = json.load(f).get('sessions', {})
+        except Exception as e:
+            logger.error(f"Failed to load analytics data: {e}")
+            return
+
+        events = [
+            {'client_id': client_id, **event}
+            for client_id, session in sessions.items()
+            for event in session.get('events', [])
+        ]
+        events.sort(key=lambda event: event.get('timestamp', ''))
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        # Write aside and rename, so a crash never leaves a partial first segment
+        partial = self.store_dir / "events-000001.ndjson.tmp"
+        with open(partial, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(event, ensure_ascii=False) + '\n' for event in events)
+        partial.rename(self.store_dir / "events-000001.ndjson")
+        self.log_file.rename(self.log_file.with_name(self.log_file.name + '.migrated'))
+        logger.info(f"Migrated {len(events)} analytics events from {self.log_file} to {self.store_dir}")
+
+    def _retention_cutoff(self, now: str) -> str:
+        """Timestamp before which events are expired, '' when retention is off"""
+        if self.retention_days <= 0:
+            return ''
+        return (datetime.fromisoformat(now[:19]) - timedelta(days=self.retention_days)).isoformat()
+
+    def _expire(self, now: str) -> None:
+        """Evict sessions whose last event is older than the retention period"""
+        if now[:19] != self._cutoff_second:
+            self._cutoff_second = now[:19]
+            self._cutoff = self._retention_cutoff(now)
+        while self._sessions:
+            client_id, session = next(iter(self._sessions.items()))
+            if session['last_visit'] >= self._cutoff:
+                break
+            del self._sessions[client_id]
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        """Add one event to the in-memory sessions"""
+        timestamp = event['timestamp']
+        client_id = sys.intern(event['client_id'])
+        self._expire(timestamp)
+        session = self._sessions.get(client_id)
+        if session is None:
+            session = self._sessions[client_id] = {
+                'first_visit': timestamp,
+                'last_visit': timestamp,
+                'visit_count': 0,
+                'events': deque(maxlen=self.max_session_events)
+            }
+        else:
+            self._sessions.move_to_end(client_id)
+            events = session['events']
+            while events and events[0]['timestamp'] < self._cutoff:
+                events.popleft()
+        session['last_visit'] = timestamp
+        session['visit_count'] += 1
+
+        stored = {sys.intern(key): value for key, value in event.items() if key != 'client_id'}
+        for field in INTERNED_FIELDS:
+            if field in stored:
+                stored[field] = _intern(stored[field])
+        if isinstance(stored.get('data'), dict):
+            stored['data'] = {sys.intern(key): _intern(value) for key, value in stored['data'].items()}
+        session['events'].append(stored)
+        self._aggregates.add(stored)
+
+    def get_client_id(self, request: Request) -> str:
+        """Generate or retrieve client ID from request"""
+        # Try to get client ID from headers (set by client-side JS)
+        client_id = request.headers.get('X-Client-ID')
+        if not client_id:
+            # Fallback to IP-based identification
+            client_ip = request.client.host if request.client else 'unknown'
+            user_agent = request.headers.get('User-Agent', 'unknown')
+            client_id = f"{client_ip}_{hash(user_agent) % 10000}"
+        return client_id
+
+    def log_event(self, request: Request, event_type: str, data: dict = None):
+        """Log user event; persisted asynchronously by the writer thread"""
+        client_id = self.get_client_id(request)
+        event = {
+            'client_id': client_id,
+            'timestamp': datetime.now().isoformat(),
+            'type': event_type,
+            'data': data or {},
+            'ip': request.client.host if request.client else 'unknown',
+            'user_agent': request.headers.get('User-Agent', 'unknown')
+        }
+
+        with self._lock:
+            if self._loaded:
+                self._apply(event)
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self.dropped_events += 1
+
+        # Log to console
+        logger.info(f"Analytics: {client_id} - {event_type} - {data}")
+
+    def _write_loop(self) -> None:
+        """Migrate legacy data and load it, then drain the queue in batches and compact periodically"""
+        try:
+            self._migrate_legacy_file()
+            with self._store_lock:
+                self._load()
+        except Exception as e:
+            logger.error(f"Failed to load analytics data: {e}")
+            # Keep counting new events on top of whatever was replayed
+            with self._lock:
+                self._loaded = True
+        finally:
+            self._load_done.set()
+
+        # Compact once at startup, then every compact_interval seconds
+        next_compaction = time.monotonic()
+        while True:
+            timeout = max(0.0, next_compaction - time.monotonic()) if self.compact_interval > 0 else None
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = bool(batch) and batch[-1] is None
+            events = [event for event in batch if isinstance(event, dict)]
+            due = self.compact_interval > 0 and time.monotonic() >= next_compaction
+            try:
+                with self._store_lock:
+                    if events:
+                        self._append(events)
+                    if due or any(item is _COMPACT for item in batch):
+                        self._compact()
+            except Exception as e:
+                logger.error(f"Failed to save analytics data: {e}")
+            finally:
+                if due:
+                    next_compaction = time.monotonic() + self.compact_interval
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _append(self, events: List[Dict[str, Any]]) -> None:
+        """Append events to the newest segment, starting a new one when it is full"""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        segments = self._segments()
+        segment = segments[-1] if segments else self.store_dir / "events-000001.ndjson"
+        if segment.exists() and segment.stat().st_size >= SEGMENT_MAX_BYTES:
+            number = int(segment.stem.split('-')[1]) + 1
+            segment = self.store_dir / f"events-{number:06d}.ndjson"
+        with open(segment, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(event, ensure_ascii=False) + '\n' for event in events))
+
+    def _compact(self) -> None:
+        """Rewrite the live segments without expired events, folding those into the rollup
+
+        An event is dropped when it is older than the retention period or not
+        among the newest max_session_events of its client. The result is a new
+        segment whose first line is the rollup; it replaces all older segments.
+        """
+        rollup, live = self._live_segments()
+        segments = self._segments()
+        if not live:
+            return
+
+        events = list(self._read_events(live))
+        cutoff = self._retention_cutoff(datetime.now().isoformat())
+        keep = [False] * len(events)
+        kept_per_client = {}
+        for position in range(len(events) - 1, -1, -1):
+            event = events[position]
+            if event.get('timestamp', '') < cutoff:
+                continue
+            kept = kept_per_client.get(event['client_id'], 0)
+            if kept < self.max_session_events:
+                keep[position] = True
+                kept_per_client[event['client_id']] = kept + 1
+
+        dropped = len(events) - sum(keep)
+        if not dropped and len(segments) == len(live):
+            return
+
+        aggregates = Aggregates(rollup)
+        for event, kept in zip(events, keep):
+            if not kept:
+                aggregates.add({key: value for key, value in event.items() if key != 'client_id'})
+
+        number = int(segments[-1].stem.split('-')[1]) + 1
+        compacted = self.store_dir / f"events-{number:06d}.ndjson"
+        partial = compacted.with_suffix('.ndjson.tmp')
+        with open(partial, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'rollup': aggregates.to_dict()}, ensure_ascii=False) + '\n')
+            f.writelines(json.dumps(event, ensure_ascii=False) + '\n'
+                         for event, kept in zip(events, keep) if kept)
+        # Once the rename lands the older segments are superseded, even if removing them fails
+        partial.rename(compacted)
+        for segment in segments:
+            segment.unlink()
+        logger.info(f"Compacted analytics store: rolled up {dropped} events, kept {len(events) - dropped}")
+
+    def compact(self) -> None:
+        """Compact the segments now and wait for it to finish"""
+        if self._writer.is_alive():
+            self._queue.put(_COMPACT)
+            self.flush()
+        else:
+            with self._store_lock:
+                self._compact()
+
+    def flush(self) -> None:
+        """Block until every logged event is written"""
+        if self._writer.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        """Flush pending events and stop the writer"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def get_stats(self) -> dict:
+        """Get analytics statistics from the incrementally maintained aggregates"""
+        self._ensure_loaded()
+        with self._lock:
+            self._expire(datetime.now().isoformat())
+            aggregates = self._aggregates
+            days = sorted(aggregates.daily)[-DAILY_ACTIVITY_DAYS:]
+            return {
+                # Distinct clients active within the retention period (not an all-time count)
+                'active_users': len(self._sessions),
+                'total_page_views': aggregates.counts['page_visit'],
+                'total_model_selections': aggregates.counts['model_selected'],
+                'total_chart_additions': aggregates.counts['chart_addition'],
+                'popular_models': aggregates.popular['model_name'].top(),
+                'popular_runtimes': aggregates.popular['runtime'].top(),
+                'popular_instances': aggregates.popular['instance_type'].top(),
+                # Events arrive in time order, so the newest are at the right end
+                'recent_chart_additions': list(reversed(aggregates.recent_chart_additions)),
+                'daily_activity': [{'date': day, **aggregates.daily[day]} for day in days],
+                'retention_days': self.retention_days
+            }
@@ -3,22 +3,64 @@ Results analysis module for LLM Test Tool.
 """
 
 import json
-import statistics
+import math
+from pathlib import Path
 from typing import Dict, List, Any
 
+import numpy as np
+
 from .config import TestConfig
+from .timeline import TimelineAnalyzer
+
+
+# Percentiles always reported for every metric; configured ones are added to these
+DEFAULT_PERCENTILES = [25, 50, 75, 90]
+
+# Above this many resampled elements the bootstrap of the mean uses the normal approximation
+BOOTSTRAP_MAX_ELEMENTS = 10_000_000
+
+# Per-request fields converted to columns; token counts use -1 for "not reported"
+TIME_FIELDS = ["first_token_latency", "end_to_end_latency", "start_time", "end_time"]
+TOKEN_FIELDS = ["prompt_tokens", "completion_tokens", "total_tokens"]
+
+
+def samples_path(result_file: str) -> Path:
+    """Sidecar file holding the raw per-request samples of a result JSON"""
+    path = Path(result_file)
+    return path.with_name(f"{path.stem}.samples.npz")
+
+
+def percentile_key(p: float) -> str:
+    """Result key for a percentile given in percent, e.g. 99.9 -> 'p99.9'"""
+    return f"p{p:g}"
 
 
 class ResultAnalyzer:
     """Analyzes test results and generates statistics"""
     
     @staticmethod
-    def analyze(results: List[Dict[str, Any]], test_duration: float, config: TestConfig) -> Dict[str, Any]:
-        """Analyze test results and generate statistics"""
-        successful_requests = [r for r in results if r["success"]]
-        failed_requests = [r for r in results if not r["success"]]
+    def to_columns(results: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Convert per-request result dicts into NumPy column arrays (NaN / -1 for missing values)"""
+        n = len(results)
+        columns = {"success": np.fromiter((r["success"] for r in results), dtype=bool, count=n)}
+        for field in TIME_FIELDS:
+            columns[field] = np.fromiter(
+                (np.nan if r.get(field) is None else r[field] for r in results), dtype=float, count=n
+            )
+        for field in TOKEN_FIELDS:
+            columns[field] = np.fromiter((r.get(field, -1) for r in results), dtype=np.int64, count=n)
+        return columns
+    
+    @staticmethod
+    def analyze(results: List[Dict[str, Any]], test_duration: float, config: TestConfig,
+                confidence: float = 0.95, bootstrap_resamples: int = 1000) -> Dict[str, Any]:
+        """Analyze test results and generate statistics
         
-        if not successful_requests:
+        Every metric gets the default percentiles plus config.percentiles, and bootstrap
+        confidence intervals at the given confidence level (bootstrap_resamples=0 disables them).
+        """
+        failed_requests = [r for r in results if not r["success"]]
+        if len(failed_requests) == len(results):
             return {
                 "total_requests": len(results),
                 "successful_requests": 0,
@@ -27,49 +69,57 @@ class ResultAnalyzer:
                 "error_messages": [r["error"] for r in failed_requests if "error" in r]
             }
         
-        first_token_latencies = [r["first_token_latency"] for r in successful_requests 
-                                if r["first_token_latency"] is not None]
-        end_to_end_latencies = [r["end_to_end_latency"] for r in successful_requests 
-                               if r["end_to_end_latency"] is not None]
+        columns = ResultAnalyzer.to_columns(results)
+        success = columns["success"]
+        first_token_latencies = columns["first_token_latency"][success]
+        end_to_end_latencies = columns["end_to_end_latency"][success]
+        first_token_latencies = first_token_latencies[~np.isnan(first_token_latencies)]
+        end_to_end_latencies = end_to_end_latencies[~np.isnan(end_to_end_latencies)]
         
         # Collect token usage statistics
-        prompt_tokens = [r["prompt_tokens"] for r in successful_requests if "prompt_tokens" in r]
-        completion_tokens = [r["completion_tokens"] for r in successful_requests if "completion_tokens" in r]
-        total_tokens = [r["total_tokens"] for r in successful_requests if "total_tokens" in r]
+        token_usage = {}
+        for field in TOKEN_FIELDS:
+            values = columns[field][success]
+            token_usage[field] = values[values >= 0]
         
         # Calculate output tokens per second (completion_tokens / (end_to_end_latency - first_token_latency))
-        output_tokens_per_second = []
-        for r in successful_requests:
-            if (r.get("completion_tokens", 0) > 0 and 
-                r.get("end_to_end_latency") is not None and 
-                r.get("first_token_latency") is not None):
-                generation_time = r["end_to_end_latency"] - r["first_token_latency"]
-                if generation_time > 0:
-                    tokens_per_sec = r["completion_tokens"] / generation_time
-                    output_tokens_per_second.append(tokens_per_sec)
+        completion = columns["completion_tokens"]
+        generation_time = columns["end_to_end_latency"] - columns["first_token_latency"]
+        with np.errstate(invalid='ignore'):
+            decoding = success & (completion > 0) & (generation_time > 0)
+        output_tokens_per_second = completion[decoding] / generation_time[decoding]
         
         # Calculate statistics
+        percentiles = sorted(set(DEFAULT_PERCENTILES) | set(config.percentiles or []))
+        metric_args = {"percentiles": percentiles, "confidence": confidence,
+                       "bootstrap_resamples": bootstrap_resamples}
+        successful_count = int(success.sum())
         stats = {
             "total_requests": len(results),
-            "successful_requests": len(successful_requests),
+            "successful_requests": successful_count,
             "failed_requests": len(failed_requests),
-            "success_rate": len(successful_requests) / len(results) if results else 0,
+            "success_rate": successful_count / len(results) if results else 0,
             
             # First token latency stats
-            "first_token_latency": ResultAnalyzer._calculate_metrics(first_token_latencies),
+            "first_token_latency": ResultAnalyzer._calculate_metrics(first_token_latencies, **metric_args),
             
             # End-to-end latency stats
-            "end_to_end_latency": ResultAnalyzer._calculate_metrics(end_to_end_latencies),
+            "end_to_end_latency": ResultAnalyzer._calculate_metrics(end_to_end_latencies, **metric_args),
             
             # Token usage stats
             "token_usage": {
-                "prompt_tokens": ResultAnalyzer._calculate_metrics(prompt_tokens),
-                "completion_tokens": ResultAnalyzer._calculate_metrics(completion_tokens),
-                "total_tokens": ResultAnalyzer._calculate_metrics(total_tokens)
+                field: ResultAnalyzer._calculate_metrics(values, **metric_args)
+                for field, values in token_usage.items()
             },
             
             # Output tokens per second stats
-            "output_tokens_per_second": ResultAnalyzer._calculate_metrics(output_tokens_per_second),
+            "output_tokens_per_second": ResultAnalyzer._calculate_metrics(output_tokens_per_second, **metric_args),
+            
+            # Server-side token throughput from actual token counts
+            "throughput": ResultAnalyzer._token_throughput(columns, test_duration),
+            
+            # Concurrency the server actually saw, versus the configured process count
+            "achieved_concurrency": TimelineAnalyzer.achieved_concurrency(columns, config.processes),
             
             # Error messages
             "error_messages": [r["error"] for r in failed_requests if "error" in r]
@@ -88,59 +138,172 @@ class ResultAnalyzer:
             "output_file": config.output_file,
             "total_test_duration": test_duration,
             "requests_per_second": (config.processes * config.requests_per_process) / test_duration 
-                                  if test_duration > 0 else 0
+                                  if test_duration > 0 else 0,
+            "percentiles": percentiles
+        }
+        
+        # Raw per-request samples, kept so runs can be compared with significance tests
+        # (save_results writes them to a sidecar file rather than the result JSON)
+        samples = {
+            "first_token_latency": first_token_latencies.tolist(),
+            "end_to_end_latency": end_to_end_latencies.tolist(),
+            "output_tokens_per_second": output_tokens_per_second.tolist()
         }
         
         # Merge results
-        return {
+        analysis = {
             "metadata": test_metadata,
-            "statistics": stats
+            "statistics": stats,
+            "samples": samples
         }
+        
+        # Per-second timelines and steady-state plateau metrics
+        analysis.update(TimelineAnalyzer.analyze(columns, percentiles))
+        
+        return analysis
     
     @staticmethod
-    def _calculate_metrics(values: List[float]) -> Dict[str, float]:
-        """Calculate statistical metrics for a list of values including percentiles"""
-        if not values:
-            return {
-                "min": None,
-                "max": None,
-                "mean": None,
-                "p25": None,
-                "p50": None,
-                "p75": None,
-                "p90": None
-            }
+    def _token_throughput(columns: Dict[str, np.ndarray], test_duration: float) -> Dict[str, float]:
+        """Exact input/output/total tokens per second over the measured window
+        
+        The window is the union of the successful requests' [start, end] intervals, so
+        idle gaps (e.g. between an interrupted run and its resume) are not counted.
+        Falls back to test_duration for results without timestamps.
+        """
+        success = columns["success"]
+        starts = columns["start_time"][success]
+        ends = columns["end_time"][success]
+        timed = ~np.isnan(starts) & ~np.isnan(ends)
+        
+        if timed.all() and len(starts):
+            order = np.argsort(starts)
+            starts, ends = starts[order], ends[order]
+            # A gap opens wherever a request starts after every earlier request has ended
+            covered_until = np.maximum.accumulate(ends)
+            gaps = np.maximum(starts[1:] - covered_until[:-1], 0).sum()
+            window = float(covered_until[-1] - starts[0] - gaps)
+            window_source = "request_timestamps"
+        else:
+            window = test_duration
+            window_source = "test_duration"
+        
+        tokens = {field: int(np.maximum(columns[field][success], 0).sum()) for field in TOKEN_FIELDS}
+        rate = (lambda count: count / window) if window > 0 else (lambda count: 0.0)
+        return {
+            "window_seconds": window,
+            "window_source": window_source,
+            "input_tokens": tokens["prompt_tokens"],
+            "output_tokens": tokens["completion_tokens"],
+            "total_tokens": tokens["total_tokens"],
+            "input_tokens_per_second": rate(tokens["prompt_tokens"]),
+            "output_tokens_per_second": rate(tokens["completion_tokens"]),
+            "total_tokens_per_second": rate(tokens["total_tokens"]),
+            "requests_per_second": rate(int(success.sum()))
+        }
+    
+    @staticmethod
+    def _calculate_metrics(values: np.ndarray, percentiles: List[float] = None, confidence: float = 0.95,
+                           bootstrap_resamples: int = 1000) -> Dict[str, float]:
+        """Calculate statistical metrics for an array of values including percentiles"""
+        percentiles = percentiles or DEFAULT_PERCENTILES
+        if len(values) == 0:
+            return {"min": None, "max": None, "mean": None,
+                    **{percentile_key(p): None for p in percentiles}}
+        
+        # Sort once; min, max and the linearly interpolated percentiles read from it
+        sorted_values = np.sort(values)
+        quantiles = np.quantile(sorted_values, np.asarray(percentiles) / 100)
+        
+        metrics = {
+            "min": sorted_values[0].item(),
+            "max": sorted_values[-1].item(),
+            "mean": float(sorted_values.mean()),
+            **{percentile_key(p): float(q) for p, q in zip(percentiles, quantiles)}
+        }
+        
+        if bootstrap_resamples > 0:
+            metrics["confidence_level"] = confidence
+            metrics["confidence_intervals"] = ResultAnalyzer.bootstrap_ci(
+                sorted_values.astype(float), percentiles, confidence, bootstrap_resamples
+            )
         
-        # Sort values for percentile calculations
-        sorted_values = sorted(values)
+        return metrics
+    
+    @staticmethod
+    def bootstrap_ci(sorted_values: np.ndarray, percentiles: List[float], confidence: float = 0.95,
+                     resamples: int = 1000, seed: int = 0) -> Dict[str, List[float]]:
+        """Bootstrap confidence intervals for the mean and each percentile (given in percent)
+        
+        Percentiles use the exact order-statistic form of the bootstrap: the r-th
+        smallest of n resampled values is sorted_values[ceil(n * U) - 1] with
+        U ~ Beta(r, n - r + 1), so each resample costs O(1) instead of O(n log n).
+        The mean is resampled directly, or from its normal limit for large samples.
+        """
         n = len(sorted_values)
+        if n < 2:
+            value = float(sorted_values[0]) if n else None
+            return {key: [value, value] for key in ["mean"] + [percentile_key(p) for p in percentiles]}
+        
+        rng = np.random.default_rng(seed)
+        tail = (1 - confidence) / 2
+        
+        def interval(estimates: np.ndarray) -> List[float]:
+            low, high = np.quantile(estimates, [tail, 1 - tail])
+            return [float(low), float(high)]
+        
+        def order_statistic(u: np.ndarray) -> np.ndarray:
+            return sorted_values[np.clip(np.ceil(n * u).astype(np.int64), 1, n) - 1]
         
-        # Calculate percentiles
-        def percentile(p):
-            """Calculate the p-th percentile of the values"""
-            if n == 0:
-                return None
-            k = (n - 1) * p
+        if n * resamples <= BOOTSTRAP_MAX_ELEMENTS:
+            means = sorted_values[rng.integers(0, n, size=(resamples, n))].mean(axis=1)
+        else:
+            means = rng.normal(sorted_values.mean(), sorted_values.std(ddof=1) / math.sqrt(n), resamples)
+        intervals = {"mean": interval(means)}
+        
+        for p in percentiles:
+            # Same linear interpolation as np.quantile: between ranks f and f + 1 (0-based)
+            k = (n - 1) * p / 100
             f = int(k)
             c = k - f
-            if f + 1 < n:
-                return sorted_values[f] + c * (sorted_values[f + 1] - sorted_values[f])
-            else:
-                return sorted_values[f]
+            u_low = rng.beta(f + 1, n - f, size=resamples)
+            estimates = order_statistic(u_low)
+            if c > 0 and f + 1 < n:
+                # The next order statistic is the minimum of the n - f - 1 draws above u_low
+                u_high = u_low + (1 - u_low) * rng.beta(1, n - f - 1, size=resamples)
+                estimates = estimates + c * (order_statistic(u_high) - estimates)
+            intervals[percentile_key(p)] = interval(estimates)
         
-        return {
-            "min": min(values),
-            "max": max(values),
-            "mean": statistics.mean(values),
-            "p25": percentile(0.25),  # 25th percentile
-            "p50": percentile(0.50),  # 50th percentile (median)
-            "p75": percentile(0.75),  # 75th percentile
-            "p90": percentile(0.90)   # 90th percentile
-        }
+        return intervals
+    
+    @staticmethod
+    def ci_relative_width(analysis: Dict[str, Any], metric: str) -> float:
+        """Relative width of a metric's confidence interval, e.g. metric='first_token_latency.p50'
+        
+        Returns infinity when the metric or its interval is missing.
+        """
+        group_name, _, stat_name = metric.rpartition('.')
+        group = analysis.get("statistics", {})
+        for key in group_name.split('.'):
+            group = group.get(key, {})
+        
+        value = group.get(stat_name)
+        ci = group.get("confidence_intervals", {}).get(stat_name)
+        if not value or not ci or ci[0] is None:
+            return float('inf')
+        return (ci[1] - ci[0]) / abs(value)
     
     @staticmethod
     def save_results(results: Dict[str, Any], filename: str) -> None:
-        """Save results to a JSON file"""
+        """Save results to a JSON file
+        
+        Raw per-request samples go to a compressed sidecar (see samples_path) so the
+        JSON that the viz server ingests stays small.
+        """
+        samples = results.get("samples")
+        if samples is not None:
+            np.savez_compressed(samples_path(filename),
+                                **{metric: np.asarray(values, dtype=float) for metric, values in samples.items()})
+            results = {key: value for key, value in results.items() if key != "samples"}
         with open(filename, 'w') as f:
             json.dump(results, f, indent=2)
     
@@ -154,6 +317,16 @@ class ResultAnalyzer:
         print(f"Total duration: {metadata['total_test_duration']:.2f} seconds")
         print(f"Success rate: {stats['success_rate'] * 100:.2f}%")
         print(f"Throughput: {metadata['requests_per_second']:.2f} requests/second")
+        if "throughput" in stats:
+            throughput = stats["throughput"]
+            print(f"Token throughput: {throughput['input_tokens_per_second']:.2f} input, "
+                  f"{throughput['output_tokens_per_second']:.2f} output, "
+                  f"{throughput['total_tokens_per_second']:.2f} total tokens/second")
+        if stats.get("achieved_concurrency"):
+            concurrency = stats["achieved_concurrency"]
+            print(f"Achieved concurrency: mean {concurrency['mean']:.2f}, p50 {concurrency['p50']:.0f}, "
+                  f"max {concurrency['max']} (target {concurrency['target']}, "
+                  f"{concurrency['fraction_at_target'] * 100:.0f}% of the time at target)")
         
         print("\nFirst Token Latency (seconds):")
         metrics = stats["first_token_latency"]
@@ -162,10 +335,8 @@ class ResultAnalyzer:
             print(f"- Max: {metrics['max']:.4f}")
             print(f"- Mean: {metrics['mean']:.4f}")
             print("\nPercentiles:")
-            print(f"- p25: {metrics['p25']:.4f}")
-            print(f"- p50: {metrics['p50']:.4f}")
-            print(f"- p75: {metrics['p75']:.4f}")
-            print(f"- p90: {metrics['p90']:.4f}")
+            ResultAnalyzer._print_percentiles(metrics, ".4f")
+            ResultAnalyzer._print_ci(metrics)
         
         print("\nEnd-to-End Latency (seconds):")
         metrics = stats["end_to_end_latency"]
@@ -174,10 +345,8 @@ class ResultAnalyzer:
             print(f"- Max: {metrics['max']:.4f}")
             print(f"- Mean: {metrics['mean']:.4f}")
             print("\nPercentiles:")
-            print(f"- p25: {metrics['p25']:.4f}")
-            print(f"- p50: {metrics['p50']:.4f}")
-            print(f"- p75: {metrics['p75']:.4f}")
-            print(f"- p90: {metrics['p90']:.4f}")
+            ResultAnalyzer._print_percentiles(metrics, ".4f")
+            ResultAnalyzer._print_ci(metrics)
         
         if "token_usage" in stats:
             print("\nToken Usage Statistics:")
@@ -188,10 +357,7 @@ class ResultAnalyzer:
                     print(f"- Max: {metrics['max']}")
                     print(f"- Mean: {metrics['mean']:.2f}")
                     print("\nPercentiles:")
-                    print(f"- p25: {metrics['p25']}")
-                    print(f"- p50: {metrics['p50']}")
-                    print(f"- p75: {metrics['p75']}")
-                    print(f"- p90: {metrics['p90']}")
+                    ResultAnalyzer._print_percentiles(metrics, "")
         
         if "output_tokens_per_second" in stats:
             print("\nOutput Tokens Per Second:")
@@ -201,11 +367,39 @@ class ResultAnalyzer:
                 print(f"- Max: {metrics['max']:.2f}")
                 print(f"- Mean: {metrics['mean']:.2f}")
                 print("\nPercentiles:")
-                print(f"- p25: {metrics['p25']:.2f}")
-                print(f"- p50: {metrics['p50']:.2f}")
-                print(f"- p75: {metrics['p75']:.2f}")
-                print(f"- p90: {metrics['p90']:.2f}")
+                ResultAnalyzer._print_percentiles(metrics, ".2f")
+                ResultAnalyzer._print_ci(metrics, precision=2)
+        
+        steady_state = results.get("steady_state")
+        if steady_state:
+            print(f"\nSteady State ({steady_state['start_offset']:.0f}s-{steady_state['end_offset']:.0f}s, "
+                  f"{steady_state['fraction_of_run'] * 100:.0f}% of the run):")
+            print(f"- Output tokens/sec: {steady_state['output_tokens_per_second']:.2f}")
+            print(f"- Prefill tokens/sec: {steady_state['prefill_tokens_per_second']:.2f}")
+            print(f"- Mean in-flight requests: {steady_state['mean_in_flight']:.2f}")
+            print(f"- Requests/sec: {steady_state['requests_per_second']:.2f}")
+            if steady_state["first_token_latency"]["p50"] is not None:
+                print(f"- First token latency p50: {steady_state['first_token_latency']['p50']:.4f}")
+                print(f"- End-to-end latency p50: {steady_state['end_to_end_latency']['p50']:.4f}")
         
         # Add output_file to metadata in analyze method
         output_file = metadata.get("output_file", "results.json")
-        print(f"\nDetailed results saved to: {output_file}")
\ No newline at end of file
+        print(f"\nDetailed results saved to: {output_file}")
+    
+    @staticmethod
+    def _print_ci(metrics: Dict[str, Any], precision: int = 4) -> None:
+        """Print the confidence intervals of the mean and median, if present"""
+        intervals = metrics.get("confidence_intervals")
+        if not intervals:
+            return
+        level = metrics.get("confidence_level", 0.95) * 100
+        for key in ("mean", "p50"):
+            low, high = intervals[key]
+            print(f"- {key} {level:.0f}% CI: [{low:.{precision}f}, {high:.{precision}f}]")
+    
+    @staticmethod
+    def _print_percentiles(metrics: Dict[str, Any], fmt: str) -> None:
+        """Print every percentile in a metrics dict, in ascending order"""
+        keys = [key for key in metrics if key.startswith('p') and key[1:].replace('.', '', 1).isdigit()]
+        for key in sorted(keys, key=lambda k: float(k[1:])):
+            print(f"- {key}: {metrics[key]:{fmt}}")
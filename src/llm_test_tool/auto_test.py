@@ -5,16 +5,19 @@ Automated testing tool for vLLM deployments with comprehensive test matrix.
 import json
 import yaml
 import time
-import os
+import queue
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from dataclasses import dataclass
 
-from .deployment import VllmDeployment
+from .deployment import VllmDeployment, detect_gpu_count
 from .config import TestConfig
 from .runner import TestRunner
 from .analyzer import ResultAnalyzer
+from .journal import RequestJournal
 
 
 @dataclass
@@ -27,14 +30,25 @@ class TestCase:
     
     def __str__(self):
         return f"in:{self.input_tokens}_out:{self.output_tokens}_proc:{self.processing_num}_rand:{self.random_tokens}"
+    
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        """Request shape (input, output, random tokens), shared by all concurrency levels"""
+        return (self.input_tokens, self.output_tokens, self.random_tokens)
 
 
 class AutoTestRunner:
     """Automated test runner for vLLM deployments"""
     
-    def __init__(self, config_path: str, output_dir: str = None):
-        """Initialize with deployment configuration"""
-        self.deployment = VllmDeployment(config_path)
+    def __init__(self, config_path: str, output_dir: str = None, replicas: int = None,
+                 deployment: VllmDeployment = None):
+        """Initialize with deployment configuration
+        
+        replicas: number of servers to deploy from the config on disjoint GPU sets
+        (defaults to deployment.replicas in the config, or 1)
+        deployment: pre-built deployment, e.g. with port/GPU overrides from a campaign
+        """
+        self.deployment = deployment or VllmDeployment(config_path)
         self.config_path = Path(config_path)
         
         # Load config file (support both YAML and JSON)
@@ -47,6 +61,10 @@ class AutoTestRunner:
         self.test_matrix = self.full_config['test_matrix']
         self.test_config = self.full_config['test_config']
         
+        if replicas is None:
+            replicas = self.full_config['deployment'].get('replicas', 1)
+        self.replicas = max(1, int(replicas))
+        
         # Generate output directory with timestamp and model ID if not specified
         if output_dir is None:
             output_dir = self._generate_output_dir()
@@ -56,6 +74,8 @@ class AutoTestRunner:
         
         # Generate test cases from matrix
         self.test_cases = self._generate_test_cases()
+        self.deployment_failures = []
+        self.startup_timelines = []
     
     def _generate_output_dir(self) -> str:
         """Generate output directory name with current timestamp"""
@@ -85,31 +105,34 @@ class AutoTestRunner:
                         ))
         return test_cases
     
-    def _create_test_config(self, test_case: TestCase) -> TestConfig:
+    def _create_test_config(self, test_case: TestCase, deployment: VllmDeployment = None) -> TestConfig:
         """Create a TestConfig for a specific test case"""
+        deployment = deployment or self.deployment
         return TestConfig(
             processes=test_case.processing_num,
             requests_per_process=self.test_config['requests_per_process'],
-            model_id=self.deployment.get_model_id(),
+            model_id=deployment.get_model_id(),
             input_tokens=test_case.input_tokens,
             random_tokens=test_case.random_tokens,
             output_tokens=test_case.output_tokens,
-            url=self.deployment.get_api_url(),
-            output_file=str(self.output_dir / f"test_{test_case}.json")
+            url=deployment.get_api_url(),
+            output_file=str(self.output_dir / f"test_{test_case}.json"),
+            percentiles=self.test_config.get('percentiles')
         )
     
-    def _run_warmup(self, test_case: TestCase) -> None:
+    def _run_warmup(self, test_case: TestCase, deployment: VllmDeployment = None) -> None:
         """Run warmup requests before the actual test"""
+        deployment = deployment or self.deployment
         print(f"Running {self.test_config['warmup_requests']} warmup requests...")
         
         warmup_config = TestConfig(
             processes=1,
             requests_per_process=self.test_config['warmup_requests'],
-            model_id=self.deployment.get_model_id(),
+            model_id=deployment.get_model_id(),
             input_tokens=test_case.input_tokens,
             random_tokens=test_case.random_tokens,
             output_tokens=test_case.output_tokens,
-            url=self.deployment.get_api_url(),
+            url=deployment.get_api_url(),
             output_file=str(self.output_dir / f"warmup_{test_case}.json")
         )
         
@@ -132,8 +155,9 @@ class AutoTestRunner:
                 return None
         return None
     
-    def run_single_test(self, test_case: TestCase, skip_existing: bool = True) -> Dict[str, Any]:
-        """Run a single test case"""
+    def run_single_test(self, test_case: TestCase, skip_existing: bool = True,
+                        deployment: VllmDeployment = None) -> Dict[str, Any]:
+        """Run a single test case against the given deployment (default: the primary one)"""
         print(f"\n{'='*60}")
         print(f"Test case: {test_case}")
         print(f"Input tokens: {test_case.input_tokens}")
@@ -152,7 +176,7 @@ class AutoTestRunner:
         print("Running new test...")
         
         # Run warmup
-        self._run_warmup(test_case)
+        self._run_warmup(test_case, deployment)
         
         # Wait for cooldown
         if self.test_config['cooldown_seconds'] > 0:
@@ -160,26 +184,89 @@ class AutoTestRunner:
             time.sleep(self.test_config['cooldown_seconds'])
         
         # Create test configuration
-        config = self._create_test_config(test_case)
-        
-        # Run the actual test
-        start_time = time.time()
-        results = TestRunner.run(config)
-        total_time = time.time() - start_time
-        
-        # Analyze results
-        analysis = ResultAnalyzer.analyze(results, total_time, config)
+        config = self._create_test_config(test_case, deployment)
+        
+        # Reuse requests completed before an interruption, if the deployment is unchanged
+        journal = RequestJournal(self.output_dir / f"journal_{test_case}.ndjson",
+                                 (deployment or self.deployment).config_hash())
+        completed = journal.load()
+        previous_time = 0
+        if completed:
+            print(f"Resuming from journal: {len(completed)} requests already completed")
+            previous_time = (max(r["end_time"] for r in completed.values()) -
+                             min(r["start_time"] for r in completed.values()))
+        
+        # Run the actual test, extending it in batches while adaptive sampling asks for more
+        adaptive = self.test_config.get('adaptive_sampling')
+        confidence = adaptive.get('confidence', 0.95) if adaptive else 0.95
+        if completed:
+            # A resumed adaptive case may already have gone past the first batch
+            resumed_rounds = -(-(max(completed) + 1) // (config.processes * config.requests_per_process))
+            config.requests_per_process *= max(1, resumed_rounds)
+        
+        total_time = previous_time
+        results = list(completed.values())
+        try:
+            while True:
+                start_time = time.time()
+                results += TestRunner.run(config, on_result=journal.append,
+                                          skip_request_ids=[r["request_id"] for r in results])
+                total_time += time.time() - start_time
+                results.sort(key=lambda r: r["request_id"])
+                
+                # Analyze results
+                analysis = ResultAnalyzer.analyze(results, total_time, config, confidence=confidence)
+                if not adaptive or not self._needs_more_samples(analysis, config, adaptive):
+                    break
+                config.requests_per_process += self.test_config['requests_per_process']
+        finally:
+            journal.close()
         
-        # Save results
+        # Save results; the samples go to the sidecar file and stay out of comprehensive_results.json
         ResultAnalyzer.save_results(analysis, config.output_file)
+        analysis.pop("samples", None)
+        journal.remove()
         
         # Print summary
         ResultAnalyzer.print_summary(analysis)
         
         return analysis
     
-    def run_all_tests(self, skip_existing: bool = True, skip_deployment: bool = False) -> Dict[str, Any]:
-        """Run all test cases in the matrix"""
+    def _needs_more_samples(self, analysis: Dict[str, Any], config: TestConfig,
+                            adaptive: Dict[str, Any]) -> bool:
+        """Check whether any adaptive-sampling metric is still too noisy and budget remains"""
+        target = adaptive.get('target_relative_ci', 0.05)
+        widths = {metric: ResultAnalyzer.ci_relative_width(analysis, metric)
+                  for metric in adaptive.get('metrics', ['first_token_latency.p50'])}
+        analysis["adaptive_sampling"] = {
+            "target_relative_ci": target,
+            "relative_ci_widths": widths,
+            "requests": config.processes * config.requests_per_process
+        }
+        
+        noisy = {metric: width for metric, width in widths.items() if width > target}
+        if not noisy:
+            print(f"✓ Confidence intervals within ±{target / 2:.1%} after "
+                  f"{analysis['adaptive_sampling']['requests']} requests")
+            return False
+        
+        budget = adaptive.get('max_requests_per_process', 10 * self.test_config['requests_per_process'])
+        if config.requests_per_process + self.test_config['requests_per_process'] > budget:
+            print(f"⚠ Request budget reached with CI widths still above target: "
+                  f"{', '.join(f'{m}={w:.1%}' for m, w in noisy.items())}")
+            return False
+        
+        print(f"CI widths above target {target:.1%} ({', '.join(f'{m}={w:.1%}' for m, w in noisy.items())}), "
+              f"sending another batch")
+        return True
+    
+    def run_all_tests(self, skip_existing: bool = True, skip_deployment: bool = False,
+                      force_redeploy: bool = False, keep_deployment: bool = False) -> Dict[str, Any]:
+        """Run all test cases in the matrix
+        
+        force_redeploy: restart the server even if a matching container is already healthy
+        keep_deployment: leave the server running afterwards so a later config can adopt it
+        """
         print(f"Starting automated test suite with {len(self.test_cases)} test cases")
         print(f"Output directory: {self.output_dir}")
         print(f"Skip existing results: {'yes' if skip_existing else 'no'}")
@@ -201,56 +288,61 @@ class AutoTestRunner:
         
         # Skip deployment if no new tests need to be run
         need_deployment = remaining_tests > 0 and not skip_deployment
+        # Replicas exist only if we deploy them; otherwise use the single configured endpoint
+        deployments = self._plan_replicas() if need_deployment else [self.deployment]
+        self.deployment_failures = []
+        self.startup_timelines = []
         
         if remaining_tests == 0:
             print("\n✓ All test results already exist - skipping server deployment")
             print("✓ No new tests to run - proceeding directly to results compilation")
             skip_deployment = True
         elif not skip_deployment:
-            print("\nDeploying vLLM server...")
-            if not self.deployment.deploy():
-                raise RuntimeError("Failed to deploy vLLM server")
+            print(f"\nDeploying vLLM server ({len(deployments)} replica(s))...")
+            deployments = self._deploy_replicas(deployments, force_redeploy)
+            if not deployments:
+                # Record why the deployment failed before giving up on the matrix
+                self._save_comprehensive_results({}, [], [], [])
+                reasons = '; '.join(f["reason"] for f in self.deployment_failures)
+                raise RuntimeError(f"Failed to deploy vLLM server: {reasons}")
         else:
             print("\nSkipping deployment - assuming server is already running")
         
-        all_results = {}
-        failed_tests = []
-        skipped_tests = []
-        
         try:
-            for i, test_case in enumerate(self.test_cases, 1):
-                print(f"\nProgress: {i}/{len(self.test_cases)}")
-                
-                try:
-                    # Check if we should skip this test
-                    if skip_existing:
-                        existing_result = self._load_existing_result(test_case)
-                        if existing_result is not None:
-                            all_results[str(test_case)] = existing_result
-                            skipped_tests.append(str(test_case))
-                            continue
-                    
-                    result = self.run_single_test(test_case, skip_existing=False)  # Don't double-check
-                    all_results[str(test_case)] = result
-                except Exception as e:
-                    print(f"Test case {test_case} failed: {e}")
-                    failed_tests.append((str(test_case), str(e)))
-                    continue
+            all_results, failed_tests, skipped_tests = self._run_test_queue(deployments, skip_existing)
         
         finally:
             # Cleanup deployment if we deployed it
-            if need_deployment:
+            if need_deployment and keep_deployment:
+                print("\nKeeping deployment running for reuse")
+            elif need_deployment:
                 print("\nCleaning up deployment...")
-                self.deployment.cleanup()
+                for deployment in deployments:
+                    deployment.cleanup()
+        
+        comprehensive_results = self._save_comprehensive_results(
+            all_results, failed_tests, skipped_tests, deployments
+        )
+        self._print_final_summary(comprehensive_results)
         
-        # Save comprehensive results
+        return comprehensive_results
+    
+    def _save_comprehensive_results(self, all_results: Dict[str, Any], failed_tests: List,
+                                    skipped_tests: List, deployments: List[VllmDeployment]) -> Dict[str, Any]:
+        """Save the matrix results, summary and deployment info to comprehensive_results.json"""
         comprehensive_results = {
             "test_matrix": self.test_matrix,
             "test_config": self.test_config,
             "deployment_config": self.full_config['deployment'],
+            "replicas": [
+                {"container_name": d.container_name, "port": d.port, "gpu_ids": d.gpu_ids}
+                for d in deployments
+            ],
             "results": all_results,
             "failed_tests": failed_tests,
             "skipped_tests": skipped_tests,
+            "deployment_failures": self.deployment_failures,
+            "startup_timelines": self.startup_timelines,
             "summary": self._generate_summary(all_results)
         }
         
@@ -259,10 +351,144 @@ class AutoTestRunner:
             json.dump(comprehensive_results, f, indent=2)
         
         print(f"\nComprehensive results saved to: {summary_file}")
-        self._print_final_summary(comprehensive_results)
-        
         return comprehensive_results
     
+    def _plan_replicas(self) -> List[VllmDeployment]:
+        """Create one deployment per replica, each on its own GPU set and port"""
+        if self.replicas == 1:
+            return [self.deployment]
+        
+        gpus_per_replica = self.deployment.get_gpu_count()
+        total_gpus = self.full_config['deployment'].get('total_gpus') or detect_gpu_count()
+        if gpus_per_replica * self.replicas > total_gpus:
+            raise ValueError(
+                f"{self.replicas} replicas x {gpus_per_replica} GPUs do not fit on {total_gpus} GPUs"
+            )
+        
+        return [
+            self.deployment.for_replica(
+                index, list(range(index * gpus_per_replica, (index + 1) * gpus_per_replica))
+            )
+            for index in range(self.replicas)
+        ]
+    
+    def _save_startup_timelines(self, deployments: List[VllmDeployment]) -> None:
+        """Save the startup timeline of each deployment to startup_timeline.json"""
+        self.startup_timelines = [d.startup_timeline for d in deployments if d.startup_timeline]
+        with open(self.output_dir / "startup_timeline.json", 'w') as f:
+            json.dump({
+                "deployment_config": self.full_config['deployment'],
+                "startup_timelines": self.startup_timelines
+            }, f, indent=2)
+    
+    def _deploy_replicas(self, deployments: List[VllmDeployment],
+                         force_redeploy: bool = False) -> List[VllmDeployment]:
+        """Deploy all replicas concurrently and return the ones that became healthy
+        
+        Failed replicas are cleaned up and recorded in self.deployment_failures.
+        """
+        if len(deployments) == 1:
+            deployed = deployments[0].deploy(force_redeploy)
+            self._save_startup_timelines(deployments)
+            if deployed:
+                return deployments
+            self.deployment_failures.append({
+                "container_name": deployments[0].container_name,
+                "reason": deployments[0].failure_reason
+            })
+            deployments[0].cleanup()
+            return []
+        
+        status = {}
+        
+        def deploy(deployment: VllmDeployment):
+            status[id(deployment)] = deployment.deploy(force_redeploy)
+        
+        threads = [threading.Thread(target=deploy, args=(d,)) for d in deployments]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self._save_startup_timelines(deployments)
+        healthy = [d for d in deployments if status.get(id(d))]
+        for deployment in deployments:
+            if deployment not in healthy:
+                print(f"Warning: replica {deployment.container_name} failed to deploy: {deployment.failure_reason}")
+                self.deployment_failures.append({
+                    "container_name": deployment.container_name,
+                    "reason": deployment.failure_reason
+                })
+                deployment.cleanup()
+        
+        return healthy
+    
+    def _run_test_queue(self, deployments: List[VllmDeployment],
+                        skip_existing: bool) -> Tuple[Dict[str, Any], List, List]:
+        """Run all test cases, sharding them across the deployments
+        
+        Test cases are grouped by request shape so that every concurrency level of a
+        shape runs on the same replica. Each replica pulls the next group from a shared
+        queue as soon as it is idle.
+        """
+        all_results = {}
+        failed_tests = []
+        skipped_tests = []
+        
+        shape_groups = OrderedDict()
+        for test_case in self.test_cases:
+            shape_groups.setdefault(test_case.shape, []).append(test_case)
+        
+        work_queue = queue.Queue()
+        for group in shape_groups.values():
+            work_queue.put(group)
+        
+        progress_lock = threading.Lock()
+        progress = {'done': 0}
+        
+        def worker(deployment: VllmDeployment):
+            while True:
+                try:
+                    group = work_queue.get_nowait()
+                except queue.Empty:
+                    return
+                
+                for test_case in group:
+                    with progress_lock:
+                        progress['done'] += 1
+                        print(f"\nProgress: {progress['done']}/{len(self.test_cases)}"
+                              + (f" [{deployment.container_name}]" if len(deployments) > 1 else ""))
+                    
+                    try:
+                        # Check if we should skip this test
+                        if skip_existing:
+                            existing_result = self._load_existing_result(test_case)
+                            if existing_result is not None:
+                                all_results[str(test_case)] = existing_result
+                                skipped_tests.append(str(test_case))
+                                continue
+                        
+                        result = self.run_single_test(test_case, skip_existing=False,  # Don't double-check
+                                                      deployment=deployment)
+                        all_results[str(test_case)] = result
+                    except Exception as e:
+                        print(f"Test case {test_case} failed: {e}")
+                        failed_tests.append((str(test_case), str(e)))
+                        continue
+        
+        if len(deployments) == 1:
+            worker(deployments[0])
+        else:
+            threads = [threading.Thread(target=worker, args=(d,)) for d in deployments]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        # Keep the matrix order regardless of which replica finished first
+        all_results = {str(tc): all_results[str(tc)] for tc in self.test_cases if str(tc) in all_results}
+        return all_results, failed_tests, skipped_tests
+    
     def _generate_summary(self, all_results: Dict[str, Any]) -> Dict[str, Any]:
         """Generate summary statistics across all test cases"""
         if not all_results:
@@ -367,11 +593,28 @@ def main():
                         help="Path to deployment configuration file")
     parser.add_argument("--output-dir", type=str, default="test_results",
                         help="Output directory for test results")
+    parser.add_argument("--replicas", type=int, default=None,
+                        help="Number of server replicas to deploy on disjoint GPU sets")
+    parser.add_argument("--port", type=int, default=None,
+                        help="Override the server port from the config")
+    parser.add_argument("--container-name", type=str, default=None,
+                        help="Override the container name from the config")
+    parser.add_argument("--gpu-ids", type=str, default=None,
+                        help="Comma-separated GPU ids to pin the server to (e.g. 0,1)")
+    parser.add_argument("--force-redeploy", action="store_true",
+                        help="Restart the server even if a matching container is already running")
+    parser.add_argument("--keep-deployment", action="store_true",
+                        help="Leave the server running after the tests for reuse")
     
     args = parser.parse_args()
     
-    runner = AutoTestRunner(args.config, args.output_dir)
-    runner.run_all_tests()
+    gpu_ids = [int(gpu_id) for gpu_id in args.gpu_ids.split(',')] if args.gpu_ids else None
+    deployment = VllmDeployment(args.config, port=args.port,
+                                container_name=args.container_name, gpu_ids=gpu_ids)
+    
+    runner = AutoTestRunner(args.config, args.output_dir, replicas=args.replicas,
+                            deployment=deployment)
+    runner.run_all_tests(force_redeploy=args.force_redeploy, keep_deployment=args.keep_deployment)
 
 
 if __name__ == "__main__":
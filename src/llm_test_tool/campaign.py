@@ -0,0 +1,253 @@
+"""
+Campaign scheduler that runs many model configs in parallel on one host.
+
+Each config is deployed on its own GPU set and port, so configs whose GPU
+requirements fit together (e.g. four tp2 models on an 8-GPU box) run
+concurrently instead of one after another.
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .deployment import VllmDeployment, detect_gpu_count
+
+
+@dataclass
+class CampaignJob:
+    """One config in the campaign queue"""
+    config_path: str
+    output_dir: str
+    gpu_count: int
+    status: str = "pending"  # pending, running, done, failed
+    gpu_ids: List[int] = field(default_factory=list)
+    port: Optional[int] = None
+    container_name: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+
+
+class CampaignScheduler:
+    """Bin-packs model configs onto disjoint GPU sets and runs them in parallel"""
+
+    def __init__(self, config_patterns: List[str], output_root: str = "archive_results",
+                 total_gpus: int = None, base_port: int = 8080, state_file: str = None,
+                 retry_failed: bool = False, poll_interval: float = 5.0):
+        """Initialize the campaign from config paths or glob patterns
+
+        The queue is persisted to state_file (default: <output_root>/campaign_state.json)
+        so an interrupted campaign resumes where it stopped.
+        """
+        self.output_root = Path(output_root)
+        self.output_root.mkdir(parents=True, exist_ok=True)
+        self.total_gpus = total_gpus or detect_gpu_count()
+        self.base_port = base_port
+        self.poll_interval = poll_interval
+        self.state_file = Path(state_file) if state_file else self.output_root / "campaign_state.json"
+
+        self.jobs = self._load_jobs(self._expand_configs(config_patterns), retry_failed)
+        self._save_state()
+
+    @staticmethod
+    def _expand_configs(config_patterns: List[str]) -> List[str]:
+        """Expand glob patterns into a sorted, de-duplicated list of config paths"""
+        config_paths = []
+        for pattern in config_patterns:
+            matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+            for path in matches:
+                if path not in config_paths:
+                    config_paths.append(path)
+        return config_paths
+
+    def _output_dir_for(self, config_path: str) -> str:
+        """Map model_configs/<runtime>/<instance>/<model>.yaml to <runtime>--<instance>--<model>"""
+        parts = Path(config_path).with_suffix('').parts
+        if 'model_configs' in parts:
+            parts = parts[parts.index('model_configs') + 1:]
+        return str(self.output_root / '--'.join(parts[-3:]))
+
+    def _load_jobs(self, config_paths: List[str], retry_failed: bool) -> List[CampaignJob]:
+        """Build the job list, carrying over status from a previous run of the campaign"""
+        previous = {}
+        if self.state_file.exists():
+            with open(self.state_file, 'r') as f:
+                for job in json.load(f).get('jobs', []):
+                    previous[job['config_path']] = CampaignJob(**job)
+
+        jobs = []
+        for config_path in config_paths:
+            job = previous.get(config_path)
+            if job is None:
+                job = CampaignJob(
+                    config_path=config_path,
+                    output_dir=self._output_dir_for(config_path),
+                    gpu_count=VllmDeployment(config_path).get_gpu_count()
+                )
+            elif job.status == "running" or (job.status == "failed" and retry_failed):
+                # Interrupted or retried jobs go back to the queue; finished cases are reused
+                job.status = "pending"
+                job.error = None
+            jobs.append(job)
+        return jobs
+
+    def _save_state(self) -> None:
+        """Atomically persist the job queue"""
+        state = {
+            "last_updated": datetime.now().isoformat(),
+            "total_gpus": self.total_gpus,
+            "jobs": [asdict(job) for job in self.jobs]
+        }
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def _allocate_gpus(self, free_gpus: List[int], count: int) -> Optional[List[int]]:
+        """Pick `count` free GPUs, preferring an aligned contiguous block (keeps NVLink peers together)"""
+        if count > len(free_gpus):
+            return None
+
+        free = set(free_gpus)
+        for start in range(0, self.total_gpus - count + 1, count):
+            block = list(range(start, start + count))
+            if free.issuperset(block):
+                return block
+        return sorted(free)[:count]
+
+    def _start_job(self, job: CampaignJob, slot: int) -> subprocess.Popen:
+        """Launch one config as an auto-test subprocess with its own GPUs, port and container"""
+        config = VllmDeployment(job.config_path)
+        job.port = self.base_port + slot
+        job.container_name = f"{config.container_name}-campaign-{slot}"
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+
+        Path(job.output_dir).mkdir(parents=True, exist_ok=True)
+        cmd = [
+            sys.executable, '-m', 'llm_test_tool', 'auto-test',
+            '--config', job.config_path,
+            '--output-dir', job.output_dir,
+            '--port', str(job.port),
+            '--container-name', job.container_name,
+            '--gpu-ids', ','.join(str(gpu_id) for gpu_id in job.gpu_ids)
+        ]
+
+        # Make the package importable when it is run from a source checkout
+        env = os.environ.copy()
+        package_root = str(Path(__file__).resolve().parent.parent)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_root, env.get('PYTHONPATH')]))
+
+        print(f"▶ Starting {job.config_path} on GPUs {job.gpu_ids}, port {job.port}")
+        with open(Path(job.output_dir) / "campaign.log", 'a') as log_file:
+            return subprocess.Popen(cmd, stdout=log_file, stderr=subprocess.STDOUT, env=env)
+
+    def run(self) -> Dict[str, int]:
+        """Run all pending jobs, packing as many concurrently as the GPUs allow"""
+        pending = [job for job in self.jobs if job.status == "pending"]
+        print(f"Campaign: {len(self.jobs)} configs, {len(pending)} pending, {self.total_gpus} GPUs")
+
+        for job in pending:
+            if job.gpu_count > self.total_gpus:
+                job.status = "failed"
+                job.error = f"needs {job.gpu_count} GPUs, host has {self.total_gpus}"
+                print(f"✗ {job.config_path}: {job.error}")
+        self._save_state()
+
+        free_gpus = list(range(self.total_gpus))
+        free_slots = list(range(self.total_gpus))
+        running = {}  # slot -> (job, process)
+
+        while True:
+            # First-fit decreasing: try the largest pending jobs first
+            pending = sorted((job for job in self.jobs if job.status == "pending"),
+                             key=lambda job: job.gpu_count, reverse=True)
+            for job in pending:
+                gpu_ids = self._allocate_gpus(free_gpus, job.gpu_count)
+                if gpu_ids is None:
+                    continue
+                job.gpu_ids = gpu_ids
+                free_gpus = [gpu_id for gpu_id in free_gpus if gpu_id not in gpu_ids]
+                slot = free_slots.pop(0)
+                running[slot] = (job, self._start_job(job, slot))
+                self._save_state()
+
+            if not running:
+                break
+
+            time.sleep(self.poll_interval)
+
+            for slot, (job, process) in list(running.items()):
+                return_code = process.poll()
+                if return_code is None:
+                    continue
+
+                job.status = "done" if return_code == 0 else "failed"
+                job.error = None if return_code == 0 else f"exit code {return_code}"
+                job.finished_at = datetime.now().isoformat()
+                free_gpus = sorted(free_gpus + job.gpu_ids)
+                free_slots = sorted(free_slots + [slot])
+                del running[slot]
+                self._save_state()
+                print(f"{'✓' if return_code == 0 else '✗'} Finished {job.config_path} ({job.status})")
+
+        counts = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        print(f"Campaign finished: {counts}")
+        return counts
+
+
+def main():
+    """Main entry point for campaign mode"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Run many model configs in parallel on disjoint GPU sets",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Run every p5.48xlarge config, packing small models side by side
+  python -m llm_test_tool campaign "model_configs/*/p5.48xlarge/*.yaml"
+
+  # Exercise the scheduler without GPUs (benchmarks/fake_docker starts llm_test_tool mock servers)
+  DOCKER_BIN=benchmarks/fake_docker python -m llm_test_tool campaign cfg_a.yaml cfg_b.yaml --total-gpus 8
+        """
+    )
+    parser.add_argument("configs", nargs="+",
+                        help="Config files or glob patterns")
+    parser.add_argument("--output-root", type=str, default="archive_results",
+                        help="Directory for per-config result directories")
+    parser.add_argument("--total-gpus", type=int, default=None,
+                        help="Number of GPUs on this host (default: detected with nvidia-smi)")
+    parser.add_argument("--base-port", type=int, default=8080,
+                        help="First port assigned to campaign servers")
+    parser.add_argument("--state-file", type=str, default=None,
+                        help="Persistent queue file (default: <output-root>/campaign_state.json)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Re-queue configs that failed in a previous run")
+
+    args = parser.parse_args()
+
+    scheduler = CampaignScheduler(
+        args.configs,
+        output_root=args.output_root,
+        total_gpus=args.total_gpus,
+        base_port=args.base_port,
+        state_file=args.state_file,
+        retry_failed=args.retry_failed
+    )
+    counts = scheduler.run()
+    if counts.get("failed"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
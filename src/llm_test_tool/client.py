@@ -23,6 +23,8 @@ class RequestResult:
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
+    start_time: float = None
+    end_time: float = None
 
 
 class LlmApiClient:
@@ -114,7 +116,9 @@ class LlmApiClient:
             return RequestResult(
                 request_id=request_id,
                 success=False,
-                error=str(e)
+                error=str(e),
+                start_time=start_time,
+                end_time=time.time()
             ).__dict__
 
         end_time = time.time()
@@ -131,5 +135,7 @@ class LlmApiClient:
             response_length=len("".join(response_text)),
             prompt_tokens=token_usage["prompt_tokens"],
             completion_tokens=token_usage["completion_tokens"],
-            total_tokens=token_usage["total_tokens"]
+            total_tokens=token_usage["total_tokens"],
+            start_time=start_time,
+            end_time=end_time
         ).__dict__
\ No newline at end of file
@@ -0,0 +1,302 @@
+"""
+Regression detection between two sets of test results.
+
+Cases are matched by (input_tokens, output_tokens, processes, random_tokens) and
+each metric's per-request samples are compared with a Mann-Whitney U test. Effect
+sizes are reported as Cliff's delta, which is robust to the long latency tails
+that make t-tests unreliable here.
+"""
+
+import glob
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from .analyzer import samples_path
+
+
+# Metric name -> whether a higher value is better
+METRICS = {
+    "first_token_latency": False,
+    "end_to_end_latency": False,
+    "output_tokens_per_second": True
+}
+
+# Magnitude thresholds for |Cliff's delta| (Romano et al., 2006)
+EFFECT_SIZES = [(0.147, "negligible"), (0.33, "small"), (0.474, "medium"), (1.0, "large")]
+
+
+def mann_whitney_u(x: np.ndarray, y: np.ndarray) -> Tuple[float, float, float]:
+    """Two-sided Mann-Whitney U test with the tie-corrected normal approximation
+
+    Returns (U of x, p-value, Cliff's delta), where delta = P(x > y) - P(x < y).
+    """
+    n1, n2 = len(x), len(y)
+    n = n1 + n2
+    combined = np.concatenate([x, y])
+    order = np.argsort(combined, kind='mergesort')
+
+    # Average ranks over ties
+    _, first, counts = np.unique(combined[order], return_index=True, return_counts=True)
+    ranks = np.empty(n)
+    ranks[order] = np.repeat(first + (counts + 1) / 2, counts)
+
+    u1 = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    delta = 2 * u1 / (n1 * n2) - 1
+
+    tie_term = (counts ** 3 - counts).sum() / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return u1, 1.0, delta
+
+    # Continuity correction
+    z = (abs(u1 - n1 * n2 / 2) - 0.5) / sigma
+    p_value = math.erfc(max(z, 0) / math.sqrt(2))
+    return u1, p_value, delta
+
+
+def effect_size_label(delta: float) -> str:
+    """Describe the magnitude of a Cliff's delta"""
+    for limit, label in EFFECT_SIZES:
+        if abs(delta) < limit:
+            return label
+    return "large"
+
+
+class ResultComparator:
+    """Compares a candidate result set against a baseline"""
+
+    def __init__(self, baseline: str, candidate: str, archive_dir: str = "archive_results",
+                 threshold: float = 0.05, alpha: float = 0.05, metrics: List[str] = None,
+                 allow_median_only: bool = False):
+        """Initialize with two result directories or runtime--instance--model archive keys
+
+        A change is a regression when it is statistically significant at alpha (after
+        Holm correction across all tests) and moves the median the wrong way by more
+        than threshold (relative). Cases without per-request samples cannot be tested
+        and are labelled "untested", unless allow_median_only classifies them by the
+        median change alone.
+        """
+        self.archive_dir = Path(archive_dir)
+        self.baseline_dir = self._resolve(baseline)
+        self.candidate_dir = self._resolve(candidate)
+        self.threshold = threshold
+        self.alpha = alpha
+        self.allow_median_only = allow_median_only
+        self.metrics = metrics or list(METRICS.keys())
+
+        unknown = [m for m in self.metrics if m not in METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metrics {unknown}, expected some of {list(METRICS.keys())}")
+
+    def _resolve(self, location: str) -> Path:
+        """Accept a directory path or a key inside the archive directory"""
+        path = Path(location)
+        if path.is_dir():
+            return path
+        if (self.archive_dir / location).is_dir():
+            return self.archive_dir / location
+        raise FileNotFoundError(f"No result directory '{location}' (also looked in {self.archive_dir})")
+
+    @staticmethod
+    def _load_cases(result_dir: Path) -> Dict[Tuple[int, int, int, int], Dict[str, Any]]:
+        """Load test_*.json results keyed by (input, output, processes, random)
+
+        Samples come from the .samples.npz sidecar, or from the JSON itself for
+        results saved before samples were split out.
+        """
+        cases = {}
+        for path in sorted(glob.glob(str(result_dir / "test_*.json"))):
+            with open(path, 'r') as f:
+                result = json.load(f)
+            metadata = result.get("metadata")
+            if not metadata:
+                continue
+            sidecar = samples_path(path)
+            if sidecar.exists():
+                with np.load(sidecar) as samples:
+                    result["samples"] = {metric: samples[metric] for metric in samples.files}
+            key = (metadata["input_tokens"], metadata["output_tokens"],
+                   metadata["processes"], metadata["random_tokens"])
+            cases[key] = result
+        return cases
+
+    def _compare_metric(self, key: Tuple, metric: str, baseline: Dict[str, Any],
+                        candidate: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Compare one metric of one matched case"""
+        base_samples = np.asarray(baseline.get("samples", {}).get(metric, []), dtype=float)
+        cand_samples = np.asarray(candidate.get("samples", {}).get(metric, []), dtype=float)
+
+        if len(base_samples) and len(cand_samples):
+            base_median = float(np.median(base_samples))
+            cand_median = float(np.median(cand_samples))
+            _, p_value, delta = mann_whitney_u(cand_samples, base_samples)
+        else:
+            # Results written before samples were stored: compare medians only
+            base_median = baseline.get("statistics", {}).get(metric, {}).get("p50")
+            cand_median = candidate.get("statistics", {}).get(metric, {}).get("p50")
+            if base_median is None or cand_median is None:
+                return None
+            p_value, delta = None, None
+
+        relative_change = (cand_median - base_median) / base_median if base_median else 0.0
+        # Positive when the candidate got worse
+        worsening = -relative_change if METRICS[metric] else relative_change
+
+        return {
+            "case": {"input_tokens": key[0], "output_tokens": key[1],
+                     "processes": key[2], "random_tokens": key[3]},
+            "metric": metric,
+            "baseline_median": base_median,
+            "candidate_median": cand_median,
+            "relative_change": relative_change,
+            "worsening": worsening,
+            "p_value": p_value,
+            "cliffs_delta": delta,
+            "effect_size": effect_size_label(delta) if delta is not None else None,
+            "baseline_samples": len(base_samples),
+            "candidate_samples": len(cand_samples)
+        }
+
+    def _classify(self, comparisons: List[Dict[str, Any]]) -> None:
+        """Apply Holm's step-down correction and label each comparison"""
+        tested = sorted((c for c in comparisons if c["p_value"] is not None), key=lambda c: c["p_value"])
+        m = len(tested)
+        running_max = 0.0
+        for i, comparison in enumerate(tested):
+            running_max = max(running_max, min(1.0, (m - i) * comparison["p_value"]))
+            comparison["adjusted_p_value"] = running_max
+
+        for comparison in comparisons:
+            adjusted = comparison.get("adjusted_p_value")
+            if adjusted is None and not self.allow_median_only:
+                # No samples to test: report the median move but never gate on it
+                comparison["status"] = "untested"
+                continue
+            significant = adjusted is None or adjusted < self.alpha
+            if significant and comparison["worsening"] > self.threshold:
+                comparison["status"] = "regression"
+            elif significant and comparison["worsening"] < -self.threshold:
+                comparison["status"] = "improvement"
+            else:
+                comparison["status"] = "unchanged"
+
+    def compare(self) -> Dict[str, Any]:
+        """Match cases and compare every metric"""
+        baseline_cases = self._load_cases(self.baseline_dir)
+        candidate_cases = self._load_cases(self.candidate_dir)
+        matched = sorted(set(baseline_cases) & set(candidate_cases))
+
+        comparisons = []
+        for key in matched:
+            for metric in self.metrics:
+                comparison = self._compare_metric(key, metric, baseline_cases[key], candidate_cases[key])
+                if comparison is not None:
+                    comparisons.append(comparison)
+
+        self._classify(comparisons)
+        # Worst regressions first, best improvements last
+        comparisons.sort(key=lambda c: c["worsening"], reverse=True)
+
+        return {
+            "baseline": str(self.baseline_dir),
+            "candidate": str(self.candidate_dir),
+            "threshold": self.threshold,
+            "alpha": self.alpha,
+            "matched_cases": len(matched),
+            "baseline_only_cases": len(set(baseline_cases) - set(candidate_cases)),
+            "candidate_only_cases": len(set(candidate_cases) - set(baseline_cases)),
+            "regressions": sum(1 for c in comparisons if c["status"] == "regression"),
+            "improvements": sum(1 for c in comparisons if c["status"] == "improvement"),
+            "untested": sum(1 for c in comparisons if c["status"] == "untested"),
+            "allow_median_only": self.allow_median_only,
+            "comparisons": comparisons
+        }
+
+    @staticmethod
+    def print_report(report: Dict[str, Any], show_all: bool = False) -> None:
+        """Print the ranked regression/improvement report"""
+        print(f"\nBaseline:  {report['baseline']}")
+        print(f"Candidate: {report['candidate']}")
+        print(f"Matched cases: {report['matched_cases']} "
+              f"(baseline only: {report['baseline_only_cases']}, "
+              f"candidate only: {report['candidate_only_cases']})")
+        print(f"Threshold: {report['threshold']:.1%} median change, alpha {report['alpha']} (Holm-corrected)")
+
+        rows = [c for c in report["comparisons"] if show_all or c["status"] not in ("unchanged", "untested")]
+        if rows:
+            print(f"\n{'Status':<12} {'Case':<28} {'Metric':<26} {'Baseline':>10} {'Candidate':>10} "
+                  f"{'Change':>8} {'p(adj)':>8} {'Effect':>18}")
+            for c in rows:
+                case = c["case"]
+                case_name = (f"in:{case['input_tokens']} out:{case['output_tokens']} "
+                             f"proc:{case['processes']} rand:{case['random_tokens']}")
+                p_value = f"{c['adjusted_p_value']:.3g}" if c.get("adjusted_p_value") is not None else "n/a"
+                effect = f"{c['cliffs_delta']:+.2f} {c['effect_size']}" if c["cliffs_delta"] is not None else "n/a"
+                print(f"{c['status']:<12} {case_name:<28} {c['metric']:<26} {c['baseline_median']:>10.4f} "
+                      f"{c['candidate_median']:>10.4f} {c['relative_change']:>+8.1%} {p_value:>8} {effect:>18}")
+
+        print(f"\n{report['regressions']} regression(s), {report['improvements']} improvement(s)")
+        if report["untested"]:
+            print(f"{report['untested']} comparison(s) untested: no per-request samples, median change only "
+                  f"(not counted; use --allow-median-only to gate on them)")
+        elif report["allow_median_only"]:
+            print("Comparisons without per-request samples were classified by median change only")
+
+
+def main():
+    """Main entry point for compare mode"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Compare two result sets and detect performance regressions",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Compare two archive keys
+  python -m llm_test_tool compare vllm-v0.9.2--p5.48xlarge--Qwen3-8B vllm-v0.10.0--p5.48xlarge--Qwen3-8B
+
+  # Compare two directories, failing on >10% median regressions
+  python -m llm_test_tool compare old_results/ new_results/ --threshold 0.10
+        """
+    )
+    parser.add_argument("baseline", help="Baseline result directory or archive key")
+    parser.add_argument("candidate", help="Candidate result directory or archive key")
+    parser.add_argument("--archive-dir", type=str, default="archive_results",
+                        help="Archive directory used to resolve keys")
+    parser.add_argument("--threshold", type=float, default=0.05,
+                        help="Relative median change counted as a regression (default: 0.05)")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="Significance level after Holm correction (default: 0.05)")
+    parser.add_argument("--metrics", nargs="+", choices=list(METRICS.keys()), default=None,
+                        help="Metrics to compare (default: all)")
+    parser.add_argument("--allow-median-only", action="store_true",
+                        help="Classify cases without per-request samples by median change alone "
+                             "(default: report them as untested)")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                        help="Write the full report as JSON")
+    parser.add_argument("--all", action="store_true",
+                        help="Also list unchanged comparisons")
+
+    args = parser.parse_args()
+
+    comparator = ResultComparator(args.baseline, args.candidate, args.archive_dir,
+                                  args.threshold, args.alpha, args.metrics, args.allow_median_only)
+    report = comparator.compare()
+    ResultComparator.print_report(report, show_all=args.all)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to: {args.output}")
+
+    if report["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Configuration module for LLM Test Tool.
 
 import argparse
 from dataclasses import dataclass
+from typing import List, Optional
 
 
 @dataclass
@@ -17,6 +18,7 @@ class TestConfig:
     output_tokens: int
     url: str
     output_file: str
+    percentiles: Optional[List[float]] = None  # Extra percentiles (in percent) to report
 
 
 def parse_arguments() -> TestConfig:
@@ -38,6 +40,8 @@ def parse_arguments() -> TestConfig:
                         help="API endpoint URL")
     parser.add_argument("--output", type=str, default="test_results.json", 
                         help="Results output file")
+    parser.add_argument("--percentiles", type=float, nargs="+", default=None,
+                        help="Extra percentiles to report, e.g. 95 99 99.9 (p25/p50/p75/p90 are always included)")
     
     args = parser.parse_args()
     
@@ -49,7 +53,8 @@ def parse_arguments() -> TestConfig:
         random_tokens=args.random_tokens,
         output_tokens=args.output_tokens,
         url=args.url,
-        output_file=args.output
+        output_file=args.output,
+        percentiles=args.percentiles
     )
 
 
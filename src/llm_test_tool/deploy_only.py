@@ -50,6 +50,12 @@ Examples:
         help="Skip health check after deployment"
     )
     
+    parser.add_argument(
+        "--force-redeploy",
+        action="store_true",
+        help="Restart the container even if a healthy one with the same fingerprint is running"
+    )
+    
     parser.add_argument(
         "--stop",
         action="store_true",
@@ -134,6 +140,7 @@ def main():
             print(f"Container name: {deployment.container_name}")
             print(f"Port: {deployment.port}")
             print(f"Model: {deployment.get_model_id()}")
+            print(f"Fingerprint: {deployment.fingerprint()}")
             print("-" * 50)
         
         if args.show_command:
@@ -158,6 +165,12 @@ def main():
         print(f"Model: {deployment.get_model_id()}")
         print(f"Port: {deployment.port}")
         
+        if not args.force_redeploy and deployment.adopt_existing_container():
+            print("✓ Matching deployment is already running and healthy")
+            print(f"  API endpoint: {deployment.get_api_url()}")
+            print(f"  Container name: {deployment.container_name}")
+            return
+        
         if not deployment.start_container():
             print("✗ Failed to start container")
             sys.exit(1)
@@ -2,20 +2,79 @@
 Docker deployment module for vLLM servers.
 """
 
+import hashlib
 import json
+import os
+import re
 import yaml
 import subprocess
+import threading
 import time
 import requests
-from typing import Dict, Any
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 
+# app_args keys that multiply the number of GPUs a server occupies
+PARALLEL_SIZE_ARGS = {
+    'tensor': ['tensor-parallel-size', 'tp-size', 'tp'],
+    'pipeline': ['pipeline-parallel-size', 'pp-size', 'pp'],
+    'data': ['data-parallel-size', 'dp-size', 'dp'],
+}
+
+# Docker label holding the fingerprint of the command a container was started with
+FINGERPRINT_LABEL = 'llm_test_tool.fingerprint'
+
+# Container log lines that mean the server will never become healthy
+FATAL_LOG_PATTERNS = [
+    r'CUDA out of memory',
+    r'OutOfMemoryError',
+    r'error: unrecognized arguments',
+    r'error: argument ',
+    r'Engine core initialization failed',
+    r'Address already in use',
+    r'Cannot re-initialize CUDA',
+    r'No CUDA GPUs are available',
+]
+
+# Container log lines marking startup phases, per runtime. A phase is stamped with
+# the last matching line, so with several ranks it marks when all of them are done.
+STARTUP_PHASE_PATTERNS = {
+    'vllm': [
+        ('weights_loaded', r'Loading weights took|Model loading took'),
+        ('graph_capture_done', r'Graph capturing finished|torch\.compile takes'),
+    ],
+    'sglang': [
+        ('weights_loaded', r'Load weight end'),
+        ('graph_capture_done', r'Capture cuda graph end|Capture piecewise CUDA graph end'),
+    ],
+}
+
+
+def detect_gpu_count(default: int = 8) -> int:
+    """Detect the number of GPUs on this host via nvidia-smi"""
+    try:
+        result = subprocess.run(['nvidia-smi', '-L'], capture_output=True, text=True, check=True)
+        gpu_lines = [line for line in result.stdout.splitlines() if line.startswith('GPU ')]
+        if gpu_lines:
+            return len(gpu_lines)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        pass
+    return default
+
+
 class VllmDeployment:
     """Manages vLLM Docker container deployment and lifecycle"""
     
-    def __init__(self, config_path: str):
-        """Initialize with deployment configuration"""
+    def __init__(self, config_path: str, port: Optional[int] = None,
+                 container_name: Optional[str] = None, gpu_ids: Optional[List[int]] = None):
+        """Initialize with deployment configuration
+        
+        port, container_name and gpu_ids override the values from the config file so
+        that several servers can be started from one config on the same host.
+        """
         self.config_path = Path(config_path)
         
         # Load config file (support both YAML and JSON)
@@ -26,18 +85,112 @@ class VllmDeployment:
                 self.config = json.load(f)
         
         self.deployment_config = self.config['deployment']
-        self.container_name = self.deployment_config['container_name']
-        self.port = self.deployment_config['port']
+        self.container_name = container_name or self.deployment_config['container_name']
+        self.port = port or self.deployment_config['port']
+        self.gpu_ids = list(gpu_ids) if gpu_ids is not None else None
+        
+        # Docker CLI to use; overridable so deployments can be exercised with a fake docker
+        self.docker_bin = self.deployment_config.get('docker_bin') or os.environ.get('DOCKER_BIN', 'docker')
+        
+        # Extra fatal log patterns can be added per config
+        self.fatal_log_patterns = [
+            re.compile(pattern)
+            for pattern in FATAL_LOG_PATTERNS + self.deployment_config.get('fatal_log_patterns', [])
+        ]
+        self.failure_reason = None
+        
+        self.startup_phase_patterns = [
+            (phase, re.compile(pattern)) for phase, pattern in STARTUP_PHASE_PATTERNS[self.get_runtime()]
+        ]
+        self.startup_timeline = {}
+        self._startup_time = None
+    
+    def for_replica(self, index: int, gpu_ids: List[int]) -> 'VllmDeployment':
+        """Create a deployment for replica `index` pinned to the given GPUs
+        
+        Replicas share the config but get their own container name and port
+        (base port + index).
+        """
+        return VllmDeployment(
+            str(self.config_path),
+            port=self.port + index,
+            container_name=f"{self.container_name}-{index}",
+            gpu_ids=gpu_ids
+        )
     
-    def build_docker_command(self) -> list:
+    def get_runtime(self) -> str:
+        """Guess the serving runtime (vllm or sglang) from the image and command"""
+        image_and_command = f"{self.deployment_config.get('docker_image', '')} {self.deployment_config.get('command', '')}"
+        return 'sglang' if 'sglang' in image_and_command.lower() else 'vllm'
+    
+    def _mark_startup_phase(self, phase: str, first_only: bool = False) -> None:
+        """Record seconds since the container was created for a startup phase"""
+        if self._startup_time is None or (first_only and phase in self.startup_timeline['phases']):
+            return
+        self.startup_timeline['phases'][phase] = round(time.time() - self._startup_time, 3)
+    
+    def config_hash(self) -> str:
+        """Get a stable hash of the deployment section of the config"""
+        canonical = json.dumps(self.deployment_config, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+    
+    def get_gpu_count(self) -> int:
+        """Get the number of GPUs one server needs (tensor x pipeline x data parallel size)"""
+        args = {}
+        args.update(self.deployment_config.get('model_config', {}))
+        args.update(self.deployment_config.get('app_args', {}))
+        
+        gpu_count = 1
+        for names in PARALLEL_SIZE_ARGS.values():
+            for name in names:
+                if name in args:
+                    gpu_count *= int(args[name])
+                    break
+        
+        # An explicit GPU count or device list in docker_params reserves at least that many GPUs
+        docker_params = self.deployment_config.get('docker_params', {})
+        gpus = str(docker_params.get('gpus', 'all')).strip('"\'')
+        if gpus.isdigit():
+            gpu_count = max(gpu_count, int(gpus))
+        elif gpus.startswith('device='):
+            gpu_count = max(gpu_count, len(gpus[len('device='):].split(',')))
+        
+        environment = docker_params.get('environment', {})
+        if isinstance(environment, list):
+            environment = dict(env_var.split('=', 1) for env_var in environment if '=' in env_var)
+        if environment.get('CUDA_VISIBLE_DEVICES'):
+            gpu_count = max(gpu_count, len(str(environment['CUDA_VISIBLE_DEVICES']).split(',')))
+        
+        return gpu_count
+    
+    def fingerprint(self) -> str:
+        """Get a hash of the effective docker command (image, args, env, volumes, ports)
+        
+        The container name is left out, so configs that differ only in name hash the
+        same; adoption additionally requires the name to match (see find_matching_container).
+        """
+        cmd = self.build_docker_command(with_label=False)[1:]
+        name_index = cmd.index('--name')
+        del cmd[name_index:name_index + 2]
+        return hashlib.sha256('\0'.join(cmd).encode()).hexdigest()[:16]
+    
+    def build_docker_command(self, with_label: bool = True) -> list:
         """Build the docker run command from configuration"""
-        cmd = ['docker', 'run']
+        cmd = [self.docker_bin, 'run']
+        
+        # Label the container so later runs can adopt it (see adopt_existing_container)
+        if with_label:
+            cmd.extend(['--label', f"{FINGERPRINT_LABEL}={self.fingerprint()}"])
         
         # Add Docker run parameters
         docker_params = self.deployment_config.get('docker_params', {})
         
         # Handle basic parameters
-        if 'gpus' in docker_params:
+        if self.gpu_ids is not None:
+            # Device lists need the inner quotes, otherwise docker splits them on commas
+            devices = ','.join(str(gpu_id) for gpu_id in self.gpu_ids)
+            cmd.extend(['--gpus', f'"device={devices}"'])
+        elif 'gpus' in docker_params:
             cmd.extend(['--gpus', str(docker_params['gpus'])])
         
         # Add port mapping
@@ -57,9 +210,13 @@ class VllmDeployment:
                 # Handle environment variables
                 if isinstance(value, dict):
                     for env_key, env_value in value.items():
+                        if env_key == 'CUDA_VISIBLE_DEVICES' and self.gpu_ids is not None:
+                            continue  # Superseded by the --gpus device mask
                         cmd.extend(['-e', f"{env_key}={env_value}"])
                 elif isinstance(value, list):
                     for env_var in value:
+                        if env_var.startswith('CUDA_VISIBLE_DEVICES=') and self.gpu_ids is not None:
+                            continue
                         cmd.extend(['-e', env_var])
             elif param == 'ports':
                 # Handle additional port mappings
@@ -143,10 +300,10 @@ class VllmDeployment:
         """Check if the container is already running"""
         try:
             result = subprocess.run(
-                ['docker', 'ps', '--filter', f'name={self.container_name}', '--format', '{{.Names}}'],
+                [self.docker_bin, 'ps', '--filter', f'name={self.container_name}', '--format', '{{.Names}}'],
                 capture_output=True, text=True, check=True
             )
-            return self.container_name in result.stdout
+            return self.container_name in result.stdout.split()
         except subprocess.CalledProcessError:
             return False
     
@@ -154,10 +311,10 @@ class VllmDeployment:
         """Check if the container exists (running or stopped)"""
         try:
             result = subprocess.run(
-                ['docker', 'ps', '-a', '--filter', f'name={self.container_name}', '--format', '{{.Names}}'],
+                [self.docker_bin, 'ps', '-a', '--filter', f'name={self.container_name}', '--format', '{{.Names}}'],
                 capture_output=True, text=True, check=True
             )
-            return self.container_name in result.stdout
+            return self.container_name in result.stdout.split()
         except subprocess.CalledProcessError:
             return False
     
@@ -165,10 +322,10 @@ class VllmDeployment:
         """Stop and remove existing container"""
         try:
             # Stop the container
-            subprocess.run(['docker', 'stop', self.container_name], 
+            subprocess.run([self.docker_bin, 'stop', self.container_name], 
                          capture_output=True, check=True)
             # Remove the container
-            subprocess.run(['docker', 'rm', self.container_name], 
+            subprocess.run([self.docker_bin, 'rm', self.container_name], 
                          capture_output=True, check=True)
             print(f"Stopped and removed container: {self.container_name}")
             return True
@@ -187,7 +344,7 @@ class VllmDeployment:
         elif self.container_exists():
             print(f"Container {self.container_name} exists but is not running. Removing it first...")
             try:
-                subprocess.run(['docker', 'rm', self.container_name], 
+                subprocess.run([self.docker_bin, 'rm', self.container_name], 
                              capture_output=True, check=True)
                 print(f"Removed stopped container: {self.container_name}")
             except subprocess.CalledProcessError as e:
@@ -198,42 +355,202 @@ class VllmDeployment:
         cmd = self.build_docker_command()
         print(f"Starting container with command: {' '.join(cmd)}")
         
+        self._startup_time = time.time()
+        self.startup_timeline = {
+            'container_name': self.container_name,
+            'runtime': self.get_runtime(),
+            'started_at': datetime.now().isoformat(),
+            'phases': {}
+        }
+        
         try:
             result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            self._mark_startup_phase('container_created')
             print(f"Container started successfully: {result.stdout.strip()}")
             return True
         except subprocess.CalledProcessError as e:
             print(f"Error starting container: {e}")
             print(f"stderr: {e.stderr}")
+            self.failure_reason = f"docker run failed: {(e.stderr or '').strip() or e}"
+            return False
+    
+    def is_healthy(self) -> bool:
+        """Check the health endpoint once"""
+        try:
+            response = requests.get(f"http://localhost:{self.port}/health", timeout=5)
+            return response.status_code == 200
+        except requests.RequestException:
             return False
     
+    def find_matching_container(self) -> Optional[str]:
+        """Find our running container if it was started with the same effective docker command
+
+        Only a container with this deployment's own name qualifies: cleanup() stops the
+        adopted container, so one started by another campaign or by hand is left alone.
+        """
+        try:
+            result = subprocess.run(
+                [self.docker_bin, 'ps', '--filter', f'label={FINGERPRINT_LABEL}={self.fingerprint()}',
+                 '--format', '{{.Names}}'],
+                capture_output=True, text=True, check=True
+            )
+        except subprocess.CalledProcessError:
+            return None
+        return self.container_name if self.container_name in result.stdout.split() else None
+    
+    def adopt_existing_container(self) -> bool:
+        """Reuse an already healthy container whose fingerprint matches this config"""
+        container_name = self.find_matching_container()
+        if container_name is None or not self.is_healthy():
+            return False
+        
+        print(f"Reusing healthy container {container_name} (fingerprint {self.fingerprint()})")
+        return True
+    
+    def get_container_state(self) -> Optional[Dict[str, Any]]:
+        """Get the container status and exit code, or None if it does not exist"""
+        try:
+            result = subprocess.run(
+                [self.docker_bin, 'inspect', '-f', '{{.State.Status}} {{.State.ExitCode}}', self.container_name],
+                capture_output=True, text=True, check=True
+            )
+        except subprocess.CalledProcessError:
+            return None
+        status, _, exit_code = result.stdout.strip().partition(' ')
+        return {'status': status, 'exit_code': int(exit_code) if exit_code.isdigit() else None}
+    
+    def _on_log_line(self, line: str) -> Optional[str]:
+        """Inspect one container log line; return a failure reason if it is fatal"""
+        self._mark_startup_phase('first_log_line', first_only=True)
+        for phase, pattern in self.startup_phase_patterns:
+            if pattern.search(line):
+                self._mark_startup_phase(phase)
+        
+        for pattern in self.fatal_log_patterns:
+            if pattern.search(line):
+                return f"fatal log line: {line.strip()}"
+        return None
+    
+    def _follow_logs(self, stop: threading.Event, failed: threading.Event, recent_lines: deque) -> subprocess.Popen:
+        """Stream container logs in a background thread, setting `failed` on a fatal line"""
+        process = subprocess.Popen(
+            [self.docker_bin, 'logs', '-f', self.container_name],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace'
+        )
+        
+        def reader():
+            for line in process.stdout:
+                recent_lines.append(line.rstrip())
+                reason = self._on_log_line(line)
+                if reason and not failed.is_set():
+                    self.failure_reason = reason
+                    failed.set()
+                if stop.is_set():
+                    break
+        
+        threading.Thread(target=reader, daemon=True).start()
+        return process
+    
     def wait_for_health(self, timeout: int = 1200) -> bool:
-        """Wait for the server to become healthy"""
+        """Wait for the server to become healthy
+        
+        Container logs are streamed while waiting, so a fatal log line or the
+        container exiting fails the deployment immediately instead of after the
+        timeout. The health endpoint is polled with exponential backoff. The reason
+        of a failure is kept in self.failure_reason.
+        """
         health_url = f"http://localhost:{self.port}/health"
         print(f"Waiting for server to become healthy at {health_url}...")
+        self.failure_reason = None
+        
+        stop = threading.Event()
+        failed = threading.Event()
+        recent_lines = deque(maxlen=20)
+        log_process = self._follow_logs(stop, failed, recent_lines)
         
         start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                response = requests.get(health_url, timeout=5)
-                if response.status_code == 200:
-                    print("Server is healthy!")
+        delay = 0.5
+        try:
+            while time.time() - start_time < timeout:
+                if self.is_healthy():
+                    self._mark_startup_phase('first_healthy')
+                    print(f"\nServer is healthy after {time.time() - start_time:.1f} seconds!")
                     return True
-            except requests.RequestException:
-                pass
-            
-            print(".", end="", flush=True)
-            time.sleep(5)
+                
+                state = self.get_container_state()
+                if state is None:
+                    self.failure_reason = "container no longer exists"
+                elif state['status'] in ('exited', 'dead'):
+                    self.failure_reason = f"container exited with code {state['exit_code']}"
+                
+                # Wake up early if the log reader sees a fatal line
+                if self.failure_reason or failed.wait(delay):
+                    last_lines = '\n'.join(recent_lines)
+                    print(f"\nDeployment failed: {self.failure_reason}")
+                    if last_lines:
+                        print(f"Last container log lines:\n{last_lines}")
+                    return False
+                
+                print(".", end="", flush=True)
+                delay = min(delay * 1.5, 10)
+        finally:
+            stop.set()
+            log_process.terminate()
+            try:
+                log_process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                log_process.kill()
+                log_process.wait()
         
+        self.failure_reason = f"server did not become healthy within {timeout} seconds"
         print(f"\nServer failed to become healthy within {timeout} seconds")
         return False
     
-    def deploy(self) -> bool:
-        """Deploy the vLLM server and wait for it to be ready"""
+    def deploy(self, force_redeploy: bool = False) -> bool:
+        """Deploy the vLLM server and wait for it to be ready
+        
+        A running container with the same fingerprint is adopted instead of being
+        restarted, unless force_redeploy is set.
+        """
+        self.failure_reason = None
+        if not force_redeploy and self.adopt_existing_container():
+            self.startup_timeline = {'container_name': self.container_name, 'adopted': True, 'phases': {}}
+            return True
+        
         if not self.start_container():
+            self.failure_reason = self.failure_reason or "failed to start container"
+            return False
+        
+        if not self.wait_for_health():
             return False
         
-        return self.wait_for_health()
+        self.measure_first_completion()
+        self._print_startup_timeline()
+        return True
+    
+    def measure_first_completion(self, timeout: int = 300) -> bool:
+        """Send one tiny request and record when the first completion succeeds"""
+        payload = {
+            "model": self.get_model_id(),
+            "messages": [{"role": "user", "content": "hi"}],
+            "max_tokens": 1
+        }
+        try:
+            response = requests.post(self.get_api_url(), json=payload, timeout=timeout)
+            if response.status_code == 200:
+                self._mark_startup_phase('first_completion')
+                return True
+            print(f"Warning: first completion returned HTTP {response.status_code}")
+        except requests.RequestException as e:
+            print(f"Warning: first completion failed: {e}")
+        return False
+    
+    def _print_startup_timeline(self) -> None:
+        """Print the startup phases in the order they happened"""
+        phases = self.startup_timeline.get('phases', {})
+        print("Startup timeline (seconds since container create):")
+        for phase, seconds in sorted(phases.items(), key=lambda item: item[1]):
+            print(f"- {phase}: {seconds:.1f}")
     
     def cleanup(self) -> bool:
         """Clean up the deployment"""
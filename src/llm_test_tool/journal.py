@@ -0,0 +1,91 @@
+"""
+Append-only journal of completed requests, used to resume interrupted test cases.
+
+The journal is newline-delimited JSON: a header line with the deployment config
+hash followed by one compact line per successful request. Every line is flushed
+and fsynced as it is written, so at most the request in flight is lost on a crash.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+
+class RequestJournal:
+    """Crash-safe per-case log of completed request results"""
+
+    def __init__(self, path: str, config_hash: str):
+        """Initialize the journal at `path` for a deployment with the given config hash"""
+        self.path = Path(path)
+        self.config_hash = config_hash
+        self._file = None
+
+    def load(self) -> Dict[int, Dict[str, Any]]:
+        """Replay the journal and return completed results keyed by request ID
+
+        A journal written for a different deployment config is discarded. A torn last
+        line (crash mid-write) is ignored.
+        """
+        if not self.path.exists():
+            return {}
+
+        completed = {}
+        with open(self.path, 'rb+') as f:
+            header = f.readline()
+            try:
+                header_ok = json.loads(header).get('config_hash') == self.config_hash
+            except json.JSONDecodeError:
+                header_ok = False
+            if not header_ok:
+                print(f"Discarding journal {self.path.name}: deployment config changed")
+                f.close()
+                self.remove()
+                return {}
+
+            valid_end = f.tell()
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                completed[result['request_id']] = result
+                valid_end += len(line)
+
+            # Drop a torn tail so new appends start on a clean line
+            f.truncate(valid_end)
+
+        return completed
+
+    def append(self, result: Dict[str, Any]) -> None:
+        """Durably append a successful request result"""
+        if not result.get('success'):
+            return  # Failed requests are retried on resume
+
+        if self._file is None:
+            is_new = not self.path.exists()
+            self._file = open(self.path, 'a')
+            if is_new:
+                self._write_line({'config_hash': self.config_hash})
+
+        self._write_line(result)
+
+    def _write_line(self, record: Dict[str, Any]) -> None:
+        """Write one JSON line and force it to disk"""
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Close the journal file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """Delete the journal once the case result has been saved"""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
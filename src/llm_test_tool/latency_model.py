@@ -0,0 +1,196 @@
+"""
+Latency decomposition models fitted across a deployment's test matrix.
+
+Two linear cost models are fitted per result directory with least squares:
+
+    TTFT ~ a + b * input_tokens + q * input_tokens * (concurrency - 1)
+    TPOT ~ c + d * batch
+
+b is the prefill time per token (1 / b is prefill tokens/sec), q captures
+queueing behind the other requests' prefills, and c + d * batch is the decode
+step time at a given batch size. Cases with large robust residuals are flagged
+as likely measurement anomalies.
+"""
+
+import glob
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Any
+
+import numpy as np
+
+
+# |robust z| above this marks a case as an anomaly (Iglewicz & Hoaglin)
+ANOMALY_Z = 3.5
+
+
+class LatencyModel:
+    """Fits TTFT and TPOT cost models to one result directory"""
+
+    def __init__(self, result_dir: str, z_threshold: float = ANOMALY_Z):
+        """Load every test_*.json case in result_dir"""
+        self.result_dir = Path(result_dir)
+        self.z_threshold = z_threshold
+        self.cases = self._load_cases()
+
+    def _load_cases(self) -> Dict[str, np.ndarray]:
+        """Load per-case means as column arrays"""
+        rows = []
+        for path in sorted(glob.glob(str(self.result_dir / "test_*.json"))):
+            with open(path, 'r') as f:
+                result = json.load(f)
+            metadata = result.get("metadata")
+            stats = result.get("statistics", {})
+            ttft = stats.get("first_token_latency", {}).get("mean")
+            e2e = stats.get("end_to_end_latency", {}).get("mean")
+            if not metadata or ttft is None or e2e is None:
+                continue
+
+            usage = stats.get("token_usage", {})
+            # Prefer what the server reported over what was requested
+            input_tokens = usage.get("prompt_tokens", {}).get("mean") or metadata["input_tokens"]
+            output_tokens = usage.get("completion_tokens", {}).get("mean") or metadata["output_tokens"]
+            batch = stats.get("achieved_concurrency", {}).get("mean") or metadata["processes"]
+            rows.append((Path(path).name, metadata["processes"], input_tokens, output_tokens, batch, ttft, e2e))
+
+        names = [row[0] for row in rows]
+        values = np.array([row[1:] for row in rows], dtype=float).reshape(-1, 6)
+        return {
+            "name": np.array(names, dtype=object),
+            "processes": values[:, 0],
+            "input_tokens": values[:, 1],
+            "output_tokens": values[:, 2],
+            "batch": values[:, 3],
+            "ttft": values[:, 4],
+            "e2e": values[:, 5]
+        }
+
+    def _fit(self, design: np.ndarray, target: np.ndarray, names: List[str]) -> Dict[str, Any]:
+        """Least-squares fit with goodness of fit and robust-z residual anomalies"""
+        coefficients, _, rank, _ = np.linalg.lstsq(design, target, rcond=None)
+        predicted = design @ coefficients
+        residuals = target - predicted
+
+        total = ((target - target.mean()) ** 2).sum()
+        r_squared = 1 - (residuals ** 2).sum() / total if total > 0 else None
+
+        # Robust z-score of residuals relative to the prediction
+        relative = residuals / np.maximum(np.abs(predicted), 1e-9)
+        mad = np.median(np.abs(relative - np.median(relative)))
+        robust_z = 0.6745 * (relative - np.median(relative)) / mad if mad > 0 else np.zeros_like(relative)
+        anomalies = [
+            {"case": names[k], "observed": float(target[k]), "predicted": float(predicted[k]),
+             "robust_z": float(robust_z[k])}
+            for k in np.flatnonzero(np.abs(robust_z) > self.z_threshold)
+        ]
+
+        return {
+            "coefficients": coefficients.tolist(),
+            "r_squared": float(r_squared) if r_squared is not None else None,
+            "rmse": float(np.sqrt((residuals ** 2).mean())),
+            "rank_deficient": bool(rank < design.shape[1]),
+            "anomalies": anomalies
+        }
+
+    def fit(self) -> Dict[str, Any]:
+        """Fit both models and derive prefill throughput and decode step time"""
+        cases = self.cases
+        n = len(cases["ttft"])
+        report = {"result_dir": str(self.result_dir), "cases": n}
+        if n < 4:
+            report["error"] = f"need at least 4 cases to fit, found {n}"
+            return report
+
+        names = list(cases["name"])
+        ones = np.ones(n)
+
+        ttft_design = np.column_stack([ones, cases["input_tokens"],
+                                       cases["input_tokens"] * (cases["processes"] - 1)])
+        ttft = self._fit(ttft_design, cases["ttft"], names)
+        a, b, q = ttft["coefficients"]
+        ttft.update({"intercept": a, "per_input_token": b, "queueing_per_input_token": q,
+                     "prefill_tokens_per_second": 1 / b if b > 0 else None})
+
+        # Time per output token after the first one
+        decode_tokens = np.maximum(cases["output_tokens"] - 1, 1)
+        tpot = (cases["e2e"] - cases["ttft"]) / decode_tokens
+        tpot_design = np.column_stack([ones, cases["batch"]])
+        decode = self._fit(tpot_design, tpot, names)
+        c, d = decode["coefficients"]
+        decode.update({"intercept": c, "per_batch_request": d,
+                       "decode_step_time_batch_1": c + d,
+                       "decode_step_time_max_batch": c + d * float(cases["batch"].max())})
+
+        report["ttft_model"] = ttft
+        report["tpot_model"] = decode
+        return report
+
+    @staticmethod
+    def print_report(report: Dict[str, Any]) -> None:
+        """Print a fitted model report"""
+        print(f"\n{report['result_dir']} ({report['cases']} cases)")
+        if "error" in report:
+            print(f"  ✗ {report['error']}")
+            return
+
+        def r_squared(model: Dict[str, Any]) -> str:
+            return f"{model['r_squared']:.3f}" if model["r_squared"] is not None else "n/a"
+
+        ttft = report["ttft_model"]
+        prefill = ttft["prefill_tokens_per_second"]
+        print(f"  TTFT = {ttft['intercept']:.4f} + {ttft['per_input_token']:.3e}*input "
+              f"+ {ttft['queueing_per_input_token']:.3e}*input*(C-1)   R²={r_squared(ttft)}")
+        print(f"    prefill: {prefill:,.0f} tokens/sec" if prefill else "    prefill: not identifiable")
+
+        tpot = report["tpot_model"]
+        print(f"  TPOT = {tpot['intercept']:.4f} + {tpot['per_batch_request']:.3e}*batch   R²={r_squared(tpot)}")
+        print(f"    decode step: {tpot['decode_step_time_batch_1'] * 1000:.2f} ms at batch 1, "
+              f"{tpot['decode_step_time_max_batch'] * 1000:.2f} ms at the largest batch")
+
+        for model_name in ("ttft_model", "tpot_model"):
+            for anomaly in report[model_name]["anomalies"]:
+                print(f"  ⚠ {model_name.split('_')[0].upper()} anomaly: {anomaly['case']} observed "
+                      f"{anomaly['observed']:.4f}, predicted {anomaly['predicted']:.4f} "
+                      f"(robust z {anomaly['robust_z']:+.1f})")
+
+
+def main():
+    """Main entry point for latency model fitting"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fit TTFT/TPOT cost models across a test matrix")
+    parser.add_argument("results", nargs="*",
+                        help="Result directories or runtime--instance--model archive keys (default: whole archive)")
+    parser.add_argument("--archive-dir", type=str, default="archive_results",
+                        help="Archive directory used to resolve keys")
+    parser.add_argument("--z-threshold", type=float, default=ANOMALY_Z,
+                        help=f"Robust z-score above which a case is flagged (default: {ANOMALY_Z})")
+    parser.add_argument("--output", "-o", type=str, default=None,
+                        help="Write all reports as JSON")
+
+    args = parser.parse_args()
+
+    archive_dir = Path(args.archive_dir)
+    if args.results:
+        result_dirs = [Path(r) if Path(r).is_dir() else archive_dir / r for r in args.results]
+    else:
+        result_dirs = sorted(p for p in archive_dir.iterdir() if p.is_dir())
+
+    reports = []
+    for result_dir in result_dirs:
+        if not result_dir.is_dir():
+            print(f"✗ No result directory {result_dir}")
+            sys.exit(1)
+        report = LatencyModel(str(result_dir), args.z_threshold).fit()
+        LatencyModel.print_report(report)
+        reports.append(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\nReports saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
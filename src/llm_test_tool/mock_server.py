@@ -0,0 +1,91 @@
+"""
+Mock OpenAI-compatible streaming server for exercising the test tool without GPUs.
+"""
+
+import argparse
+import json
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class MockLlmHandler(BaseHTTPRequestHandler):
+    """Serves /health and a streaming /v1/chat/completions endpoint"""
+
+    # Simulated latencies, set from the command line
+    first_token_delay = 0.05
+    token_delay = 0.005
+
+    def log_message(self, format, *args):
+        """Silence per-request access logs"""
+        pass
+
+    def do_GET(self):
+        """Health check"""
+        if self.path in ('/health', '/v1/models'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{"status": "ok"}')
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        """Stream max_tokens single-token chunks followed by a usage chunk"""
+        if not self.path.endswith('/chat/completions'):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        max_tokens = int(payload.get('max_tokens', 16))
+        prompt = ''.join(m.get('content', '') for m in payload.get('messages', []))
+        prompt_tokens = len(prompt.split())
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+
+        time.sleep(self.first_token_delay)
+        for _ in range(max_tokens):
+            chunk = {"choices": [{"index": 0, "delta": {"content": "x"}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.token_delay)
+
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": max_tokens,
+            "total_tokens": prompt_tokens + max_tokens
+        }
+        self.wfile.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def main():
+    """Main entry point for the mock server"""
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM server")
+    parser.add_argument("--host", type=str, default="0.0.0.0",
+                        help="Host to bind the server to")
+    parser.add_argument("--port", type=int, default=8080,
+                        help="Port to run the server on")
+    parser.add_argument("--first-token-delay", type=float, default=0.05,
+                        help="Seconds before the first token is streamed")
+    parser.add_argument("--token-delay", type=float, default=0.005,
+                        help="Seconds between streamed tokens")
+    args = parser.parse_args()
+
+    MockLlmHandler.first_token_delay = args.first_token_delay
+    MockLlmHandler.token_delay = args.token_delay
+
+    server = ThreadingHTTPServer((args.host, args.port), MockLlmHandler)
+    print(f"Mock LLM server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Performance prediction between measured grid points.
+
+For every runtime/instance/model (and random-token setting) the measured
+matrix is turned into a dense grid over (input_tokens, output_tokens,
+processes). Metrics are interpolated trilinearly in log-log space, latencies
+are constrained to be non-decreasing along every axis, and the uncertainty of
+each surface is estimated once from leave-one-out predictions of interior
+grid points. All of this is precomputed, so a query is a few bisections and
+eight lookups per metric.
+"""
+
+import math
+from bisect import bisect_right
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+AXES = ['input_tokens', 'output_tokens', 'processes']
+
+# Metric -> whether it must be non-decreasing in input, output and concurrency
+PREDICTED_METRICS = {
+    'first_token_latency_mean': True,
+    'first_token_latency_p90': True,
+    'end_to_end_latency_mean': True,
+    'end_to_end_latency_p90': True,
+    'output_tokens_per_second_mean': False,
+    'server_throughput': False,
+    'requests_per_second': False
+}
+
+# Two-sided 95% normal quantile for the reported intervals
+INTERVAL_Z = 1.96
+
+
+class _Surface:
+    """Dense log-space grid of every metric for one measured matrix"""
+
+    __slots__ = ('axes', 'log_axes', 'values', 'log_sigma', 'points')
+
+    def __init__(self, group: pd.DataFrame):
+        self.axes = [sorted(group[axis].unique().tolist()) for axis in AXES]
+        self.log_axes = [[math.log(x) for x in axis] for axis in self.axes]
+        self.points = len(group)
+        self.values = {}
+        self.log_sigma = {}
+
+        shape = tuple(len(axis) for axis in self.axes)
+        index = tuple(np.searchsorted(np.array(axis), group[name].to_numpy())
+                      for axis, name in zip(self.axes, AXES))
+
+        for metric, monotone in PREDICTED_METRICS.items():
+            if metric not in group.columns:
+                continue
+            measured = np.full(shape, np.nan)
+            values = group[metric].to_numpy(dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                measured[index] = np.where(values > 0, np.log(values), np.nan)
+            if np.isnan(measured).all():
+                continue
+
+            grid = self._fill(measured)
+            if monotone:
+                for axis in range(3):
+                    grid = np.fmax.accumulate(grid, axis=axis)
+
+            # Nested lists: scalar indexing is much faster than on ndarrays
+            self.values[metric] = grid.tolist()
+            self.log_sigma[metric] = self._loo_sigma(measured)
+
+    def _fill(self, measured: np.ndarray) -> np.ndarray:
+        """Fill unmeasured cells by 1-D interpolation along each axis in turn"""
+        grid = measured.copy()
+        for axis in (2, 0, 1):
+            lines = np.moveaxis(grid, axis, -1).reshape(-1, grid.shape[axis])
+            x = np.array(self.log_axes[axis])
+            for line in lines:
+                known = ~np.isnan(line)
+                if known.any() and not known.all():
+                    line[:] = np.interp(x, x[known], line[known])
+            grid = np.moveaxis(lines.reshape(np.moveaxis(grid, axis, -1).shape), -1, axis)
+        return grid
+
+    def _loo_sigma(self, measured: np.ndarray) -> Optional[float]:
+        """RMS log error of predicting each measured interior point from its two neighbours"""
+        errors = []
+        for axis in range(3):
+            n = measured.shape[axis]
+            if n < 3:
+                continue
+            x = np.array(self.log_axes[axis])
+            w = (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+            shape = [1, 1, 1]
+            shape[axis] = n - 2
+            w = w.reshape(shape)
+
+            lower = np.take(measured, range(0, n - 2), axis=axis)
+            middle = np.take(measured, range(1, n - 1), axis=axis)
+            upper = np.take(measured, range(2, n), axis=axis)
+            error = middle - ((1 - w) * lower + w * upper)
+            errors.append(error[~np.isnan(error)])
+
+        errors = np.concatenate(errors) if errors else np.array([])
+        return float(np.sqrt((errors ** 2).mean())) if len(errors) else None
+
+    @staticmethod
+    def _locate(log_axis: List[float], value: float) -> Tuple[int, int, float, bool]:
+        """Bracketing indices and weight for value on an axis; clamps outside the range"""
+        if len(log_axis) == 1:
+            return 0, 0, 0.0, value != log_axis[0]
+        if value <= log_axis[0]:
+            return 0, 1, 0.0, value < log_axis[0]
+        if value >= log_axis[-1]:
+            return len(log_axis) - 2, len(log_axis) - 1, 1.0, value > log_axis[-1]
+        hi = bisect_right(log_axis, value)
+        lo = hi - 1
+        return lo, hi, (value - log_axis[lo]) / (log_axis[hi] - log_axis[lo]), False
+
+    def predict(self, point: Tuple[float, float, float]) -> Dict[str, Any]:
+        """Interpolate every metric at (input_tokens, output_tokens, processes)"""
+        located = [self._locate(log_axis, math.log(x)) for log_axis, x in zip(self.log_axes, point)]
+        (i0, i1, wi, ci), (j0, j1, wj, cj), (k0, k1, wk, ck) = located
+
+        metrics = {}
+        for metric, grid in self.values.items():
+            c00 = grid[i0][j0][k0] * (1 - wk) + grid[i0][j0][k1] * wk
+            c01 = grid[i0][j1][k0] * (1 - wk) + grid[i0][j1][k1] * wk
+            c10 = grid[i1][j0][k0] * (1 - wk) + grid[i1][j0][k1] * wk
+            c11 = grid[i1][j1][k0] * (1 - wk) + grid[i1][j1][k1] * wk
+            log_value = ((c00 * (1 - wj) + c01 * wj) * (1 - wi) +
+                         (c10 * (1 - wj) + c11 * wj) * wi)
+            if math.isnan(log_value):
+                continue
+
+            sigma = self.log_sigma[metric]
+            metrics[metric] = {
+                'value': math.exp(log_value),
+                'interval_95': ([math.exp(log_value - INTERVAL_Z * sigma), math.exp(log_value + INTERVAL_Z * sigma)]
+                                if sigma is not None else None),
+                'relative_uncertainty': sigma
+            }
+
+        return {'metrics': metrics, 'extrapolated': ci or cj or ck}
+
+
+class PerformancePredictor:
+    """Precomputed interpolation surfaces for every runtime/instance/model"""
+
+    def __init__(self, df: Optional[pd.DataFrame]):
+        """Build one surface per (runtime, instance_type, model_name, random_tokens)"""
+        self.surfaces = {}
+        self.default_random = {}
+        if df is None or df.empty:
+            return
+
+        for key, group in df.groupby(['runtime', 'instance_type', 'model_name', 'random_tokens']):
+            combo, random_tokens = key[:3], int(key[3])
+            self.surfaces.setdefault(combo, {})[random_tokens] = _Surface(group)
+
+        # Without an explicit random_tokens, use the most thoroughly measured setting
+        for combo, by_random in self.surfaces.items():
+            self.default_random[combo] = max(by_random, key=lambda r: by_random[r].points)
+
+    def predict(self, runtime: str, instance_type: str, model_name: str, input_tokens: float,
+                output_tokens: float, concurrency: float, random_tokens: int = None) -> Optional[Dict[str, Any]]:
+        """Predict metrics at an arbitrary point; None if the combination is unknown"""
+        combo = (runtime, instance_type, model_name)
+        by_random = self.surfaces.get(combo)
+        if by_random is None:
+            return None
+        if random_tokens is None:
+            random_tokens = self.default_random[combo]
+        surface = by_random.get(random_tokens)
+        if surface is None:
+            return None
+
+        result = surface.predict((input_tokens, output_tokens, concurrency))
+        result.update({
+            'random_tokens': random_tokens,
+            'measured_ranges': {axis: [values[0], values[-1]] for axis, values in zip(AXES, surface.axes)}
+        })
+        return result
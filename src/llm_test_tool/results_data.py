@@ -0,0 +1,412 @@
+"""
+In-memory results data for the visualization server.
+
+The indexed archive is served from immutable snapshots. A reload builds a new
+snapshot off to the side and publishes it with a single reference assignment,
+so request handlers always see one consistent version of the data. Reloads run
+in a background thread, triggered by a periodic scan, by filesystem events
+(when watchdog is installed) or on request.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from .predictor import PerformancePredictor
+from .results_index import ResultsIndex, parse_filename, parse_directory_name
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Optional: fall back to periodic scans only
+    Observer = None
+
+# Seconds between background scans of the archive (0 disables periodic scans)
+DEFAULT_RELOAD_INTERVAL = 60.0
+
+# Seconds to let a burst of file events settle before reloading
+RELOAD_DEBOUNCE = 1.0
+
+# Results are partitioned by these columns...
+PARTITION_COLUMNS = ['runtime', 'instance_type', 'model_name']
+# ...and each partition has a value -> row positions index on these
+INDEXED_COLUMNS = ['input_tokens', 'output_tokens', 'random_tokens']
+
+# Price sheets get their own cost columns; the default sheet's columns carry no suffix
+PRICE_SHEETS = ['on_demand', 'spot', 'reserved']
+DEFAULT_PRICE_SHEET = 'on_demand'
+
+# Cost column -> (throughput column it divides the hourly price by, units per result)
+COST_METRICS = {
+    'cost_per_million_tokens': ('server_throughput', 1000000),
+    'cost_per_1k_requests': ('requests_per_second', 1000),
+    'cost_per_million_input_tokens': ('input_throughput', 1000000),
+    'cost_per_million_output_tokens': ('output_throughput', 1000000)
+}
+
+
+def cost_column(metric: str, sheet: str) -> str:
+    """Column name of a cost metric under a price sheet"""
+    return metric if sheet == DEFAULT_PRICE_SHEET else f"{metric}_{sheet}"
+
+
+def derive_metrics(df: pd.DataFrame, price_sheets: Dict[str, Dict[str, float]]) -> pd.DataFrame:
+    """Add estimated token throughputs and per-sheet cost columns, vectorized over all results"""
+    df = df.copy()
+    ftl = df['first_token_latency_mean'].to_numpy(dtype=float)
+    e2e = df['end_to_end_latency_mean'].to_numpy(dtype=float)
+    input_tokens = df['input_tokens'].to_numpy(dtype=float)
+    output_tokens = df['output_tokens'].to_numpy(dtype=float)
+    processes = df['processes'].to_numpy(dtype=float)
+    rps = df['requests_per_second'].to_numpy(dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Results with exact token throughput keep the measured values; older ones are estimated
+        # from latencies, scaled by achieved over ideal closed-loop request rate
+        rate_ratio = rps / (processes / e2e)
+        output_latency = e2e - ftl
+        estimated_input = np.where((ftl > 0) & (input_tokens > 0),
+                                   input_tokens * processes / ftl * rate_ratio, 0.0)
+        estimated_output = np.where((output_latency > 0) & (output_tokens > 0),
+                                    output_tokens * processes / output_latency * rate_ratio, 0.0)
+    exact = df['throughput_exact'].to_numpy(dtype=bool)
+    df['input_throughput'] = np.where(exact, df['input_throughput'].to_numpy(dtype=float),
+                                      np.nan_to_num(estimated_input, posinf=0.0, neginf=0.0))
+    df['output_throughput'] = np.where(exact, df['output_throughput'].to_numpy(dtype=float),
+                                       np.nan_to_num(estimated_output, posinf=0.0, neginf=0.0))
+
+    for sheet in PRICE_SHEETS:
+        prices = df['instance_type'].map(price_sheets.get(sheet, {})).fillna(0.0).to_numpy(dtype=float)
+        for metric, (rate_column, units) in COST_METRICS.items():
+            rate = df[rate_column].to_numpy(dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cost = np.where((prices > 0) & (rate > 0), prices / rate * units / 3600, 0.0)
+            df[cost_column(metric, sheet)] = cost
+        df[cost_column('instance_price_used', sheet)] = prices
+    return df
+
+
+class _Partition:
+    """Results of one runtime/instance/model, sorted by processes, with secondary indexes"""
+
+    __slots__ = ('records', 'columns', 'positions')
+
+    def __init__(self, records: List[Dict[str, Any]], columns: Dict[str, np.ndarray]):
+        self.records = records
+        self.columns = columns
+        # value -> ascending row positions, so any intersection stays sorted by processes
+        self.positions = {}
+        for column in INDEXED_COLUMNS:
+            values, inverse, counts = np.unique(columns[column], return_inverse=True, return_counts=True)
+            rows = np.split(np.argsort(inverse, kind='stable'), np.cumsum(counts)[:-1])
+            self.positions[column] = dict(zip(values.tolist(), rows))
+
+    def select(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Records matching filters on any columns, in processes order"""
+        selected = None
+        for key, value in filters.items():
+            values = value if isinstance(value, list) else [value]
+            if key in self.positions:
+                index = self.positions[key]
+                hits = [index[v] for v in values if v in index]
+                rows = np.unique(np.concatenate(hits)) if hits else np.array([], dtype=int)
+            else:
+                rows = np.flatnonzero(np.isin(self.columns[key], values))
+            selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+
+        if selected is None:
+            return [dict(record) for record in self.records]
+        # Shallow copies: callers may add fields to the records they get
+        return [dict(self.records[i]) for i in selected]
+
+
+class ResultsSnapshot:
+    """One consistent, read-only version of the indexed results"""
+
+    def __init__(self, df: Optional[pd.DataFrame], version: int,
+                 price_sheets: Dict[str, Dict[str, float]] = None):
+        """Derive throughput and cost columns for price_sheets ({sheet: {instance_type: $/hour}})"""
+        self.version = version
+        self.loaded_at = time.time()
+        # Weak validator for HTTP caching (bodies differ by content encoding); the load time
+        # keeps tags unique across server restarts
+        self.etag = f'W/"{version}-{int(self.loaded_at * 1000):x}"'
+        if df is not None and not df.empty:
+            df = derive_metrics(df, price_sheets or {})
+        self.df = df
+        # Interpolation surfaces are precomputed here so predictions are cheap
+        self.predictor = PerformancePredictor(df)
+        self.partitions = {}
+        # Tree and stats responses are built once per snapshot and served as pre-serialized JSON
+        self.tree_json = b'[]'
+        self.stats_json = None
+        if df is not None and not df.empty:
+            self._partition(df)
+            self.tree_json = json.dumps(self._build_tree(df)).encode()
+            self.stats_json = json.dumps(self._build_stats(df)).encode()
+
+    def _partition(self, df: pd.DataFrame) -> None:
+        """Split into partitions with one sort and one records conversion for the whole frame"""
+        # Group codes follow first appearance, so combinations keep the archive order
+        codes = df.groupby(PARTITION_COLUMNS, sort=False).ngroup().to_numpy()
+        order = np.lexsort((df['processes'].to_numpy(), codes))
+        ordered = df.iloc[order]
+        records = ordered.to_dict('records')
+        arrays = {column: ordered[column].to_numpy() for column in ordered.columns}
+
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        for start, end in zip([0, *bounds.tolist()], [*bounds.tolist(), len(df)]):
+            key = tuple(arrays[column][start] for column in PARTITION_COLUMNS)
+            self.partitions[key] = _Partition(records[start:end],
+                                              {column: a[start:end] for column, a in arrays.items()})
+
+    def _build_tree(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Runtime -> instance type -> model tree with result counts, from one groupby"""
+        tree = []
+        runtime_node = instance_node = None
+        for (runtime, instance_type, model_name), count in df.groupby(PARTITION_COLUMNS).size().items():
+            if runtime_node is None or runtime_node['id'] != runtime:
+                runtime_node = {'id': runtime, 'label': runtime, 'type': 'runtime', 'count': 0, 'children': []}
+                tree.append(runtime_node)
+                instance_node = None
+            if instance_node is None or instance_node['label'] != instance_type:
+                instance_node = {'id': f"{runtime}--{instance_type}", 'label': instance_type,
+                                 'type': 'instance_type', 'count': 0, 'children': []}
+                runtime_node['children'].append(instance_node)
+
+            count = int(count)
+            runtime_node['count'] += count
+            instance_node['count'] += count
+            instance_node['children'].append({
+                'id': f"{runtime}--{instance_type}--{model_name}",
+                'label': model_name,
+                'type': 'model',
+                'count': count,
+                'runtime': runtime,
+                'instance_type': instance_type,
+                'model_name': model_name
+            })
+        return tree
+
+    def _build_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Dataset summary for /api/stats"""
+        ranges = df[['input_tokens', 'output_tokens', 'processes']].agg(['min', 'max'])
+        means = df[['first_token_latency_mean', 'output_tokens_per_second_mean',
+                    'server_throughput', 'success_rate']].mean()
+        return {
+            'version': self.version,
+            'total_tests': len(df),
+            'unique_combinations': len(self.partitions),
+            'runtimes': sorted({key[0] for key in self.partitions}),
+            'instance_types': sorted({key[1] for key in self.partitions}),
+            'models': sorted({key[2] for key in self.partitions}),
+            'input_token_range': [int(v) for v in ranges['input_tokens']],
+            'output_token_range': [int(v) for v in ranges['output_tokens']],
+            'process_range': [int(v) for v in ranges['processes']],
+            'performance_summary': {
+                'avg_first_token_latency': float(means['first_token_latency_mean']),
+                'avg_throughput': float(means['output_tokens_per_second_mean']),
+                'avg_server_throughput': float(means['server_throughput']),
+                'avg_success_rate': float(means['success_rate'])
+            }
+        }
+
+    def query(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Records matching column filters (scalar or list values), sorted by processes"""
+        if self.df is None or self.df.empty:
+            return []
+        filters = {key: value for key, value in filters.items()
+                   if key in self.df.columns and value is not None}
+
+        key = tuple(filters.get(column) for column in PARTITION_COLUMNS)
+        if all(isinstance(value, str) for value in key):
+            partition = self.partitions.get(key)
+            if partition is None:
+                return []
+            return partition.select({k: v for k, v in filters.items() if k not in PARTITION_COLUMNS})
+
+        # Without a full partition key, filter the whole frame (no copy)
+        mask = np.ones(len(self.df), dtype=bool)
+        for column, value in filters.items():
+            mask &= self.df[column].isin(value if isinstance(value, list) else [value]).to_numpy()
+        return self.df[mask].sort_values('processes', kind='stable').to_dict('records')
+
+
+class ResultsDataProvider:
+    """Data provider for LLM performance test results"""
+
+    def __init__(self, results_dir: str = "archive_results", index_path: str = None,
+                 reload_interval: float = DEFAULT_RELOAD_INTERVAL, watch: bool = True,
+                 price_provider: Any = None):
+        """Load the archive; start() begins background reloading
+        
+        price_provider supplies price sheets for the cost columns; a snapshot is also
+        rebuilt when its refresh() reports changed prices.
+        """
+        self.results_dir = Path(results_dir)
+        self.index = ResultsIndex(results_dir, index_path)
+        self.price_provider = price_provider
+        self.snapshot = ResultsSnapshot(None, 0)
+        self.reload_interval = reload_interval
+        self.watch = watch
+        self.last_reload_error = None
+
+        # The lock serializes reloads (and with them all use of the index connection)
+        self._reload_lock = threading.Lock()
+        self._reload_requested = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._observer = None
+        self.load_all_results()
+
+    @property
+    def df(self) -> Optional[pd.DataFrame]:
+        """DataFrame of the current snapshot"""
+        return self.snapshot.df
+
+    @property
+    def predictor(self) -> PerformancePredictor:
+        """Predictor of the current snapshot"""
+        return self.snapshot.predictor
+
+    @property
+    def reloading(self) -> bool:
+        """Whether a reload is pending or running"""
+        return self._reload_requested.is_set() or self._reload_lock.locked()
+
+    def parse_filename(self, filename: str) -> Optional[Dict[str, str]]:
+        """Parse test result filename to extract parameters"""
+        return parse_filename(filename)
+
+    def parse_directory_name(self, dirname: str) -> Optional[Dict[str, str]]:
+        """Parse directory name to extract runtime, instance type, and model"""
+        return parse_directory_name(dirname)
+
+    def load_all_results(self) -> ResultsSnapshot:
+        """Synchronously refresh the index and publish a new snapshot if anything changed"""
+        with self._reload_lock:
+            return self._load()
+
+    def _load(self, verbose: bool = True) -> ResultsSnapshot:
+        """Reload body; the caller holds the reload lock"""
+        summary = self.index.refresh(verbose)
+        prices_changed = self.price_provider is not None and self.price_provider.refresh()
+        current = self.snapshot
+        if (current.version and not summary['parsed'] and not summary['removed'] and not summary['errors']
+                and not prices_changed):
+            return current
+
+        price_sheets = self.price_provider.sheets if self.price_provider is not None else {}
+        snapshot = ResultsSnapshot(self.index.load_dataframe(), current.version + 1, price_sheets)
+        # Publishing is a single reference assignment; readers keep the snapshot they started with
+        self.snapshot = snapshot
+        print(f"Loaded {len(snapshot.df)} test results (snapshot version {snapshot.version})")
+        return snapshot
+
+    def request_reload(self) -> None:
+        """Schedule a background reload and return immediately"""
+        self.start()
+        self._reload_requested.set()
+
+    def start(self) -> None:
+        """Start the background reload thread and, if available, the filesystem watcher"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="results-reload", daemon=True)
+        self._thread.start()
+        if self.watch:
+            self._start_watcher()
+
+    def stop(self) -> None:
+        """Stop background reloading"""
+        self._stop.set()
+        self._reload_requested.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _start_watcher(self) -> None:
+        """Trigger reloads on result file changes (requires watchdog)"""
+        if Observer is None or not self.results_dir.is_dir():
+            return
+        requested = self._reload_requested
+
+        class ResultFileHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if str(event.src_path).endswith('.json'):
+                    requested.set()
+
+        self._observer = Observer()
+        self._observer.schedule(ResultFileHandler(), str(self.results_dir), recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+        print(f"Watching {self.results_dir} for result changes")
+
+    def _run(self) -> None:
+        """Background loop: reload on request, on file events, or every reload_interval seconds"""
+        while not self._stop.is_set():
+            triggered = self._reload_requested.wait(self.reload_interval or None)
+            if self._stop.is_set():
+                break
+            if triggered:
+                self._stop.wait(RELOAD_DEBOUNCE)
+
+            with self._reload_lock:
+                self._reload_requested.clear()
+                try:
+                    # Periodic scans stay quiet unless something changed
+                    self._load(verbose=triggered)
+                    self.last_reload_error = None
+                except Exception as e:
+                    self.last_reload_error = str(e)
+                    print(f"Error reloading results: {e}")
+
+    def get_combinations(self) -> List[Dict[str, str]]:
+        """Get all available runtime-instance-model combinations"""
+        return [
+            {
+                'runtime': runtime,
+                'instance_type': instance_type,
+                'model_name': model_name,
+                'id': f"{runtime}--{instance_type}--{model_name}"
+            }
+            for runtime, instance_type, model_name in self.snapshot.partitions
+        ]
+
+    def get_test_parameters(self, runtime: str, instance_type: str, model_name: str) -> Dict[str, List]:
+        """Get available test parameters for a specific combination"""
+        snapshot = self.snapshot
+        if snapshot.df is None or snapshot.df.empty:
+            return {}
+        print(runtime, instance_type, model_name)
+        partition = snapshot.partitions.get((runtime, instance_type, model_name))
+        if partition is None:
+            return {column: [] for column in INDEXED_COLUMNS}
+
+        return {column: sorted(int(v) for v in partition.positions[column])
+                for column in INDEXED_COLUMNS}
+
+    def get_performance_data(self, filters: Dict) -> List[Dict]:
+        """Get performance data based on filters, sorted by processes for line plotting"""
+        return self.snapshot.query(filters)
+
+    def status(self) -> Dict[str, Any]:
+        """Version and reload state of the served data"""
+        snapshot = self.snapshot
+        return {
+            'version': snapshot.version,
+            'loaded_at': snapshot.loaded_at,
+            'total_results': len(snapshot.df) if snapshot.df is not None else 0,
+            'reloading': self.reloading,
+            'last_reload_error': self.last_reload_error
+        }
@@ -0,0 +1,354 @@
+"""
+Persistent SQLite index of flattened result records.
+
+Every test_*.json in the archive is flattened into one row, keyed by its path
+and stamped with the file's size and mtime. A refresh stats every file and
+re-parses only new or changed ones, so startup and reload cost scale with what
+changed rather than with the size of the archive.
+"""
+
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # Optional faster decoder
+    orjson = None
+
+
+# Bump when the flattened record layout changes; older indexes are rebuilt
+SCHEMA_VERSION = 2
+
+INDEX_FILE_NAME = ".results_index.sqlite"
+
+BOOLEAN_FIELDS = ['throughput_exact']
+
+# Below this many changed files, parsing stays in-process (a pool costs more than it saves)
+PARALLEL_THRESHOLD = 256
+
+FILENAME_PATTERN = re.compile(r'test_in:(\d+)_out:(\d+)_proc:(\d+)_rand:(\d+)\.json')
+
+
+def parse_filename(filename: str) -> Optional[Dict[str, int]]:
+    """Parse test result filename to extract parameters"""
+    match = FILENAME_PATTERN.match(filename)
+    if match:
+        return {
+            'input_tokens': int(match.group(1)),
+            'output_tokens': int(match.group(2)),
+            'processes': int(match.group(3)),
+            'random_tokens': int(match.group(4))
+        }
+    return None
+
+
+def parse_directory_name(dirname: str) -> Optional[Dict[str, str]]:
+    """Parse directory name to extract runtime, instance type, and model"""
+    parts = dirname.split('--')
+    if len(parts) >= 3:
+        model_name = '--'.join(parts[2:])
+        # Strip .yaml suffix if present
+        if model_name.endswith('.yaml'):
+            model_name = model_name[:-5]
+
+        return {
+            'runtime': parts[0],
+            'instance_type': parts[1],
+            'model_name': model_name
+        }
+    return None
+
+
+def flatten_result(result_data: Dict[str, Any], dir_info: Dict[str, str],
+                   file_info: Dict[str, int], file_path: str) -> Dict[str, Any]:
+    """Flatten one result file into the record layout used by the viz server"""
+    stats = result_data.get('statistics', {})
+    metadata = result_data.get('metadata', {})
+    # Exact token throughput, present in results from newer versions of the tool. It is
+    # only usable when the server reported token usage; otherwise the estimate is used.
+    throughput = stats.get('throughput', {})
+    exact = throughput.get('input_tokens', 0) > 0 and throughput.get('output_tokens', 0) > 0
+
+    return {
+        **dir_info,
+        **file_info,
+        'first_token_latency_mean': stats.get('first_token_latency', {}).get('mean', 0),
+        'first_token_latency_p50': stats.get('first_token_latency', {}).get('p50', 0),
+        'first_token_latency_p90': stats.get('first_token_latency', {}).get('p90', 0),
+        'first_token_latency_min': stats.get('first_token_latency', {}).get('min', 0),
+        'first_token_latency_max': stats.get('first_token_latency', {}).get('max', 0),
+        'end_to_end_latency_mean': stats.get('end_to_end_latency', {}).get('mean', 0),
+        'end_to_end_latency_p50': stats.get('end_to_end_latency', {}).get('p50', 0),
+        'end_to_end_latency_p90': stats.get('end_to_end_latency', {}).get('p90', 0),
+        'output_tokens_per_second_mean': stats.get('output_tokens_per_second', {}).get('mean', 0),
+        'output_tokens_per_second_p50': stats.get('output_tokens_per_second', {}).get('p50', 0),
+        'output_tokens_per_second_p90': stats.get('output_tokens_per_second', {}).get('p90', 0),
+        'output_tokens_per_second_min': stats.get('output_tokens_per_second', {}).get('min', 0),
+        'output_tokens_per_second_max': stats.get('output_tokens_per_second', {}).get('max', 0),
+        'success_rate': stats.get('success_rate', 0),
+        'requests_per_second': metadata.get('requests_per_second', 0),
+        'total_requests': metadata.get('total_requests', 0),
+        'successful_requests': stats.get('successful_requests', 0),
+        'failed_requests': stats.get('failed_requests', 0),
+        'total_tokens_mean': stats.get('token_usage', {}).get('total_tokens', {}).get('mean', 0),
+        'server_throughput': throughput.get('total_tokens_per_second') or metadata.get('requests_per_second', 0) * stats.get('token_usage', {}).get('total_tokens', {}).get('mean', 0),
+        'input_throughput': throughput.get('input_tokens_per_second', 0),
+        'output_throughput': throughput.get('output_tokens_per_second', 0),
+        'throughput_exact': exact,
+        'achieved_concurrency': stats.get('achieved_concurrency', {}).get('mean', 0),
+        'achieved_concurrency_p50': stats.get('achieved_concurrency', {}).get('p50', 0),
+        'achieved_concurrency_max': stats.get('achieved_concurrency', {}).get('max', 0),
+        'fraction_at_target_concurrency': stats.get('achieved_concurrency', {}).get('fraction_at_target', 0),
+        'file_path': file_path
+    }
+
+
+# Field order of a flattened record; parsed rows are tuples in this order
+RECORD_FIELDS = list(flatten_result(
+    {}, dict.fromkeys(['runtime', 'instance_type', 'model_name']),
+    dict.fromkeys(['input_tokens', 'output_tokens', 'processes', 'random_tokens']), ''
+))
+
+
+def load_json(path: str) -> Any:
+    """Read a JSON file, with orjson when it is installed"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def load_record(path: str, dir_info: Dict[str, str], file_info: Dict[str, int]) -> Dict[str, Any]:
+    """Read and flatten one result file"""
+    return flatten_result(load_json(path), dir_info, file_info, path)
+
+
+def parse_batch(batch: List[Tuple[str, Dict[str, str], Dict[str, int]]]) -> Tuple[List[tuple], List[Tuple[str, str]]]:
+    """Parse a batch of files into RECORD_FIELDS-ordered rows and (path, error) pairs (runs in worker processes)"""
+    rows, errors = [], []
+    for path, dir_info, file_info in batch:
+        try:
+            record = load_record(path, dir_info, file_info)
+            rows.append(tuple(record[name] for name in RECORD_FIELDS))
+        except Exception as e:
+            errors.append((path, str(e)))
+    return rows, errors
+
+
+class ResultsIndex:
+    """SQLite-backed index of the result archive, refreshed incrementally"""
+
+    def __init__(self, results_dir: str = "archive_results", index_path: str = None, workers: int = None):
+        """Open (or create) the index; defaults to <results_dir>/.results_index.sqlite
+        
+        workers: processes used to parse changed files (default: CPU count; 1 parses serially)
+        """
+        self.results_dir = Path(results_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.index_path = Path(index_path) if index_path else self.results_dir / INDEX_FILE_NAME
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.index_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        """Create the tables, rebuilding them if the schema version changed"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS records")
+            self.conn.execute("DROP TABLE IF EXISTS errors")
+            self.conn.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "file_path TEXT PRIMARY KEY, _size INTEGER NOT NULL, _mtime_ns INTEGER NOT NULL)"
+        )
+        # Files that failed to parse, skipped until their size or mtime changes
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS errors ("
+            "file_path TEXT PRIMARY KEY, _size INTEGER NOT NULL, _mtime_ns INTEGER NOT NULL, error TEXT)"
+        )
+        self.conn.commit()
+        self.columns = [row[1] for row in self.conn.execute("PRAGMA table_info(records)")]
+
+    def _add_columns(self, names: List[str]) -> None:
+        """Add record fields that are not columns yet (untyped, so values keep their type)"""
+        for name in names:
+            if name not in self.columns:
+                self.conn.execute(f'ALTER TABLE records ADD COLUMN "{name}"')
+                self.columns.append(name)
+
+    def scan(self) -> Dict[str, Tuple[int, int, Dict[str, str], Dict[str, int]]]:
+        """Stat every result file: path -> (size, mtime_ns, dir_info, file_info)"""
+        found = {}
+        if not self.results_dir.exists():
+            return found
+
+        for dir_entry in os.scandir(self.results_dir):
+            if not dir_entry.is_dir():
+                continue
+            dir_info = parse_directory_name(dir_entry.name)
+            if not dir_info:
+                continue
+            for file_entry in os.scandir(dir_entry.path):
+                if not file_entry.name.startswith("test_"):
+                    continue
+                file_info = parse_filename(file_entry.name)
+                if not file_info:
+                    continue
+                stat = file_entry.stat()
+                found[file_entry.path] = (stat.st_size, stat.st_mtime_ns, dir_info, file_info)
+        return found
+
+    def changed_files(self, found: Dict[str, Tuple]) -> Tuple[List[str], List[str]]:
+        """Split the scan into paths needing a (re)parse and indexed paths that disappeared
+
+        Files that failed to parse count as indexed, so they are retried only once they change.
+        """
+        indexed = {path: (size, mtime_ns) for path, size, mtime_ns in
+                   self.conn.execute("SELECT file_path, _size, _mtime_ns FROM records")}
+        failed = {path: (size, mtime_ns) for path, size, mtime_ns in
+                  self.conn.execute("SELECT file_path, _size, _mtime_ns FROM errors")}
+        changed = [path for path, (size, mtime_ns, _, _) in found.items()
+                   if indexed.get(path) != (size, mtime_ns) and failed.get(path) != (size, mtime_ns)]
+        removed = [path for path in indexed.keys() | failed.keys() if path not in found]
+        return changed, removed
+
+    def store(self, found: Dict[str, Tuple], rows: List[tuple], removed: List[str],
+              errors: List[Tuple[str, str]] = ()) -> None:
+        """Write parsed RECORD_FIELDS rows and parse errors, and drop removed files, in one transaction
+
+        A file that now fails to parse loses its previous record.
+        """
+        with self.conn:
+            gone = [(path,) for path in removed] + [(path,) for path, _ in errors]
+            if gone:
+                self.conn.executemany("DELETE FROM records WHERE file_path = ?", gone)
+            if removed:
+                self.conn.executemany("DELETE FROM errors WHERE file_path = ?", [(p,) for p in removed])
+            if errors:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO errors (file_path, _size, _mtime_ns, error) VALUES (?, ?, ?, ?)",
+                    [(path,) + found[path][:2] + (error,) for path, error in errors]
+                )
+            if not rows:
+                return
+
+            self._add_columns(RECORD_FIELDS)
+            columns = ['_size', '_mtime_ns'] + RECORD_FIELDS
+            placeholders = ', '.join('?' for _ in columns)
+            quoted = ', '.join(f'"{name}"' for name in columns)
+            path_index = RECORD_FIELDS.index('file_path')
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO records ({quoted}) VALUES ({placeholders})",
+                (found[row[path_index]][:2] + row for row in rows)
+            )
+            self.conn.executemany("DELETE FROM errors WHERE file_path = ?", [(row[path_index],) for row in rows])
+    
+    def parse(self, found: Dict[str, Tuple], paths: List[str]) -> Tuple[List[tuple], List[Tuple[str, str]]]:
+        """Parse files into rows, fanning out across worker processes for large batches"""
+        items = [(path, found[path][2], found[path][3]) for path in paths]
+        if self.workers <= 1 or len(items) < PARALLEL_THRESHOLD:
+            return parse_batch(items)
+
+        # A few batches per worker balances load without per-file IPC overhead
+        batch_size = max(1, -(-len(items) // (self.workers * 4)))
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        rows, errors = [], []
+        # Never fork: the viz server calls this with analytics, reload and watcher threads
+        # running, and a forked child can deadlock on a lock one of them held
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 mp_context=multiprocessing.get_context(start_method)) as pool:
+            for batch_rows, batch_errors in pool.map(parse_batch, batches):
+                rows.extend(batch_rows)
+                errors.extend(batch_errors)
+        return rows, errors
+
+    def refresh(self, verbose: bool = True) -> Dict[str, int]:
+        """Bring the index up to date with the archive, parsing only new or changed files
+        
+        With verbose=False the summary is only printed when something changed.
+        """
+        start = time.time()
+        found = self.scan()
+        changed, removed = self.changed_files(found)
+
+        rows, errors = self.parse(found, changed)
+        for path, error in errors:
+            print(f"Error loading {path}: {error}")
+
+        self.store(found, rows, removed, errors)
+        summary = {"files": len(found), "parsed": len(rows), "removed": len(removed),
+                   "errors": len(errors), "seconds": round(time.time() - start, 3)}
+        if verbose or changed or removed:
+            print(f"Results index: {summary['files']} files, {summary['parsed']} parsed, "
+                  f"{summary['errors']} failed, {summary['removed']} removed in {summary['seconds']}s")
+        return summary
+
+    def rebuild(self) -> Dict[str, int]:
+        """Drop every record and parse error, and re-parse the whole archive"""
+        with self.conn:
+            self.conn.execute("DELETE FROM records")
+            self.conn.execute("DELETE FROM errors")
+        return self.refresh()
+
+    def load_dataframe(self) -> pd.DataFrame:
+        """All indexed records as a DataFrame, without the bookkeeping columns"""
+        # Same column order as a flattened record: fields first, file_path last
+        fields = [name for name in self.columns if name not in ('file_path', '_size', '_mtime_ns')]
+        quoted = ', '.join(f'"{name}"' for name in fields + ['file_path'])
+        rows = self.conn.execute(f"SELECT {quoted} FROM records").fetchall()
+        # Build from column lists: much cheaper than a list of per-row dicts
+        columns = list(zip(*rows)) if rows else [()] * (len(fields) + 1)
+        df = pd.DataFrame(dict(zip(fields + ['file_path'], columns)))
+        # SQLite stores booleans as integers
+        for name in BOOLEAN_FIELDS:
+            if name in df.columns:
+                df[name] = df[name].astype(bool)
+        return df
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self.conn.close()
+
+
+def main():
+    """Main entry point for building or refreshing the results index"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or refresh the SQLite results index")
+    parser.add_argument("--results-dir", "-r", type=str, default="archive_results",
+                        help="Directory containing test results")
+    parser.add_argument("--index-file", type=str, default=None,
+                        help=f"Index file (default: <results-dir>/{INDEX_FILE_NAME})")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Re-parse every file instead of only changed ones")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Parser processes (default: CPU count)")
+    parser.add_argument("--export", type=str, default=None,
+                        help="Export the indexed records to a CSV file")
+
+    args = parser.parse_args()
+
+    index = ResultsIndex(args.results_dir, args.index_file, args.workers)
+    if args.rebuild:
+        index.rebuild()
+    else:
+        index.refresh()
+
+    if args.export:
+        index.load_dataframe().to_csv(args.export, index=False)
+        print(f"Exported records to: {args.export}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
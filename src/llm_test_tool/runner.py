@@ -3,7 +3,7 @@ Test runner module for LLM Test Tool.
 """
 
 import multiprocessing as mp
-from typing import Dict, List, Any
+from typing import Callable, Dict, Iterable, List, Any
 
 from .config import TestConfig
 from .client import LlmApiClient
@@ -13,21 +13,33 @@ class TestRunner:
     """Handles execution of the LLM API test"""
     
     @staticmethod
-    def run(config: TestConfig) -> List[Dict[str, Any]]:
-        """Run the test with the specified configuration"""
+    def run(config: TestConfig, on_result: Callable[[Dict[str, Any]], None] = None,
+            skip_request_ids: Iterable[int] = ()) -> List[Dict[str, Any]]:
+        """Run the test with the specified configuration
+        
+        on_result is called in the parent process as each request completes, and
+        requests whose IDs are in skip_request_ids are not sent (used to resume a case).
+        """
         pool = mp.Pool(processes=config.processes)
         
         # Create unique IDs for each request
-        request_ids = range(config.processes * config.requests_per_process)
+        skip_request_ids = set(skip_request_ids)
+        request_ids = [req_id for req_id in range(config.processes * config.requests_per_process)
+                       if req_id not in skip_request_ids]
         
         # Create argument list for each request
         args = [(config.model_id, config.input_tokens, config.output_tokens, 
                 req_id, config.url, config.random_tokens) for req_id in request_ids]
         
-        # Execute requests in parallel using process pool
-        results = pool.map(LlmApiClient.send_request, args)
+        # Execute requests in parallel using process pool, collecting results as they finish
+        results = []
+        for result in pool.imap_unordered(LlmApiClient.send_request, args):
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
         
         pool.close()
         pool.join()
         
-        return results
\ No newline at end of file
+        results.sort(key=lambda r: r["request_id"])
+        return results
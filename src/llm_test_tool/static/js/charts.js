@@ -59,16 +59,29 @@ export function createCharts(data) {
     });
 }
 
+export function getXValue(record) {
+    return record[STATE.xAxis] || record.processes;
+}
+
+export function getMetricValue(record, metric) {
+    const isCost = metric.startsWith('cost_per_') || metric === 'instance_price_used';
+    if (isCost && STATE.priceSheet !== 'on_demand') {
+        return record[`${metric}_${STATE.priceSheet}`];
+    }
+    return record[metric];
+}
+
 export function createChart(canvasId, title, metric, unit, data) {
     const ctx = document.getElementById(canvasId).getContext('2d');
+    const xAxis = CONFIG.X_AXES.find(axis => axis.id === STATE.xAxis) || CONFIG.X_AXES[0];
 
     const datasets = data.map((item, index) => {
         const combo = item.combination;
-        const chartData = item.data.sort((a, b) => a.processes - b.processes);
+        const chartData = item.data.sort((a, b) => getXValue(a) - getXValue(b));
 
         const processedData = chartData.map(d => ({
-            x: d.processes,
-            y: metric === 'success_rate' ? d[metric] * 100 : d[metric]
+            x: getXValue(d),
+            y: metric === 'success_rate' ? d[metric] * 100 : getMetricValue(d, metric)
         }));
 
         const runtimeName = combo.runtime;
@@ -116,7 +129,7 @@ export function createChart(canvasId, title, metric, unit, data) {
                     position: 'bottom',
                     title: {
                         display: true,
-                        text: 'Concurrent Processes'
+                        text: xAxis.label
                     }
                 },
                 y: {
@@ -174,6 +187,44 @@ export function initializeChartSettings(chartTypes) {
         settingsContainer.appendChild(setting);
     });
 
+    const axisSetting = document.createElement('div');
+    axisSetting.className = 'chart-setting';
+    const axisLabel = document.createElement('label');
+    axisLabel.htmlFor = 'chart-x-axis';
+    axisLabel.textContent = 'X axis: ';
+    const axisSelect = document.createElement('select');
+    axisSelect.id = 'chart-x-axis';
+    CONFIG.X_AXES.forEach(axis => {
+        const option = document.createElement('option');
+        option.value = axis.id;
+        option.textContent = axis.label;
+        option.selected = axis.id === STATE.xAxis;
+        axisSelect.appendChild(option);
+    });
+    axisSelect.addEventListener('change', () => setXAxis(axisSelect.value));
+    axisSetting.appendChild(axisLabel);
+    axisSetting.appendChild(axisSelect);
+    settingsContainer.appendChild(axisSetting);
+
+    const priceSetting = document.createElement('div');
+    priceSetting.className = 'chart-setting';
+    const priceLabel = document.createElement('label');
+    priceLabel.htmlFor = 'chart-price-sheet';
+    priceLabel.textContent = 'Pricing: ';
+    const priceSelect = document.createElement('select');
+    priceSelect.id = 'chart-price-sheet';
+    CONFIG.PRICE_SHEETS.forEach(sheet => {
+        const option = document.createElement('option');
+        option.value = sheet.id;
+        option.textContent = sheet.label;
+        option.selected = sheet.id === STATE.priceSheet;
+        priceSelect.appendChild(option);
+    });
+    priceSelect.addEventListener('change', () => setPriceSheet(priceSelect.value));
+    priceSetting.appendChild(priceLabel);
+    priceSetting.appendChild(priceSelect);
+    settingsContainer.appendChild(priceSetting);
+
     const buttonsDiv = document.createElement('div');
     buttonsDiv.className = 'chart-settings-buttons';
     buttonsDiv.innerHTML = `
@@ -198,6 +249,26 @@ export function toggleChart(chartId) {
     updateUrlWithState();
 }
 
+export function setXAxis(axisId) {
+    STATE.xAxis = axisId;
+
+    if (STATE.selectedCombinations.length > 0) {
+        generateCharts();
+    }
+
+    updateUrlWithState();
+}
+
+export function setPriceSheet(sheetId) {
+    STATE.priceSheet = sheetId;
+
+    if (STATE.selectedCombinations.length > 0) {
+        generateCharts();
+    }
+
+    updateUrlWithState();
+}
+
 export function showAllCharts() {
     Object.keys(STATE.chartVisibility).forEach(chartId => {
         STATE.chartVisibility[chartId] = true;
@@ -280,10 +351,12 @@ export function updateUrlWithState() {
     const settingsContent = document.getElementById('chart-settings');
     const settingsCollapsed = settingsContent && !settingsContent.classList.contains('expanded');
 
-    if (hiddenCharts.length > 0 || settingsCollapsed) {
+    if (hiddenCharts.length > 0 || settingsCollapsed || STATE.xAxis !== 'processes' || STATE.priceSheet !== 'on_demand') {
         const chartState = {
             visibility: STATE.chartVisibility,
-            settingsExpanded: !settingsCollapsed
+            settingsExpanded: !settingsCollapsed,
+            xAxis: STATE.xAxis,
+            priceSheet: STATE.priceSheet
         };
         url.searchParams.set('charts', btoa(JSON.stringify(chartState)));
     }
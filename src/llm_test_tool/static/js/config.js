@@ -22,6 +22,19 @@ export const CONFIG = {
         { id: 'cost-per-million-output-tokens', title: 'Cost per Million Output Tokens vs Concurrency', metric: 'cost_per_million_output_tokens', unit: '$' }
     ],
     
+    // X-axis choices; achieved concurrency falls back to processes for older results
+    X_AXES: [
+        { id: 'processes', label: 'Concurrent Processes' },
+        { id: 'achieved_concurrency', label: 'Achieved Concurrency' }
+    ],
+    
+    // Price sheets for cost charts; cost columns of non-default sheets carry the sheet id as suffix
+    PRICE_SHEETS: [
+        { id: 'on_demand', label: 'On-demand' },
+        { id: 'spot', label: 'Spot' },
+        { id: 'reserved', label: 'Reserved' }
+    ],
+    
     // Default slider values
     DEFAULT_SLIDERS: [
         { id: 'input-tokens', min: 100, max: 4000, default: 1600 },
@@ -36,7 +49,10 @@ export const STATE = {
     selectedCombinations: [],
     charts: {},
     currentSelection: null,
-    chartVisibility: {}
+    chartVisibility: {},
+    xAxis: 'processes',
+    priceSheet: 'on_demand',
+    dataVersion: null
 };
 
 // Utility functions
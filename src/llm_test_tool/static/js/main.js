@@ -3,7 +3,7 @@ import { Analytics } from './analytics.js';
 import { STATE } from './config.js';
 import { loadTreeStructure, filterTree } from './tree.js';
 import { disableTokenSliders, setupSliderEventListeners } from './tokens.js';
-import { generateCharts, updateComparisonList, clearCharts, updateUrlWithState, showAllCharts, hideAllCharts } from './charts.js';
+import { generateCharts, updateComparisonList, clearCharts, updateUrlWithState, showAllCharts, hideAllCharts, getMetricValue } from './charts.js';
 import { showError, showSuccess, toggleChartSettings, updateModelCheckboxStates, updateSelectedInfo } from './ui.js';
 import { findNodeFromTreeItem } from './tree.js';
 
@@ -252,6 +252,7 @@ function generateCSV(data) {
         'Output Tokens',
         'Random Tokens',
         'Processes',
+        'Achieved Concurrency',
         'First Token Latency Mean (ms)',
         'First Token Latency P50 (ms)',
         'First Token Latency P90 (ms)',
@@ -294,6 +295,7 @@ function generateCSV(data) {
                 combo.output_tokens,
                 combo.random_tokens,
                 record.processes,
+                record.achieved_concurrency || 0,
                 record.first_token_latency_mean || 0,
                 record.first_token_latency_p50 || 0,
                 record.first_token_latency_p90 || 0,
@@ -311,11 +313,11 @@ function generateCSV(data) {
                 record.input_throughput || 0,
                 record.output_throughput || 0,
                 record.server_throughput || 0,
-                record.cost_per_million_tokens || 0,
-                record.cost_per_1k_requests || 0,
-                record.cost_per_million_input_tokens || 0,
-                record.cost_per_million_output_tokens || 0,
-                record.instance_price_used || 0
+                getMetricValue(record, 'cost_per_million_tokens') || 0,
+                getMetricValue(record, 'cost_per_1k_requests') || 0,
+                getMetricValue(record, 'cost_per_million_input_tokens') || 0,
+                getMetricValue(record, 'cost_per_million_output_tokens') || 0,
+                getMetricValue(record, 'instance_price_used') || 0
             ];
             
             // Escape any commas in the data and wrap in quotes if needed
@@ -345,6 +347,12 @@ function restoreStateFromUrl() {
             const chartState = JSON.parse(atob(chartsParam));
             if (chartState.visibility) {
                 STATE.chartVisibility = chartState.visibility;
+                if (chartState.xAxis) {
+                    STATE.xAxis = chartState.xAxis;
+                }
+                if (chartState.priceSheet) {
+                    STATE.priceSheet = chartState.priceSheet;
+                }
                 if (chartState.settingsExpanded === false) {
                     setTimeout(() => {
                         const settingsContent = document.getElementById('chart-settings');
@@ -8,11 +8,34 @@ import { updateComparisonList, generateCharts, clearCharts, updateUrlWithState }
 export async function loadTreeStructure(reload = false) {
     const url = reload ? getApiUrl('/api/tree-structure?reload=true') : getApiUrl('/api/tree-structure');
     const response = await fetch(url);
-    const data = await response.json();
+    let data = await response.json();
+
+    // The server reloads in the background; wait for the new snapshot before rendering
+    if (reload && data.reloading) {
+        const version = await waitForReload();
+        if (version !== data.version) {
+            data = await (await fetch(getApiUrl('/api/tree-structure'))).json();
+        }
+    }
+
     STATE.treeData = data.tree;
+    STATE.dataVersion = data.version;
     renderTree();
 }
 
+async function waitForReload(timeoutMs = 60000, intervalMs = 500) {
+    const deadline = Date.now() + timeoutMs;
+    let status = { version: null };
+    while (Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+        status = await (await fetch(getApiUrl('/api/data-version'))).json();
+        if (!status.reloading) {
+            break;
+        }
+    }
+    return status.version;
+}
+
 export function renderTree() {
     const treeContainer = document.getElementById('runtime-tree');
     treeContainer.innerHTML = '';
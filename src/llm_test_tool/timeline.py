@@ -0,0 +1,219 @@
+"""
+Per-second timelines and steady-state detection for a test case.
+
+A closed-loop test ramps up, holds its target concurrency, then drains as the
+last processes finish, so whole-run averages mix all three phases. This module
+rebuilds per-bin timelines from request timestamps and locates the plateau.
+"""
+
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+
+# Plateau detection needs at least this many bins, and the plateau at least MIN_PLATEAU_BINS of them
+MIN_TIMELINE_BINS = 5
+MIN_PLATEAU_BINS = 3
+
+# Series longer than this are coarsened before the O(n^2) change-point search
+MAX_CHANGE_POINT_BINS = 2000
+
+
+class TimelineAnalyzer:
+    """Reconstructs time series from request intervals and finds the steady state"""
+
+    @staticmethod
+    def spread(edges: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+               amounts: np.ndarray) -> np.ndarray:
+        """Distribute each amount uniformly over [start, end) and sum it per bin
+
+        Uses the integral of the piecewise-linear cumulative amount at every bin edge,
+        so the cost is O((requests + bins) log requests). Zero-length intervals put
+        their whole amount in the bin containing the end time.
+        """
+        totals = np.zeros(len(edges) - 1)
+        duration = ends - starts
+        spanned = duration > 0
+
+        if spanned.any():
+            rates = amounts[spanned] / duration[spanned]
+            # sum_i rate_i * clip(T - x_i, 0, inf), evaluated at every edge T
+            def ramp(points: np.ndarray) -> np.ndarray:
+                order = np.argsort(points)
+                cum_rate = np.concatenate([[0.0], np.cumsum(rates[order])])
+                cum_weighted = np.concatenate([[0.0], np.cumsum(rates[order] * points[order])])
+                k = np.searchsorted(points[order], edges, side='right')
+                return edges * cum_rate[k] - cum_weighted[k]
+
+            cumulative = ramp(starts[spanned]) - ramp(ends[spanned])
+            totals += np.diff(cumulative)
+
+        if (~spanned).any():
+            totals += np.histogram(ends[~spanned], bins=edges, weights=amounts[~spanned])[0]
+
+        return totals
+
+    @staticmethod
+    def in_flight_steps(starts: np.ndarray, ends: np.ndarray) -> tuple:
+        """(levels, durations) of the in-flight request count while at least one is in flight"""
+        # Ends come first so a request starting exactly when another ends is not double counted
+        times = np.concatenate([ends, starts])
+        order = np.argsort(times, kind='stable')
+        steps = np.concatenate([-np.ones(len(ends)), np.ones(len(starts))])[order]
+
+        # levels[k] holds from times[k] to times[k + 1]
+        levels = np.cumsum(steps)[:-1]
+        durations = np.diff(times[order])
+        # Sub-microsecond steps are timestamp rounding, not real overlap
+        busy = (levels > 0) & (durations > 1e-6)
+        return levels[busy], durations[busy]
+
+    @staticmethod
+    def achieved_concurrency(columns: Dict[str, np.ndarray], target: int) -> Dict[str, Any]:
+        """Time-weighted distribution of the number of requests in flight
+
+        The in-flight count is an exact step function of the request intervals; idle
+        periods with nothing in flight (e.g. resume gaps) are excluded. Failed requests
+        count too, since they held a client process and a server slot just the same;
+        successful_mean is the mean over successful requests alone.
+        """
+        timed = ~np.isnan(columns["start_time"]) & ~np.isnan(columns["end_time"])
+        if not timed.any():
+            return {}
+
+        levels, durations = TimelineAnalyzer.in_flight_steps(columns["start_time"][timed],
+                                                             columns["end_time"][timed])
+        total = durations.sum()
+        if total <= 0:
+            return {}
+
+        by_level = np.argsort(levels, kind='stable')
+        cumulative = np.cumsum(durations[by_level])
+        median = levels[by_level][np.searchsorted(cumulative, total / 2)]
+        mean = float((levels * durations).sum() / total)
+
+        successful = timed & columns["success"]
+        successful_mean = None
+        if successful.any():
+            success_levels, success_durations = TimelineAnalyzer.in_flight_steps(
+                columns["start_time"][successful], columns["end_time"][successful])
+            if success_durations.sum() > 0:
+                successful_mean = float((success_levels * success_durations).sum() / success_durations.sum())
+
+        return {
+            "target": target,
+            "mean": mean,
+            "p50": float(median),
+            "max": int(levels.max()),
+            "fraction_at_target": float(durations[levels >= target].sum() / total),
+            "mean_to_target_ratio": mean / target if target else None,
+            "successful_mean": successful_mean
+        }
+
+    @staticmethod
+    def detect_plateau(series: np.ndarray, min_plateau: int = MIN_PLATEAU_BINS) -> Optional[tuple]:
+        """Find the (start, end) bin range of the plateau with a 3-segment least-squares fit
+
+        The series is modelled as ramp-up, plateau and drain, each a constant level;
+        the two change points minimizing the total squared error are found exhaustively
+        with prefix sums, one vectorized row of drain points per plateau start.
+        """
+        n = len(series)
+        if n < max(MIN_TIMELINE_BINS, min_plateau + 2):
+            return None
+
+        # Coarsen very long series so the n x n search stays small
+        factor = -(-n // MAX_CHANGE_POINT_BINS)
+        if factor > 1:
+            padded = np.pad(series, (0, factor * -(-n // factor) - n), mode='edge')
+            coarse = padded.reshape(-1, factor).mean(axis=1)
+            span = TimelineAnalyzer.detect_plateau(coarse, max(1, min_plateau // factor))
+            if span is None:
+                return None
+            return span[0] * factor, min(n, span[1] * factor)
+
+        s1 = np.concatenate([[0.0], np.cumsum(series)])
+        s2 = np.concatenate([[0.0], np.cumsum(series ** 2)])
+
+        def cost(a, b):
+            length = np.maximum(b - a, 1)
+            return s2[b] - s2[a] - (s1[b] - s1[a]) ** 2 / length
+
+        # i: first plateau bin, j: first drain bin; ramp-up and drain get at least one bin.
+        # One row of j per i keeps memory O(n) rather than materializing the n x n grid.
+        j = np.arange(1, n)
+        drain_cost = cost(j, np.full_like(j, n))
+        best, best_cost = None, np.inf
+        for i in range(1, n - min_plateau):
+            first_j = i + min_plateau - 1  # index into j of the shortest allowed plateau
+            row = cost(i, j[first_j:]) + drain_cost[first_j:]
+            k = int(np.argmin(row))
+            total = row[k] + cost(0, i)
+            if total < best_cost:
+                best, best_cost = (i, int(j[first_j + k])), total
+        return best
+
+    @staticmethod
+    def analyze(columns: Dict[str, np.ndarray], percentiles: List[float],
+                bin_seconds: float = 1.0) -> Dict[str, Any]:
+        """Build timelines for the successful requests and report steady-state metrics"""
+        # Imported here: analyzer imports this module
+        from .analyzer import ResultAnalyzer
+
+        success = columns["success"] & ~np.isnan(columns["start_time"]) & ~np.isnan(columns["end_time"])
+        if not success.any():
+            return {}
+
+        starts = columns["start_time"][success]
+        ends = columns["end_time"][success]
+        ttft = columns["first_token_latency"][success]
+        first_tokens = np.where(np.isnan(ttft), ends, starts + ttft)
+        prompt = np.maximum(columns["prompt_tokens"][success], 0).astype(float)
+        completion = np.maximum(columns["completion_tokens"][success], 0).astype(float)
+
+        t0 = starts.min()
+        bins = max(1, int(np.ceil((ends.max() - t0) / bin_seconds)))
+        edges = t0 + bin_seconds * np.arange(bins + 1)
+
+        in_flight = TimelineAnalyzer.spread(edges, starts, ends, ends - starts) / bin_seconds
+        prefill = TimelineAnalyzer.spread(edges, starts, first_tokens, prompt) / bin_seconds
+        output = TimelineAnalyzer.spread(edges, first_tokens, ends, completion) / bin_seconds
+
+        result = {
+            "timeline": {
+                "start_time": float(t0),
+                "bin_seconds": bin_seconds,
+                "in_flight": np.round(in_flight, 3).tolist(),
+                "output_tokens_per_second": np.round(output, 3).tolist(),
+                "prefill_tokens_per_second": np.round(prefill, 3).tolist()
+            }
+        }
+
+        plateau = TimelineAnalyzer.detect_plateau(output)
+        if plateau is None:
+            result["steady_state"] = None
+            return result
+
+        first_bin, end_bin = plateau
+        window_start, window_end = edges[first_bin], edges[end_bin]
+        inside = (starts >= window_start) & (ends <= window_end)
+        completed = (ends >= window_start) & (ends < window_end)
+
+        ttft_inside = ttft[inside]
+        e2e_inside = (ends - starts)[inside]
+        metric_args = {"percentiles": percentiles, "bootstrap_resamples": 0}
+        result["steady_state"] = {
+            "start_offset": float(window_start - t0),
+            "end_offset": float(window_end - t0),
+            "duration": float(window_end - window_start),
+            "fraction_of_run": float((window_end - window_start) / (ends.max() - t0)),
+            "mean_in_flight": float(in_flight[first_bin:end_bin].mean()),
+            "output_tokens_per_second": float(output[first_bin:end_bin].mean()),
+            "prefill_tokens_per_second": float(prefill[first_bin:end_bin].mean()),
+            "requests_per_second": float(completed.sum() / (window_end - window_start)),
+            "requests": int(inside.sum()),
+            "first_token_latency": ResultAnalyzer._calculate_metrics(
+                ttft_inside[~np.isnan(ttft_inside)], **metric_args),
+            "end_to_end_latency": ResultAnalyzer._calculate_metrics(e2e_inside, **metric_args)
+        }
+        return result
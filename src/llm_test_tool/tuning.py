@@ -0,0 +1,254 @@
+"""
+Server-argument tuning with successive halving.
+
+A config declares a search space over app_args in a `tuning` section. Every
+candidate is deployed and measured with a short representative workload; each
+round keeps the best 1/reduction_factor candidates and gives the survivors a
+larger request budget, so bad candidates are pruned after a cheap first look.
+"""
+
+import itertools
+import json
+import math
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import yaml
+
+from .deployment import VllmDeployment, PARALLEL_SIZE_ARGS
+from .config import TestConfig
+from .runner import TestRunner
+from .analyzer import ResultAnalyzer
+
+
+OBJECTIVES = ['max_throughput', 'min_latency']
+
+# app_args that together describe how a server is laid out over its GPUs
+LAYOUT_ARGS = {name for names in PARALLEL_SIZE_ARGS.values() for name in names} | {
+    'enable-expert-parallel', 'expert-parallel-size', 'ep-size', 'enable-ep-moe'
+}
+
+
+class ServerArgTuner:
+    """Searches app_args for the best server configuration"""
+
+    def __init__(self, config_path: str, output_dir: str = None, objective: str = None):
+        """Initialize from a config with a `tuning` section"""
+        self.config_path = Path(config_path)
+        with open(config_path, 'r') as f:
+            if self.config_path.suffix.lower() in ['.yaml', '.yml']:
+                self.full_config = yaml.safe_load(f)
+            else:
+                self.full_config = json.load(f)
+
+        if 'tuning' not in self.full_config:
+            raise ValueError(f"{config_path} has no 'tuning' section")
+
+        self.tuning = self.full_config['tuning']
+        self.workload = self.tuning['workload']
+        self.objective = objective or self.tuning.get('objective', 'max_throughput')
+        if self.objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{self.objective}', expected one of {OBJECTIVES}")
+        self.latency_metric = self.tuning.get('latency_metric', 'end_to_end_latency.p90')
+        self.throughput_floor = self.tuning.get('throughput_floor', 0)
+        self.reduction_factor = self.tuning.get('reduction_factor', 3)
+
+        if output_dir is None:
+            output_dir = f"tuning_results/{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.output_dir = Path(output_dir)
+        (self.output_dir / "candidates").mkdir(parents=True, exist_ok=True)
+
+        self.candidates = self._generate_candidates()
+
+    def _generate_candidates(self) -> List[Dict[str, Any]]:
+        """Expand the search space into app_args overrides
+
+        Scalar values set the app_arg of the same name; dict values (e.g. a parallel
+        layout) are merged into app_args as a group.
+        """
+        search_space = self.tuning['search_space']
+        keys = list(search_space.keys())
+
+        candidates = []
+        for values in itertools.product(*(search_space[key] for key in keys)):
+            overrides = {}
+            for key, value in zip(keys, values):
+                if isinstance(value, dict):
+                    overrides.update(value)
+                else:
+                    overrides[key] = value
+            candidates.append(overrides)
+
+        max_candidates = self.tuning.get('max_candidates')
+        if max_candidates and len(candidates) > max_candidates:
+            candidates = random.Random(self.tuning.get('seed', 0)).sample(candidates, max_candidates)
+
+        return candidates
+
+    def _write_candidate_config(self, index: int, overrides: Dict[str, Any]) -> Path:
+        """Write a deployable config for one candidate
+
+        A candidate that sets any layout arg replaces the base layout as a whole, so
+        e.g. a tp8 candidate on a tp4/dp2 base does not keep data-parallel-size.
+        """
+        config = json.loads(json.dumps(self.full_config))
+        config.pop('tuning', None)
+        deployment = config['deployment']
+        if LAYOUT_ARGS & set(overrides):
+            for section in ('app_args', 'model_config'):
+                for name in LAYOUT_ARGS:
+                    deployment.get(section, {}).pop(name, None)
+        deployment.setdefault('app_args', {}).update(overrides)
+
+        path = self.output_dir / "candidates" / f"candidate_{index:03d}.yaml"
+        with open(path, 'w') as f:
+            yaml.safe_dump(config, f, sort_keys=False)
+        return path
+
+    def _evaluate(self, index: int, overrides: Dict[str, Any], requests_per_process: int,
+                  round_index: int) -> Dict[str, Any]:
+        """Deploy one candidate, run the workload and return its measurements"""
+        config_path = self._write_candidate_config(index, overrides)
+        deployment = VllmDeployment(str(config_path))
+        trial = {"candidate": index, "app_args": overrides, "round": round_index,
+                 "requests_per_process": requests_per_process}
+
+        print(f"\n--- Round {round_index}, candidate {index}: {overrides}")
+        if not deployment.deploy(force_redeploy=True):
+            trial["error"] = deployment.failure_reason or "deployment failed"
+            deployment.cleanup()
+            return trial
+
+        try:
+            test_config = TestConfig(
+                processes=self.workload['processing_num'],
+                requests_per_process=requests_per_process,
+                model_id=deployment.get_model_id(),
+                input_tokens=self.workload['input_tokens'],
+                random_tokens=self.workload.get('random_tokens', 0),
+                output_tokens=self.workload['output_tokens'],
+                url=deployment.get_api_url(),
+                output_file=str(self.output_dir / f"round{round_index}_candidate_{index:03d}.json")
+            )
+
+            # Warm up with one request per process so CUDA graphs and caches are hot
+            warmup_config = TestConfig(**{**test_config.__dict__, 'requests_per_process': 1})
+            TestRunner.run(warmup_config)
+
+            start_time = time.time()
+            results = TestRunner.run(test_config)
+            analysis = ResultAnalyzer.analyze(results, time.time() - start_time, test_config)
+            ResultAnalyzer.save_results(analysis, test_config.output_file)
+
+            trial["throughput"] = self._output_throughput(analysis)
+            trial["latency"] = self._latency(analysis)
+            trial["success_rate"] = analysis["statistics"]["success_rate"]
+            trial["startup_timeline"] = deployment.startup_timeline
+        except Exception as e:
+            trial["error"] = str(e)
+        finally:
+            deployment.cleanup()
+
+        print(f"--- Candidate {index}: throughput={trial.get('throughput')}, "
+              f"{self.latency_metric}={trial.get('latency')}, error={trial.get('error')}")
+        return trial
+
+    @staticmethod
+    def _output_throughput(analysis: Dict[str, Any]) -> float:
+        """Server output tokens/sec over the whole workload"""
+        stats = analysis["statistics"]
+        if "throughput" in stats:
+            return stats["throughput"]["output_tokens_per_second"]
+        duration = analysis["metadata"]["total_test_duration"]
+        completion_mean = (stats.get("token_usage", {}).get("completion_tokens", {}).get("mean") or 0)
+        return stats["successful_requests"] * completion_mean / duration if duration > 0 else 0
+
+    def _latency(self, analysis: Dict[str, Any]) -> Optional[float]:
+        """Look up the configured latency metric, e.g. end_to_end_latency.p90"""
+        value = analysis["statistics"]
+        for key in self.latency_metric.split('.'):
+            value = value.get(key) if isinstance(value, dict) else None
+        return value
+
+    def _sort_key(self, trial: Dict[str, Any]):
+        """Rank trials: lower is better; failed and infeasible trials sort last"""
+        if trial.get("error") or not trial.get("success_rate"):
+            return (2, 0)
+        if self.objective == 'max_throughput':
+            return (0, -trial["throughput"])
+        if trial["throughput"] < self.throughput_floor or trial["latency"] is None:
+            return (1, -trial["throughput"])
+        return (0, trial["latency"])
+
+    def run(self) -> Dict[str, Any]:
+        """Run successive halving and save the best config"""
+        base_budget = self.workload.get('requests_per_process', 2)
+        survivors = list(range(len(self.candidates)))
+        trials = []
+
+        print(f"Tuning {len(survivors)} candidates for {self.objective}")
+        round_index = 0
+        while True:
+            budget = base_budget * self.reduction_factor ** round_index
+            round_trials = [
+                self._evaluate(index, self.candidates[index], budget, round_index)
+                for index in survivors
+            ]
+            trials.extend(round_trials)
+            round_trials.sort(key=self._sort_key)
+
+            # Failed candidates are pruned regardless of the reduction factor
+            viable = [t for t in round_trials if not t.get("error")]
+            keep = max(1, math.ceil(len(survivors) / self.reduction_factor))
+            if len(viable) <= 1 or keep == 1:
+                break
+            survivors = [t["candidate"] for t in viable[:keep]]
+            round_index += 1
+
+        best = round_trials[0] if round_trials and self._sort_key(round_trials[0])[0] == 0 else None
+        report = {
+            "objective": self.objective,
+            "latency_metric": self.latency_metric,
+            "throughput_floor": self.throughput_floor,
+            "search_space": self.tuning['search_space'],
+            "trials": trials,
+            "best": best
+        }
+
+        if best is not None:
+            best_config = self._write_candidate_config(best["candidate"], best["app_args"])
+            best_path = self.output_dir / f"best_{self.objective}.yaml"
+            best_path.write_text(best_config.read_text())
+            report["best_config_file"] = str(best_path)
+            print(f"\nBest config for {self.objective}: {best['app_args']} -> {best_path}")
+        else:
+            print(f"\nNo candidate satisfied {self.objective}")
+
+        with open(self.output_dir / "tuning_results.json", 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def main():
+    """Main entry point for tuning mode"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tune server arguments with successive halving")
+    parser.add_argument("--config", "-c", type=str, required=True,
+                        help="Path to a config with a 'tuning' section")
+    parser.add_argument("--output-dir", "-o", type=str, default=None,
+                        help="Output directory (default: tuning_results/<timestamp>)")
+    parser.add_argument("--objective", type=str, choices=OBJECTIVES, default=None,
+                        help="Override the objective from the config")
+
+    args = parser.parse_args()
+
+    tuner = ServerArgTuner(args.config, args.output_dir, args.objective)
+    tuner.run()
+
+
+if __name__ == "__main__":
+    main()
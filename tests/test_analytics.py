@@ -0,0 +1,98 @@
+"""Tests for the analytics event store and its aggregates."""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from llm_test_tool.analytics import DAILY_ACTIVITY_DAYS, UserAnalytics
+
+
+def make_request(client_id):
+    return SimpleNamespace(headers={"X-Client-ID": client_id, "User-Agent": "pytest"},
+                           client=SimpleNamespace(host="127.0.0.1"))
+
+
+@pytest.fixture
+def open_analytics(tmp_path):
+    opened = []
+
+    def factory(**kwargs):
+        kwargs.setdefault("compact_interval", 0)
+        analytics = UserAnalytics(str(tmp_path / "analytics.json"), **kwargs)
+        opened.append(analytics)
+        return analytics
+
+    yield factory
+    for analytics in opened:
+        analytics.close()
+
+
+def log_at(analytics, when, client_id, event_type, data=None):
+    with mock.patch("llm_test_tool.analytics.datetime") as clock:
+        clock.now.return_value = when
+        clock.fromisoformat = datetime.fromisoformat
+        analytics.log_event(make_request(client_id), event_type, data)
+
+
+def test_events_survive_restart(open_analytics):
+    analytics = open_analytics()
+    for client_id in ("a", "b", "a"):
+        analytics.log_event(make_request(client_id), "page_visit")
+    analytics.log_event(make_request("a"), "model_selected",
+                        {"model_name": "m", "runtime": "r", "instance_type": "i"})
+    analytics.close()
+
+    stats = open_analytics().get_stats()
+
+    assert stats["active_users"] == 2
+    assert stats["total_page_views"] == 3
+    assert stats["popular_models"] == [("m", 1)]
+
+
+def test_events_logged_during_replay_are_counted_once(open_analytics):
+    analytics = open_analytics()
+    for _ in range(5):
+        analytics.log_event(make_request("a"), "page_visit")
+    analytics.close()
+
+    restarted = open_analytics()
+    # Logged while the writer thread may still be replaying the store
+    for _ in range(3):
+        restarted.log_event(make_request("b"), "page_visit")
+    restarted.flush()
+
+    assert restarted.get_stats()["total_page_views"] == 8
+    assert restarted.loaded
+
+
+def test_recent_chart_additions_stay_ordered_after_compaction(open_analytics):
+    analytics = open_analytics(max_session_events=2, retention_days=0)
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    # "old" logs twice early; "busy" logs the rest and overflows its session cap
+    for k in range(30):
+        log_at(analytics, start + timedelta(seconds=k), "old" if k < 2 else "busy",
+               "chart_added_successfully", {"k": k})
+    analytics.compact()
+    analytics.close()
+
+    recent = open_analytics(max_session_events=2, retention_days=0).get_stats()["recent_chart_additions"]
+
+    assert [event["data"]["k"] for event in recent] == list(range(29, 9, -1))
+
+
+def test_daily_activity_is_bounded_to_the_reporting_window(open_analytics):
+    analytics = open_analytics(retention_days=0)
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    for day in range(DAILY_ACTIVITY_DAYS + 10):
+        log_at(analytics, start + timedelta(days=day), "a", "page_visit")
+    # A late event for a day before the window is counted but not kept per day
+    log_at(analytics, start, "a", "page_visit")
+
+    stats = analytics.get_stats()
+
+    assert len(analytics._aggregates.daily) == DAILY_ACTIVITY_DAYS
+    assert stats["total_page_views"] == DAILY_ACTIVITY_DAYS + 11
+    assert stats["daily_activity"][0]["date"] == (start + timedelta(days=10)).date().isoformat()
+    assert stats["daily_activity"][-1]["date"] == (start + timedelta(days=DAILY_ACTIVITY_DAYS + 9)).date().isoformat()
@@ -0,0 +1,55 @@
+"""Tests for the order-statistic bootstrap confidence intervals."""
+
+import numpy as np
+import pytest
+
+from llm_test_tool.analyzer import ResultAnalyzer
+
+
+def naive_bootstrap(values, p, resamples, seed):
+    rng = np.random.default_rng(seed)
+    draws = values[rng.integers(0, len(values), size=(resamples, len(values)))]
+    return np.quantile(np.quantile(draws, p / 100, axis=1), [0.025, 0.975])
+
+
+@pytest.mark.parametrize("p", [50, 90, 99])
+def test_percentile_intervals_match_a_direct_bootstrap(p):
+    values = np.sort(np.random.default_rng(0).lognormal(0, 0.5, 300))
+
+    low, high = ResultAnalyzer.bootstrap_ci(values, [p], resamples=4000)[f"p{p}"]
+    expected_low, expected_high = naive_bootstrap(values, p, 4000, seed=1)
+
+    spread = expected_high - expected_low
+    assert low == pytest.approx(expected_low, abs=0.1 * spread)
+    assert high == pytest.approx(expected_high, abs=0.1 * spread)
+
+
+def test_intervals_contain_the_point_estimates():
+    values = np.sort(np.random.default_rng(1).exponential(1.0, 500))
+
+    intervals = ResultAnalyzer.bootstrap_ci(values, [50, 99.9])
+
+    for key, estimate in [("mean", values.mean()), ("p50", np.quantile(values, 0.5)),
+                          ("p99.9", np.quantile(values, 0.999))]:
+        low, high = intervals[key]
+        assert low <= estimate <= high
+
+
+def test_intervals_are_reproducible_and_narrow_with_more_samples():
+    rng = np.random.default_rng(2)
+    small, large = np.sort(rng.normal(10, 1, 50)), np.sort(rng.normal(10, 1, 5000))
+
+    wide = ResultAnalyzer.bootstrap_ci(small, [50])
+    assert ResultAnalyzer.bootstrap_ci(small, [50]) == wide
+
+    def width(interval):
+        return interval[1] - interval[0]
+
+    narrow = ResultAnalyzer.bootstrap_ci(large, [50])
+    assert width(narrow["mean"]) < width(wide["mean"])
+    assert width(narrow["p50"]) < width(wide["p50"])
+
+
+def test_degenerate_samples():
+    assert ResultAnalyzer.bootstrap_ci(np.array([2.5]), [50]) == {"mean": [2.5, 2.5], "p50": [2.5, 2.5]}
+    assert ResultAnalyzer.bootstrap_ci(np.array([]), [50]) == {"mean": [None, None], "p50": [None, None]}
@@ -0,0 +1,37 @@
+"""Tests for the automated test-matrix runner."""
+
+import json
+
+import yaml
+
+from llm_test_tool.auto_test import AutoTestRunner
+
+
+def write_config(tmp_path, replicas):
+    config = {
+        "deployment": {
+            "docker_image": "vllm/vllm-openai:latest",
+            "container_name": "vllm",
+            "port": 8000,
+            "replicas": replicas,
+            "total_gpus": 8,
+            "app_args": {"model": "m", "tensor-parallel-size": 8},
+        },
+        "test_matrix": {"input_tokens": [100], "output_tokens": [10],
+                        "processing_num": [1], "random_tokens": [0]},
+        "test_config": {"requests_per_process": 1, "warmup_requests": 0, "cooldown_seconds": 0},
+    }
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump(config))
+    return path
+
+
+def test_completed_matrix_does_not_plan_replicas(tmp_path):
+    # Two tp8 replicas do not fit on 8 GPUs, but nothing needs deploying
+    runner = AutoTestRunner(str(write_config(tmp_path, replicas=2)), output_dir=str(tmp_path / "out"))
+    result_file = tmp_path / "out" / f"test_{runner.test_cases[0]}.json"
+    result_file.write_text(json.dumps({"metadata": {}, "statistics": {}}))
+
+    results = runner.run_all_tests()
+
+    assert [replica["port"] for replica in results["replicas"]] == [8000]
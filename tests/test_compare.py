@@ -0,0 +1,120 @@
+"""Tests for the regression statistics: Mann-Whitney U, Cliff's delta and Holm correction."""
+
+import json
+
+import numpy as np
+import pytest
+
+from llm_test_tool.compare import ResultComparator, effect_size_label, mann_whitney_u
+
+
+def brute_force_delta(x, y):
+    greater = sum(a > b for a in x for b in y)
+    less = sum(a < b for a in x for b in y)
+    return (greater - less) / (len(x) * len(y))
+
+
+def test_mann_whitney_u_on_separated_samples():
+    u1, p_value, delta = mann_whitney_u(np.array([1.0, 2.0, 3.0]), np.array([4.0, 5.0, 6.0]))
+
+    assert u1 == 0
+    assert delta == -1
+    # Normal approximation with continuity correction, as scipy's asymptotic method
+    assert p_value == pytest.approx(0.0808556, abs=1e-6)
+
+
+def test_mann_whitney_u_is_symmetric():
+    rng = np.random.default_rng(1)
+    x, y = rng.normal(0, 1, 40), rng.normal(0.5, 1, 30)
+
+    u_xy, p_xy, delta_xy = mann_whitney_u(x, y)
+    u_yx, p_yx, delta_yx = mann_whitney_u(y, x)
+
+    assert u_xy + u_yx == len(x) * len(y)
+    assert p_xy == pytest.approx(p_yx)
+    assert delta_xy == pytest.approx(-delta_yx)
+
+
+def test_cliffs_delta_with_ties_matches_pairwise_count():
+    rng = np.random.default_rng(2)
+    x = rng.integers(0, 5, 25).astype(float)
+    y = rng.integers(1, 6, 20).astype(float)
+
+    _, _, delta = mann_whitney_u(x, y)
+
+    assert delta == pytest.approx(brute_force_delta(x, y))
+
+
+def test_identical_constant_samples_are_not_significant():
+    _, p_value, delta = mann_whitney_u(np.full(10, 3.0), np.full(10, 3.0))
+    assert (p_value, delta) == (1.0, 0.0)
+
+
+@pytest.mark.parametrize("delta, label", [
+    (0.0, "negligible"), (-0.14, "negligible"), (0.147, "small"), (-0.32, "small"),
+    (0.33, "medium"), (0.474, "large"), (-1.0, "large"),
+])
+def test_effect_size_label(delta, label):
+    assert effect_size_label(delta) == label
+
+
+def comparator(tmp_path, **kwargs):
+    (tmp_path / "baseline").mkdir(exist_ok=True)
+    (tmp_path / "candidate").mkdir(exist_ok=True)
+    return ResultComparator(str(tmp_path / "baseline"), str(tmp_path / "candidate"), **kwargs)
+
+
+def comparison(p_value, worsening):
+    return {"p_value": p_value, "worsening": worsening}
+
+
+def test_holm_adjustment_is_step_down_and_monotone(tmp_path):
+    comparisons = [comparison(0.04, 0.2), comparison(0.01, 0.2), comparison(0.03, 0.2), comparison(None, 0.2)]
+
+    comparator(tmp_path)._classify(comparisons)
+
+    # Sorted p-values 0.01, 0.03, 0.04 scaled by 3, 2, 1 and made non-decreasing
+    assert [c.get("adjusted_p_value") for c in comparisons] == pytest.approx([0.06, 0.03, 0.06, None])
+    assert [c["status"] for c in comparisons] == ["unchanged", "regression", "unchanged", "untested"]
+
+
+def test_classification_needs_significance_and_threshold(tmp_path):
+    comparisons = [comparison(0.001, 0.10), comparison(0.001, -0.10), comparison(0.001, 0.01),
+                   comparison(None, 0.10)]
+
+    comparator(tmp_path, threshold=0.05, allow_median_only=True)._classify(comparisons)
+
+    assert [c["status"] for c in comparisons] == ["regression", "improvement", "unchanged", "regression"]
+
+
+def write_case(directory, samples=None, p50=1.0):
+    stem = "test_in:100_out:10_proc:4_rand:0"
+    result = {"metadata": {"input_tokens": 100, "output_tokens": 10, "processes": 4, "random_tokens": 0},
+              "statistics": {"first_token_latency": {"p50": p50}}}
+    (directory / f"{stem}.json").write_text(json.dumps(result))
+    if samples is not None:
+        np.savez_compressed(directory / f"{stem}.samples.npz", first_token_latency=samples)
+
+
+def test_compare_flags_a_slower_candidate_from_sidecar_samples(tmp_path):
+    rng = np.random.default_rng(3)
+    cmp = comparator(tmp_path, metrics=["first_token_latency"])
+    write_case(cmp.baseline_dir, rng.normal(1.0, 0.05, 200))
+    write_case(cmp.candidate_dir, rng.normal(1.2, 0.05, 200))
+
+    report = cmp.compare()
+
+    assert (report["regressions"], report["untested"]) == (1, 0)
+    [result] = report["comparisons"]
+    assert result["relative_change"] == pytest.approx(0.2, abs=0.02)
+    assert result["effect_size"] == "large"
+
+
+def test_compare_without_samples_is_untested(tmp_path):
+    cmp = comparator(tmp_path, metrics=["first_token_latency"])
+    write_case(cmp.baseline_dir, p50=1.0)
+    write_case(cmp.candidate_dir, p50=2.0)
+
+    report = cmp.compare()
+
+    assert (report["regressions"], report["untested"]) == (0, 1)
@@ -0,0 +1,75 @@
+"""Tests for container adoption and health waits, driven by the fake docker in benchmarks/."""
+
+import socket
+import subprocess
+from pathlib import Path
+from unittest import mock
+
+import pytest
+import yaml
+
+from llm_test_tool.deployment import FINGERPRINT_LABEL, VllmDeployment
+
+FAKE_DOCKER = str(Path(__file__).resolve().parent.parent / "benchmarks" / "fake_docker")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def fake_docker(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOCKER_BIN", FAKE_DOCKER)
+    monkeypatch.setenv("FAKE_DOCKER_STATE", str(tmp_path / "docker"))
+    started = []
+
+    def run(name, port, label):
+        subprocess.run([FAKE_DOCKER, "run", "--label", label, "-p", f"{port}:{port}", "--name", name, "-d",
+                        "vllm/vllm-openai:latest"], check=True, capture_output=True)
+        started.append(name)
+
+    yield run
+    for name in started:
+        subprocess.run([FAKE_DOCKER, "rm", "-f", name], capture_output=True)
+
+
+def make_deployment(tmp_path, container_name, port):
+    config = {"deployment": {"docker_image": "vllm/vllm-openai:latest", "container_name": container_name,
+                             "port": port, "app_args": {"model": "m"}}}
+    path = tmp_path / f"{container_name}.yaml"
+    path.write_text(yaml.safe_dump(config))
+    return VllmDeployment(str(path))
+
+
+def test_adopts_matching_container_with_its_own_name(tmp_path, fake_docker):
+    deployment = make_deployment(tmp_path, "vllm", free_port())
+    fake_docker("vllm", deployment.port, f"{FINGERPRINT_LABEL}={deployment.fingerprint()}")
+
+    assert deployment.find_matching_container() == "vllm"
+
+
+def test_does_not_adopt_someone_elses_container(tmp_path, fake_docker):
+    deployment = make_deployment(tmp_path, "vllm", free_port())
+    fake_docker("other-campaign-0", deployment.port, f"{FINGERPRINT_LABEL}={deployment.fingerprint()}")
+
+    assert deployment.find_matching_container() is None
+    assert not deployment.adopt_existing_container()
+    assert deployment.container_name == "vllm"
+
+
+def test_health_wait_reaps_the_log_follower(tmp_path, fake_docker):
+    deployment = make_deployment(tmp_path, "vllm", free_port())
+    fake_docker("vllm", deployment.port, f"{FINGERPRINT_LABEL}={deployment.fingerprint()}")
+    followers = []
+    popen = subprocess.Popen
+
+    def record(*args, **kwargs):
+        followers.append(popen(*args, **kwargs))
+        return followers[-1]
+
+    with mock.patch("llm_test_tool.deployment.subprocess.Popen", side_effect=record):
+        assert deployment.wait_for_health(timeout=30)
+
+    assert followers and all(process.returncode is not None for process in followers)
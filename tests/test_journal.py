@@ -0,0 +1,59 @@
+"""Tests for resuming interrupted test cases from the request journal."""
+
+import json
+
+from llm_test_tool.journal import RequestJournal
+
+
+def write_journal(path, config_hash, results):
+    journal = RequestJournal(str(path), config_hash)
+    for result in results:
+        journal.append(result)
+    journal.close()
+
+
+def ok(request_id):
+    return {"request_id": request_id, "success": True, "first_token_latency": 0.1 * request_id}
+
+
+def test_same_config_hash_resumes_completed_requests(tmp_path):
+    path = tmp_path / "case.journal"
+    write_journal(path, "abc", [ok(0), ok(1), ok(2)])
+
+    completed = RequestJournal(str(path), "abc").load()
+
+    assert sorted(completed) == [0, 1, 2]
+    assert completed[1] == ok(1)
+
+
+def test_different_config_hash_discards_the_journal(tmp_path):
+    path = tmp_path / "case.journal"
+    write_journal(path, "abc", [ok(0), ok(1)])
+
+    assert RequestJournal(str(path), "def").load() == {}
+    assert not path.exists()
+
+
+def test_failed_requests_are_not_journaled(tmp_path):
+    path = tmp_path / "case.journal"
+    write_journal(path, "abc", [ok(0), {"request_id": 1, "success": False, "error": "timeout"}, ok(2)])
+
+    assert sorted(RequestJournal(str(path), "abc").load()) == [0, 2]
+
+
+def test_torn_last_line_is_dropped_and_appends_continue(tmp_path):
+    path = tmp_path / "case.journal"
+    write_journal(path, "abc", [ok(0), ok(1)])
+    with open(path, "a") as f:
+        f.write(json.dumps(ok(2))[:10])
+
+    journal = RequestJournal(str(path), "abc")
+    assert sorted(journal.load()) == [0, 1]
+    journal.append(ok(3))
+    journal.close()
+
+    assert sorted(RequestJournal(str(path), "abc").load()) == [0, 1, 3]
+
+
+def test_missing_journal_starts_empty(tmp_path):
+    assert RequestJournal(str(tmp_path / "none.journal"), "abc").load() == {}
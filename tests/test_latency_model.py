@@ -0,0 +1,42 @@
+"""Tests for the TTFT and TPOT cost model fits."""
+
+import json
+
+import pytest
+
+from llm_test_tool.latency_model import LatencyModel
+
+
+def write_case(directory, input_tokens, output_tokens, processes):
+    ttft = 0.05 + 0.001 * input_tokens + 0.0002 * input_tokens * (processes - 1)
+    tpot = 0.01 + 0.002 * processes
+    result = {"metadata": {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                           "processes": processes, "random_tokens": 0},
+              "statistics": {"first_token_latency": {"mean": ttft},
+                             "end_to_end_latency": {"mean": ttft + tpot * (output_tokens - 1)}}}
+    name = f"test_in:{input_tokens}_out:{output_tokens}_proc:{processes}_rand:0.json"
+    (directory / name).write_text(json.dumps(result))
+
+
+def test_fit_recovers_known_coefficients(tmp_path):
+    for input_tokens in [100, 1000, 4000]:
+        for processes in [1, 4, 16]:
+            write_case(tmp_path, input_tokens, 128, processes)
+
+    report = LatencyModel(str(tmp_path)).fit()
+
+    ttft, tpot = report["ttft_model"], report["tpot_model"]
+    assert report["cases"] == 9
+    assert ttft["intercept"] == pytest.approx(0.05)
+    assert ttft["prefill_tokens_per_second"] == pytest.approx(1000)
+    assert ttft["queueing_per_input_token"] == pytest.approx(0.0002)
+    assert tpot["decode_step_time_batch_1"] == pytest.approx(0.012)
+    assert tpot["per_batch_request"] == pytest.approx(0.002)
+    assert ttft["r_squared"] == pytest.approx(1.0)
+
+
+def test_fit_needs_four_cases(tmp_path):
+    for processes in [1, 2, 4]:
+        write_case(tmp_path, 100, 10, processes)
+
+    assert "error" in LatencyModel(str(tmp_path)).fit()
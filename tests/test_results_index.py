@@ -0,0 +1,71 @@
+"""Tests for the results index and the record layout it stores."""
+
+import json
+import os
+import time
+
+from llm_test_tool.results_index import ResultsIndex, flatten_result
+
+
+DIR_INFO = {"runtime": "vllm", "instance_type": "p5.48xlarge", "model_name": "m"}
+FILE_INFO = {"input_tokens": 100, "output_tokens": 10, "processes": 4, "random_tokens": 0}
+
+
+def flatten(throughput):
+    return flatten_result({"statistics": {"throughput": throughput}}, DIR_INFO, FILE_INFO, "f.json")
+
+
+def test_throughput_with_reported_usage_is_exact():
+    record = flatten({"input_tokens": 400, "output_tokens": 40, "total_tokens_per_second": 44.0})
+    assert record["throughput_exact"]
+    assert record["server_throughput"] == 44.0
+
+
+def test_throughput_without_reported_usage_falls_back_to_estimate():
+    record = flatten({"input_tokens": 0, "output_tokens": 0, "total_tokens_per_second": 0.0})
+    assert not record["throughput_exact"]
+
+
+def test_results_without_throughput_are_estimated():
+    assert not flatten({})["throughput_exact"]
+
+
+def write_result(directory, name, content):
+    path = directory / name
+    path.write_text(content)
+    return path
+
+
+def test_refresh_skips_unchanged_files_that_failed_to_parse(tmp_path):
+    directory = tmp_path / "vllm--p5.48xlarge--m"
+    directory.mkdir()
+    write_result(directory, "test_in:100_out:10_proc:4_rand:0.json", json.dumps({"statistics": {}}))
+    broken = write_result(directory, "test_in:200_out:10_proc:4_rand:0.json", "{not json")
+    index = ResultsIndex(str(tmp_path), workers=1)
+
+    first = index.refresh()
+    second = index.refresh()
+    broken.write_text(json.dumps({"statistics": {}}))
+    os.utime(broken, ns=(time.time_ns(), time.time_ns() + 10**9))
+    third = index.refresh()
+
+    assert (first["parsed"], first["errors"]) == (1, 1)
+    assert (second["parsed"], second["errors"]) == (0, 0)
+    assert (third["parsed"], third["errors"]) == (1, 0)
+    assert len(index.load_dataframe()) == 2
+    index.close()
+
+
+def test_file_that_becomes_invalid_loses_its_record(tmp_path):
+    directory = tmp_path / "vllm--p5.48xlarge--m"
+    directory.mkdir()
+    path = write_result(directory, "test_in:100_out:10_proc:4_rand:0.json", json.dumps({"statistics": {}}))
+    index = ResultsIndex(str(tmp_path), workers=1)
+    index.refresh()
+
+    path.write_text("{truncated")
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    index.refresh()
+
+    assert len(index.load_dataframe()) == 0
+    index.close()
@@ -0,0 +1,61 @@
+"""Tests for steady-state detection on in-flight concurrency timelines."""
+
+import numpy as np
+import pytest
+
+from llm_test_tool.timeline import MAX_CHANGE_POINT_BINS, TimelineAnalyzer
+
+
+def brute_force_plateau(series, min_plateau):
+    def sse(segment):
+        return ((segment - segment.mean()) ** 2).sum()
+
+    n = len(series)
+    candidates = ((sse(series[:i]) + sse(series[i:j]) + sse(series[j:]), (i, j))
+                  for i in range(1, n) for j in range(i + min_plateau, n))
+    return min(candidates)[1]
+
+
+def ramp_plateau_drain(ramp, plateau, drain, level=8.0):
+    return np.concatenate([np.linspace(0, level, ramp, endpoint=False), np.full(plateau, level),
+                           np.linspace(level, 0, drain + 1)[1:]])
+
+
+def test_recovers_step_boundaries():
+    series = np.concatenate([np.full(4, 1.0), np.full(10, 8.0), np.full(3, 2.0)])
+    assert TimelineAnalyzer.detect_plateau(series) == (4, 14)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_exhaustive_search(seed):
+    rng = np.random.default_rng(seed)
+    series = ramp_plateau_drain(6, 20, 5) + rng.normal(0, 0.5, 31)
+    assert TimelineAnalyzer.detect_plateau(series, 3) == brute_force_plateau(series, 3)
+
+
+def test_short_series_has_no_plateau():
+    assert TimelineAnalyzer.detect_plateau(np.ones(4)) is None
+    assert TimelineAnalyzer.detect_plateau(np.ones(6), min_plateau=5) is None
+
+
+def test_long_series_is_coarsened_onto_the_original_bins():
+    factor = 3
+    ramp, plateau = 400 * factor, 1200 * factor
+    series = np.concatenate([np.full(ramp, 1.0), np.full(plateau, 8.0), np.full(400 * factor, 1.0)])
+    assert len(series) > MAX_CHANGE_POINT_BINS
+
+    assert TimelineAnalyzer.detect_plateau(series) == (ramp, ramp + plateau)
+
+
+def test_achieved_concurrency_counts_overlapping_requests():
+    columns = {"start_time": np.array([0.0, 0.0, 1.0, 2.0]), "end_time": np.array([2.0, 4.0, 3.0, 4.0]),
+               "success": np.array([True, True, True, False])}
+
+    report = TimelineAnalyzer.achieved_concurrency(columns, target=3)
+
+    # In flight: 2 over [0, 1), 3 over [1, 2), 3 over [2, 3), 2 over [3, 4)
+    assert report["mean"] == pytest.approx(2.5)
+    assert report["max"] == 3
+    assert report["fraction_at_target"] == pytest.approx(0.5)
+    # The failed request still held a slot; without it: 2, 3, 2, 1
+    assert report["successful_mean"] == pytest.approx(2.0)
@@ -0,0 +1,64 @@
+"""Tests for candidate configs written by the server-argument tuner."""
+
+import yaml
+
+from llm_test_tool.deployment import VllmDeployment
+from llm_test_tool.tuning import ServerArgTuner
+
+
+def make_tuner(tmp_path, app_args, search_space):
+    config = {
+        "deployment": {
+            "docker_image": "vllm/vllm-openai:latest",
+            "container_name": "vllm",
+            "port": 8000,
+            "app_args": app_args,
+        },
+        "tuning": {
+            "search_space": search_space,
+            "workload": {"input_tokens": 100, "output_tokens": 10, "processing_num": 1},
+        },
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+    return ServerArgTuner(str(config_path), output_dir=str(tmp_path / "out"))
+
+
+def test_layout_candidate_replaces_base_layout(tmp_path):
+    tuner = make_tuner(
+        tmp_path,
+        {"model": "m", "tensor-parallel-size": 4, "data-parallel-size": 2, "max-num-seqs": 256},
+        {"layout": [{"tensor-parallel-size": 8}]},
+    )
+
+    path = tuner._write_candidate_config(0, tuner.candidates[0])
+
+    app_args = yaml.safe_load(path.read_text())["deployment"]["app_args"]
+    assert app_args == {"model": "m", "tensor-parallel-size": 8, "max-num-seqs": 256}
+    assert VllmDeployment(str(path)).get_gpu_count() == 8
+
+
+def test_layout_candidate_drops_expert_parallel_flag(tmp_path):
+    tuner = make_tuner(
+        tmp_path,
+        {"model": "m", "tensor-parallel-size": 8, "enable-expert-parallel": True},
+        {"layout": [{"tensor-parallel-size": 4, "data-parallel-size": 2}]},
+    )
+
+    path = tuner._write_candidate_config(0, tuner.candidates[0])
+
+    app_args = yaml.safe_load(path.read_text())["deployment"]["app_args"]
+    assert app_args == {"model": "m", "tensor-parallel-size": 4, "data-parallel-size": 2}
+
+
+def test_scalar_candidate_keeps_base_layout(tmp_path):
+    tuner = make_tuner(
+        tmp_path,
+        {"model": "m", "tensor-parallel-size": 4, "data-parallel-size": 2},
+        {"max-num-seqs": [128]},
+    )
+
+    path = tuner._write_candidate_config(0, tuner.candidates[0])
+
+    app_args = yaml.safe_load(path.read_text())["deployment"]["app_args"]
+    assert app_args == {"model": "m", "tensor-parallel-size": 4, "data-parallel-size": 2, "max-num-seqs": 128}